@@ -0,0 +1,82 @@
+"""Benchmark spec loading: the dict path (decode, parse, validate) against the fast loader.
+
+uv run python scripts/bench_load.py --outputs 10000 100000 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import yaml
+
+from prl.cli import _load_spec
+from prl.io import read_text_any
+from prl.spec import RunSpec
+
+
+def make_spec(outputs: int) -> dict:
+    tasks = max(1, outputs // 4)
+    return {
+        "candidates": [{"id": f"c{i}", "content": "Answer: {{input}}"} for i in range(4)],
+        "tasks": [
+            {"id": f"t{i}", "input": f"question {i}", "expected": str(i), "judge_rule": "exact"}
+            for i in range(tasks)
+        ],
+        "outputs": [
+            {"candidate_id": f"c{i % 4}", "task_id": f"t{i % tasks}", "output": f"answer {i}"}
+            for i in range(outputs)
+        ],
+    }
+
+
+def dict_path(path: Path) -> RunSpec:
+    """The previous loader, kept here as the baseline."""
+    content = read_text_any(path)
+    if path.suffix == ".json":
+        return RunSpec.model_validate(json.loads(content))
+    return RunSpec.model_validate(yaml.safe_load(content))
+
+
+def best_of(runs: int, load: Callable[[Path], object], path: Path) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        load(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--outputs", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--yaml-limit", type=int, default=100_000, help="Skip larger YAML specs.")
+    args = parser.parse_args()
+
+    print(f"libyaml: {'yes' if hasattr(yaml, 'CSafeLoader') else 'no'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for outputs in args.outputs:
+            spec = make_spec(outputs)
+            formats = [("json", json.dumps)]
+            if outputs <= args.yaml_limit:
+                formats.append(("yaml", yaml.safe_dump))
+            for suffix, dump in formats:
+                path = Path(tmp) / f"spec_{outputs}.{suffix}"
+                path.write_text(dump(spec), encoding="utf-8")
+                size = path.stat().st_size / 1e6
+                baseline = best_of(args.runs, dict_path, path)
+                fast = best_of(args.runs, _load_spec, path)
+                print(
+                    f"{suffix:>4} {outputs:>9,} outputs ({size:7.1f} MB): "
+                    f"dict {baseline:6.2f}s  fast {fast:6.2f}s  ({baseline / fast:.2f}x)"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""Benchmark per-output rule scoring against compiled per-task scorers.
+
+uv run python scripts/bench_rules.py --tasks 2000 --outputs-per-task 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Any
+
+from prl.evaluators import EvalOutcome, RuleBasedEvaluator
+
+
+def legacy_score(*, expected: str, output: str, rule: dict[str, Any] | str) -> EvalOutcome:
+    """The pre-compilation scoring path, kept here as the baseline."""
+    if isinstance(rule, str):
+        rule = {"type": rule}
+    rule_type = rule.get("type", "exact")
+    if rule_type == "exact":
+        return EvalOutcome(score=1.0 if output == expected else 0.0)
+    if rule_type == "regex":
+        return EvalOutcome(score=1.0 if re.search(rule.get("pattern", ""), output) else 0.0)
+    if rule_type == "numeric":
+        try:
+            value = float(output)
+        except ValueError:
+            return EvalOutcome(score=0.0, reason="output_not_numeric")
+        if rule.get("min") is not None and value < float(rule["min"]):
+            return EvalOutcome(score=0.0)
+        if rule.get("max") is not None and value > float(rule["max"]):
+            return EvalOutcome(score=0.0)
+        return EvalOutcome(score=1.0)
+    return EvalOutcome(score=0.0, reason=f"unknown_rule:{rule_type}")
+
+
+def make_rules(count: int, rng: random.Random) -> list[dict[str, Any]]:
+    rules: list[dict[str, Any]] = []
+    for index in range(count):
+        kind = index % 3
+        if kind == 0:
+            rules.append({"type": "exact"})
+        elif kind == 1:
+            rules.append({"type": "regex", "pattern": rf"\b{rng.randint(0, 99)}\b|answer-{index}"})
+        else:
+            rules.append({"type": "numeric", "min": rng.randint(0, 50), "max": rng.randint(50, 99)})
+    return rules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--outputs-per-task", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = make_rules(args.tasks, rng)
+    expected = [str(rng.randint(0, 99)) for _ in range(args.tasks)]
+    outputs = [
+        [str(rng.randint(0, 99)) for _ in range(args.outputs_per_task)] for _ in range(args.tasks)
+    ]
+    total = args.tasks * args.outputs_per_task
+    evaluator = RuleBasedEvaluator()
+
+    start = time.perf_counter()
+    for rule, exp, task_outputs in zip(rules, expected, outputs, strict=True):
+        for output in task_outputs:
+            legacy_score(expected=exp, output=output, rule=rule)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for rule, exp, task_outputs in zip(rules, expected, outputs, strict=True):
+        evaluator.score_many(expected=exp, outputs=task_outputs, rule=rule)
+    compiled = time.perf_counter() - start
+
+    print(f"per-output: {total / legacy:,.0f} outputs/s")
+    print(f"  compiled: {total / compiled:,.0f} outputs/s")
+    print(f"   speedup: {legacy / compiled:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
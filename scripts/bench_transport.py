@@ -0,0 +1,86 @@
+"""Micro-benchmark: fresh urllib connections vs the pooled prl transport.
+
+Runs against a local keep-alive stub so the numbers only reflect connection overhead.
+
+    uv run python scripts/bench_transport.py --requests 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prl.llm_clients import ConnectionPool
+
+BODY = json.dumps({"message": {"content": '{"score": 1.0, "reason": "ok"}'}}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def bench_urllib(url: str, payload: bytes, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        request = urllib.request.Request(
+            url, data=payload, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+    return time.perf_counter() - start
+
+
+def bench_pool(url: str, payload: bytes, count: int) -> float:
+    pool = ConnectionPool()
+    start = time.perf_counter()
+    for _ in range(count):
+        pool.request("POST", url, payload, {"Content-Type": "application/json"})
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/api/chat"
+    payload = json.dumps({"model": "stub", "messages": []}).encode("utf-8")
+
+    try:
+        results = {
+            "urllib": bench_urllib(url, payload, args.requests),
+            "pooled": bench_pool(url, payload, args.requests),
+        }
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    for name, elapsed in results.items():
+        per_request_ms = elapsed / args.requests * 1000
+        print(f"{name:>7}: {per_request_ms:.3f} ms/request ({args.requests} requests)")
+    print(f"speedup: {results['urllib'] / results['pooled']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,69 @@
+"""Benchmark rule-based scoring throughput for `prl evaluate --workers N`.
+
+uv run python scripts/bench_workers.py --tasks 1000 --outputs-per-task 500 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+
+from prl.models import Candidate, Task
+from prl.skill import ScoreBoard, fill_board_from_shards, iter_rule_shards
+from prl.spec import RunSpec
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--outputs-per-task", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = [{"type": "exact"}, {"type": "regex", "pattern": r"\b4\d\b"}, {"type": "numeric"}]
+    spec = RunSpec(
+        candidates=[Candidate(id=f"c{i}", content="") for i in range(8)],
+        tasks=[
+            Task(id=f"t{i}", input="", expected=str(i % 100), judge_rule=rules[i % 3])
+            for i in range(args.tasks)
+        ],
+    )
+    records = [
+        (
+            "bench",
+            index,
+            json.dumps(
+                {
+                    "candidate_id": f"c{index % 8}",
+                    "task_id": f"t{index % args.tasks}",
+                    "output": str(rng.randint(0, 99)),
+                }
+            ),
+        )
+        for index in range(args.tasks * args.outputs_per_task)
+    ]
+
+    print(f"{len(records):,} outputs on {os.cpu_count()} cores")
+    baseline = None
+    for workers in args.workers:
+        board = ScoreBoard(spec.candidates)
+        start = time.perf_counter()
+        fill_board_from_shards(
+            board, iter_rule_shards(spec, records, workers=workers), spec.evaluator
+        )
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"workers={workers:>2}: {len(records) / elapsed:,.0f} outputs/s "
+            f"({baseline / elapsed:.2f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -68,7 +68,7 @@ def main() -> int:
         config_path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
 
         result = subprocess.run(
-            ["prl", "optimize", str(config_path), "--steps", "1"],
+            ["prl", "optimize", str(config_path)],
             check=False,
             capture_output=True,
             text=True,
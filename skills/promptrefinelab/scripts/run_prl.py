@@ -10,7 +10,7 @@ def main() -> int:
     parser = argparse.ArgumentParser(description="Run prl CLI with a config file")
     parser.add_argument("command", choices=["validate", "evaluate", "optimize"])
     parser.add_argument("config", type=Path)
-    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=None)
     args = parser.parse_args()
 
     if not shutil.which("prl"):
@@ -18,7 +18,7 @@ def main() -> int:
         return 2
 
     cmd = ["prl", args.command, str(args.config)]
-    if args.command == "optimize":
+    if args.command == "optimize" and args.steps is not None:
         cmd.extend(["--steps", str(args.steps)])
 
     try:
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from .io import iter_results, load_data, results_file
+from .models import RunResult
+from .spec import RunSpec
+from .validation import ensure_task_ids
+
+# Evaluator settings that can change a score; concurrency, caching and budgets cannot.
+# base_url counts because another endpoint may serve a different model under the same name.
+_SCORING_FIELDS = {
+    "type",
+    "provider",
+    "model",
+    "base_url",
+    "temperature",
+    "judge_prompt",
+    "batch_size",
+}
+
+
+def content_hash(*parts: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def spec_fingerprints(spec: RunSpec) -> dict[str, Any]:
+    """Content hashes of the evaluator config, each candidate and each task's expected/rule."""
+    evaluator = spec.evaluator.model_dump(include=_SCORING_FIELDS)
+    return {
+        "evaluator": content_hash(json.dumps(evaluator, sort_keys=True)),
+        "candidates": {c.id: content_hash(c.content) for c in spec.candidates},
+        "tasks": {
+            t.id: content_hash(t.expected, json.dumps(t.judge_rule, sort_keys=True))
+            for t in ensure_task_ids(spec.tasks)
+            if t.id is not None
+        },
+    }
+
+
+def _unchanged(old: dict[str, str], new: dict[str, str]) -> set[str]:
+    return {key for key, value in new.items() if old.get(key) == value}
+
+
+class Baseline:
+    """Scores from an earlier evaluate run, reused for outputs whose inputs have not changed.
+
+    An output's score is reused when the baseline scored the same candidate, task and output
+    text without error, and the evaluator config, the candidate's content and the task's
+    expected value and rule all hash the same as in the baseline's ``aggregates.json``.
+    """
+
+    def __init__(self, run_dir: Path, fingerprints: dict[str, Any]) -> None:
+        self.run_dir = run_dir
+        self.fingerprints = fingerprints
+        self._scores: dict[tuple[str, str, str], float] = {}
+        self._candidates: set[str] = set()
+        self._tasks: set[str] = set()
+        self.evaluator_changed = False
+        self.changed_candidates: list[str] = []
+        self.changed_tasks: list[str] = []
+        self.reused: list[tuple[str, str]] = []
+        self.recomputed: list[tuple[str, str]] = []
+
+    @classmethod
+    def load(cls, run_dir: Path) -> Baseline:
+        path = run_dir / "aggregates.json"
+        if not path.is_file():
+            raise ValueError(f"baseline_aggregates_missing:{path}")
+        fingerprints = load_data(path).get("fingerprints")
+        if not fingerprints:
+            raise ValueError(f"baseline_fingerprints_missing:{path}")
+        try:
+            source = results_file(run_dir)
+        except FileNotFoundError as exc:
+            raise ValueError(f"baseline_{exc}") from exc
+
+        baseline = cls(run_dir, fingerprints)
+        for record in iter_results(source):
+            if record["score"] is None or record["error"] is not None:
+                continue
+            key = (record["candidate_id"], record["task_id"], content_hash(record["output"]))
+            baseline._scores.setdefault(key, record["score"])
+        return baseline
+
+    def compare(self, fingerprints: dict[str, Any]) -> None:
+        """Keep only the candidates and tasks whose hashes match ``fingerprints``."""
+        self.evaluator_changed = fingerprints["evaluator"] != self.fingerprints["evaluator"]
+        self._candidates = _unchanged(self.fingerprints["candidates"], fingerprints["candidates"])
+        self._tasks = _unchanged(self.fingerprints["tasks"], fingerprints["tasks"])
+        self.changed_candidates = [
+            c for c in fingerprints["candidates"] if c not in self._candidates
+        ]
+        self.changed_tasks = [t for t in fingerprints["tasks"] if t not in self._tasks]
+
+    def reuse(self, output: RunResult) -> RunResult | None:
+        """``output`` with its baseline score, or ``None`` if it must be scored again."""
+        score = None
+        if (
+            not self.evaluator_changed
+            and output.candidate_id in self._candidates
+            and output.task_id in self._tasks
+        ):
+            key = (output.candidate_id, output.task_id, content_hash(output.output))
+            score = self._scores.get(key)
+        entry = (output.candidate_id, output.task_id)
+        if score is None:
+            self.recomputed.append(entry)
+            return None
+        self.reused.append(entry)
+        return output.model_copy(update={"score": score, "error": None})
+
+    def split(
+        self, outputs: Iterable[RunResult], on_reused: Callable[[RunResult], None]
+    ) -> Iterator[RunResult]:
+        """Yield the outputs that need scoring; hand reused results to ``on_reused``."""
+        for output in outputs:
+            reused = self.reuse(output)
+            if reused is None:
+                yield output
+            else:
+                on_reused(reused)
+
+    def summary(self) -> dict[str, Any]:
+        reused = Counter(cid for cid, _ in self.reused)
+        recomputed = Counter(cid for cid, _ in self.recomputed)
+        return {
+            "baseline": str(self.run_dir),
+            "evaluator_changed": self.evaluator_changed,
+            "changed_candidates": self.changed_candidates,
+            "changed_tasks": self.changed_tasks,
+            "reused_count": len(self.reused),
+            "recomputed_count": len(self.recomputed),
+            "by_candidate": {
+                cid: {"reused": reused[cid], "recomputed": recomputed[cid]}
+                for cid in dict.fromkeys([*reused, *recomputed])
+            },
+            "reused": [list(entry) for entry in self.reused],
+            "recomputed": [list(entry) for entry in self.recomputed],
+        }
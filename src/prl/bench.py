@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+try:  # peak RSS is only available on Unix
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from . import __version__
+from .io import JsonlWriter, save_json
+from .spec import RunSpec, load_spec
+from .tracing import percentile
+from .validation import validate_spec
+
+RULE_TYPES = ("exact", "regex", "numeric")
+
+
+def parse_rule_mix(text: str) -> dict[str, float]:
+    """Parse ``exact=0.6,regex=0.3,numeric=0.1`` into normalised weights."""
+    mix: dict[str, float] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in RULE_TYPES:
+            raise ValueError(f"rule_mix_unknown:{name}")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError as exc:
+            raise ValueError(f"rule_mix_invalid:{part}") from exc
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("rule_mix_empty")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def make_spec(
+    *,
+    candidates: int,
+    tasks: int,
+    output_length: int,
+    rule_mix: dict[str, float],
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Build a spec payload with one output per candidate and task.
+
+    Candidate ``i`` answers correctly with probability ``(i + 1) / (candidates + 1)``, so the
+    leaderboard has a known order. Outputs are padded to ``output_length`` characters.
+    """
+    rng = random.Random(seed)
+    names = list(rule_mix)
+    weights = [rule_mix[name] for name in names]
+
+    def pad(text: str) -> str:
+        return (
+            f"{text} " + "x" * (output_length - len(text) - 1)
+            if output_length > len(text)
+            else text
+        )
+
+    task_rows = []
+    answers = []
+    for index in range(tasks):
+        answer = str(rng.randint(0, 999))
+        kind = rng.choices(names, weights)[0]
+        if kind == "regex":
+            rule: dict[str, Any] = {"type": "regex", "pattern": rf"^{answer}\b"}
+        elif kind == "numeric":
+            rule = {"type": "numeric", "min": int(answer) - 5, "max": int(answer) + 5}
+        else:
+            rule = {"type": "exact"}
+        expected = answer if kind == "numeric" else pad(answer)
+        task_rows.append(
+            {
+                "id": f"t{index}",
+                "input": f"question {index}",
+                "expected": expected,
+                "judge_rule": rule,
+            }
+        )
+        answers.append((expected, kind))
+
+    outputs = []
+    for c in range(candidates):
+        accuracy = (c + 1) / (candidates + 1)
+        for index, (expected, kind) in enumerate(answers):
+            if rng.random() < accuracy:
+                text = expected
+            else:
+                wrong = str(rng.randint(1000, 9999))
+                text = wrong if kind == "numeric" else pad(wrong)
+            outputs.append({"candidate_id": f"c{c}", "task_id": f"t{index}", "output": text})
+    return {
+        "candidates": [{"id": f"c{c}", "content": "Answer: {{input}}"} for c in range(candidates)],
+        "tasks": task_rows,
+        "outputs": outputs,
+    }
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Nearest-rank p99 of fewer samples is just the maximum.
+P99_MIN_SAMPLES = 100
+STAGES = ("load", "validate", "evaluate", "optimize", "report")
+
+
+def _write_payload(path: Path, payload: dict[str, Any]) -> None:
+    if path.suffix == ".json":
+        path.write_text(json.dumps(payload), encoding="utf-8")
+    else:
+        path.write_text(yaml.safe_dump(payload), encoding="utf-8")
+
+
+def _write_chunks(path: Path, payload: dict[str, Any], chunk_size: int) -> list[Path]:
+    """Split ``payload`` into specs of ``chunk_size`` outputs, each with only the candidates
+    and tasks its outputs use, written next to ``path`` in the same format."""
+    candidates = {c["id"]: c for c in payload["candidates"]}
+    tasks = {t["id"]: t for t in payload["tasks"]}
+    outputs = payload["outputs"]
+    paths = []
+    for index, start in enumerate(range(0, len(outputs), chunk_size)):
+        chunk = outputs[start : start + chunk_size]
+        chunk_path = path.with_name(f"chunk{index}{path.suffix}")
+        _write_payload(
+            chunk_path,
+            {
+                "candidates": [
+                    candidates[c] for c in dict.fromkeys(o["candidate_id"] for o in chunk)
+                ],
+                "tasks": [tasks[t] for t in dict.fromkeys(o["task_id"] for o in chunk)],
+                "outputs": chunk,
+            },
+        )
+        paths.append(chunk_path)
+    return paths
+
+
+def _stage_runner(name: str, path: Path) -> Callable[[], Any]:
+    """Prepare stage ``name`` outside the timed region and return the call to time."""
+    from .skill import evaluate, optimize
+
+    if name == "load":
+        return lambda: load_spec(path)
+    spec: RunSpec = load_spec(path)
+    if name == "validate":
+        return lambda: validate_spec(spec)
+    if name == "evaluate":
+        return lambda: evaluate(spec)
+    if name == "optimize":
+        return lambda: optimize(spec)
+    result = evaluate(spec)
+
+    def report() -> None:
+        with JsonlWriter(path.with_suffix(".results.jsonl"), flush_every=10_000) as writer:
+            writer.write_lines(r.model_dump_json() for r in result.run_results)
+        save_json(path.with_suffix(".leaderboard.json"), result.leaderboard)
+
+    return report
+
+
+def _run_stage(name: str, path: str, chunks: list[str], repeat: int) -> dict[str, Any]:
+    """Time one stage in this (fresh) process and measure the memory it adds.
+
+    The whole spec is timed ``repeat`` times for throughput; each chunk spec is timed
+    ``repeat`` times for per-operation latency.
+    """
+    runner = _stage_runner(name, Path(path))
+    chunk_runners = [_stage_runner(name, Path(chunk)) for chunk in chunks]
+    rss_before = _peak_rss_mb()
+    timings = []
+    last = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        last = runner()
+        timings.append(time.perf_counter() - start)
+    latencies = []
+    for _ in range(repeat):
+        for chunk_runner in chunk_runners:
+            start = time.perf_counter()
+            chunk_runner()
+            latencies.append(time.perf_counter() - start)
+    rss_after = _peak_rss_mb()
+    leader = None
+    if name == "evaluate" and last is not None and last.leaderboard:
+        leader = last.leaderboard[0]["candidate_id"]
+    return {
+        "timings": timings,
+        "latencies": latencies,
+        "peak_rss_mb": rss_after,
+        "rss_delta_mb": None if rss_after is None else rss_after - (rss_before or 0.0),
+        "leader": leader,
+    }
+
+
+def _time_stage(
+    name: str, path: Path, chunks: list[Path], repeat: int, ops: int
+) -> tuple[dict[str, Any], str | None]:
+    # A fresh spawned process per stage, so peak RSS is not the high-water mark of the
+    # stages before it.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        job = pool.submit(_run_stage, name, str(path), [str(c) for c in chunks], repeat)
+        measured = job.result()
+    stage_p50 = percentile(measured["timings"], 50)
+    latencies = measured["latencies"]
+    stage = {
+        "ops": ops,
+        "ops_per_sec": ops / stage_p50 if stage_p50 > 0 else None,
+        "stage_seconds": stage_p50,
+        "samples": len(latencies),
+        "p50_seconds": percentile(latencies, 50),
+        "p99_seconds": percentile(latencies, 99) if len(latencies) >= P99_MIN_SAMPLES else None,
+        "max_seconds": max(latencies),
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "rss_delta_mb": measured["rss_delta_mb"],
+    }
+    return stage, measured["leader"]
+
+
+def run_bench(
+    *,
+    candidates: int,
+    tasks: int,
+    output_length: int,
+    rule_mix: dict[str, float],
+    repeat: int = 5,
+    seed: int = 0,
+    spec_format: str = "json",
+    chunk_size: int = 100,
+) -> dict[str, Any]:
+    """Generate a spec, then time the load, validate, evaluate, optimize and report stages.
+
+    Each stage runs in its own process. Throughput comes from running the stage on the whole
+    spec; latency percentiles come from running it on each ``chunk_size``-output slice.
+    ``optimize`` scores the outputs and selects the best candidate without refinement rounds,
+    so it needs no LLM.
+    """
+    payload = make_spec(
+        candidates=candidates,
+        tasks=tasks,
+        output_length=output_length,
+        rule_mix=rule_mix,
+        seed=seed,
+    )
+    outputs = len(payload["outputs"])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"spec.{spec_format}"
+        _write_payload(path, payload)
+        chunks = _write_chunks(path, payload, chunk_size)
+        del payload
+
+        stages = {}
+        leader = None
+        for name in STAGES:
+            stages[name], stage_leader = _time_stage(name, path, chunks, repeat, outputs)
+            leader = leader or stage_leader
+        spec_bytes = path.stat().st_size
+
+    return {
+        "prl_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "candidates": candidates,
+            "tasks": tasks,
+            "outputs": outputs,
+            "output_length": output_length,
+            "rule_mix": rule_mix,
+            "repeat": repeat,
+            "chunk_size": chunk_size,
+            "seed": seed,
+            "spec_format": spec_format,
+            "spec_bytes": spec_bytes,
+        },
+        "stages": stages,
+        "leader": leader,
+    }
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from .evaluators import EvalOutcome
+from .llm_clients import LLMRequest
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS judge_cache (
+    key TEXT PRIMARY KEY,
+    score REAL NOT NULL,
+    reason TEXT,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def request_key(request: LLMRequest, *, scope: str | None = None) -> str:
+    """Content hash of a fully rendered judge request (credentials excluded).
+
+    ``scope`` separates outcomes judged through a different prompt, e.g. ``"batch"`` for
+    items scored inside a batch request.
+    """
+    payload = asdict(request)
+    payload.pop("api_key_env", None)
+    if scope is not None:
+        payload["scope"] = scope
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class JudgeCache:
+    """On-disk cache of parsed judge outcomes, shared safely between threads."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_entries: int | None = None,
+        max_age_seconds: float | None = None,
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - created_at > self.max_age_seconds
+
+    def get(self, key: str) -> EvalOutcome | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score, reason, created_at FROM judge_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[2], now):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE judge_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return EvalOutcome(score=row[0], reason=row[1])
+
+    def put(self, key: str, outcome: EvalOutcome) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judge_cache (key, score, reason, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, outcome.score, outcome.reason, now, now),
+            )
+            self._conn.commit()
+            self.writes += 1
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones above ``max_entries``."""
+        removed = 0
+        with self._lock:
+            if self.max_age_seconds is not None:
+                cutoff = time.time() - self.max_age_seconds
+                cursor = self._conn.execute(
+                    "DELETE FROM judge_cache WHERE created_at < ?", (cutoff,)
+                )
+                removed += cursor.rowcount
+            if self.max_entries is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM judge_cache WHERE key IN (SELECT key FROM judge_cache "
+                    "ORDER BY accessed_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                removed += cursor.rowcount
+            self._conn.commit()
+            self.evictions += removed
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM judge_cache").fetchone()[0]
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
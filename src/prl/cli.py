@@ -1,24 +1,89 @@
 from __future__ import annotations
 
 import json
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
 import typer
+from pydantic import ValidationError
 
-from .io import load_data, save_json
-from .skill import evaluate as skill_evaluate
-from .skill import optimize as skill_optimize
-from .skill import validate_spec
-from .spec import RunSpec
+from .io import (
+    JsonlWriter,
+    check_results_format,
+    convert_results,
+    iter_jsonl_lines,
+    iter_results,
+    load_data,
+    results_file,
+    save_json,
+    truncate_partial_line,
+)
+from .models import Candidate, RunResult
+from .spec import RunSpec, ShardInfo, load_spec
+from .tracing import Tracer, span, summary_table, tracing
+from .usage import UsageMeter
+from .validation import validate_spec
+
+if TYPE_CHECKING:
+    from .baseline import Baseline
+    from .cache import JudgeCache
+    from .skill import JudgeDeduper, ScoreBoard
+
+# Scoring, LLM clients, the judge cache and baselines are imported inside the commands that
+# use them so lightweight commands such as `prl validate` start quickly.
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 
 
-def _load_spec(path: Path) -> RunSpec:
-    payload = load_data(path)
-    return RunSpec.model_validate(payload)
+def _load_spec(path: Path) -> tuple[RunSpec, float]:
+    """Load and validate a spec; return it with the seconds spent loading."""
+    start = time.perf_counter()
+    with span("load_spec", path=str(path)):
+        spec = load_spec(path)
+    return spec, time.perf_counter() - start
+
+
+def _load_note(config: Path, seconds: float) -> str:
+    return f"Loaded {config.name} in {seconds:.3f}s."
+
+
+def _outputs_path(spec: RunSpec, config: Path) -> Path | None:
+    if spec.outputs_path is None:
+        return None
+    path = Path(spec.outputs_path)
+    return path if path.is_absolute() else config.parent / path
+
+
+def _stream_outputs(path: Path) -> Iterator[RunResult]:
+    for file, line_number, line in iter_jsonl_lines(path):
+        try:
+            yield RunResult.model_validate_json(line)
+        except ValidationError as exc:
+            raise ValueError(f"invalid_output_record:{file}:{line_number}") from exc
+
+
+def _iter_outputs(spec: RunSpec, config: Path) -> Iterator[RunResult] | None:
+    """Stream externally stored outputs, or ``None`` when they are inline in the spec."""
+    path = _outputs_path(spec, config)
+    return None if path is None else _stream_outputs(path)
+
+
+def _validate_or_exit(spec: RunSpec, config: Path, *, rounds: int | None = None) -> None:
+    path = _outputs_path(spec, config)
+    if path is not None and not path.exists():
+        errors = [f"outputs_path_missing:{path}"]
+    else:
+        errors = validate_spec(spec, _iter_outputs(spec, config), rounds=rounds)
+    if errors:
+        for err in errors:
+            typer.echo(f"error: {err}")
+        raise typer.Exit(code=1)
 
 
 def _make_run_dir() -> Path:
@@ -28,6 +93,227 @@ def _make_run_dir() -> Path:
     return run_dir
 
 
+def _open_judge_cache(spec: RunSpec) -> JudgeCache | None:
+    from .cache import JudgeCache
+
+    config = spec.evaluator
+    if config.type != "llm_judge" or not config.cache:
+        return None
+    max_age = config.cache_max_age_days * 86400 if config.cache_max_age_days else None
+    return JudgeCache(
+        Path(".prl") / "cache" / "judge.sqlite",
+        max_entries=config.cache_max_entries,
+        max_age_seconds=max_age,
+    )
+
+
+@contextmanager
+def _llm_session(spec: RunSpec, run_dir: Path, *, uses_llm: bool) -> Iterator[JudgeCache | None]:
+    """Open the judge cache and reset provider counters; persist both stats on exit."""
+    from .llm_clients import provider_stats, reset_provider_stats
+
+    judge_cache = _open_judge_cache(spec)
+    reset_provider_stats()
+    try:
+        yield judge_cache
+    finally:
+        if judge_cache is not None:
+            judge_cache.evict()
+            save_json(run_dir / "cache_stats.json", judge_cache.stats())
+            judge_cache.close()
+        if uses_llm:
+            save_json(run_dir / "provider_stats.json", provider_stats())
+
+
+def _check_format_or_exit(output_format: str) -> None:
+    try:
+        check_results_format(output_format)
+    except ValueError as exc:
+        typer.echo(f"error: {exc}")
+        raise typer.Exit(code=1) from exc
+
+
+def _finish_results(run_dir: Path, output_format: str) -> None:
+    """Rewrite ``results.jsonl`` in the requested format once the run is complete."""
+    if output_format != "jsonl":
+        results_path = run_dir / "results.jsonl"
+        with span("write_results", format=output_format):
+            convert_results(results_path, output_format)
+        results_path.unlink()
+
+
+def _resume_run_dir(run_dir: Path) -> Path:
+    if not (run_dir / "results.jsonl").is_file():
+        typer.echo(f"error: resume_results_missing:{run_dir / 'results.jsonl'}")
+        raise typer.Exit(code=1)
+    return run_dir
+
+
+def _output_records(
+    spec: RunSpec, config: Path, done: Counter[tuple[str, str]]
+) -> Iterator[tuple[Any, int, str]]:
+    """Raw ``(source, line_number, json)`` output records for process-pool scoring."""
+    from .skill import skip_scored
+
+    path = _outputs_path(spec, config)
+    if path is not None and not done:
+        return iter_jsonl_lines(path)
+    outputs = skip_scored(spec.outputs if path is None else _stream_outputs(path), done)
+    return (("outputs", index, output.model_dump_json()) for index, output in enumerate(outputs))
+
+
+# Rows left unscored for reasons a later run can fix; resuming scores them again.
+_RETRIED_ERRORS = frozenset({"budget_exhausted", "judge_failed"})
+
+
+def _drop_retried(results_path: Path) -> None:
+    kept = results_path.with_name(results_path.name + ".tmp")
+    with JsonlWriter(kept, flush_every=10_000) as writer:
+        for _, _, line in iter_jsonl_lines(results_path):
+            if RunResult.model_validate_json(line).error not in _RETRIED_ERRORS:
+                writer.write_line(line.rstrip("\n"))
+    kept.replace(results_path)
+
+
+def _usage_partials(usage: UsageMeter) -> dict[str, dict[str, int]]:
+    return {
+        candidate_id: {"input_tokens": input_tokens, "output_tokens": output_tokens}
+        for candidate_id, (input_tokens, output_tokens) in usage.partials().items()
+    }
+
+
+def _save_usage(usage: UsageMeter, run_dir: Path) -> None:
+    """Checkpoint token counts to ``usage.json``; replaced whole so a crash leaves one intact."""
+    partial = run_dir / "usage.json.tmp"
+    save_json(partial, {"partials": _usage_partials(usage)})
+    partial.replace(run_dir / "usage.json")
+
+
+def _restore_usage(usage: UsageMeter, run_dir: Path) -> None:
+    """Add the token counts of the run being resumed, so its budget spans both runs."""
+    checkpoint = run_dir / "usage.json"
+    aggregates = run_dir / "aggregates.json"
+    if checkpoint.is_file():
+        previous = load_data(checkpoint)
+    elif aggregates.is_file():
+        previous = load_data(aggregates).get("usage")
+    else:
+        previous = None
+    for candidate_id, tokens in (previous or {}).get("partials", {}).items():
+        usage.add(candidate_id, tokens["input_tokens"], tokens["output_tokens"])
+
+
+def _score_run(
+    spec: RunSpec,
+    config: Path,
+    run_dir: Path,
+    *,
+    concurrency: int | None,
+    resume: bool,
+    judge_cache: JudgeCache | None,
+    workers: int = 1,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+    baseline: Baseline | None = None,
+) -> tuple[ScoreBoard, bool]:
+    """Score outputs into ``run_dir/results.jsonl``; return the running totals and whether
+    ``evaluator.early_stop`` cut scoring short.
+
+    When resuming, results already in the file are counted and their outputs skipped, except
+    ``budget_exhausted`` and ``judge_failed`` rows, which are dropped and scored again. Token
+    usage is checkpointed to ``usage.json`` before each results flush, and on resume the
+    recorded usage counts towards the budget.
+    With ``workers > 1`` rule-based scoring runs in a process pool. With a ``baseline``,
+    unchanged outputs take their earlier score and only the rest are scored.
+    """
+    from .skill import (
+        ScoreBoard,
+        fill_board,
+        fill_board_from_shards,
+        iter_rule_shards,
+        iter_scored,
+        skip_scored,
+    )
+
+    board = ScoreBoard(spec.candidates, confidence=spec.evaluator.confidence)
+    results_path = run_dir / "results.jsonl"
+    done: Counter[tuple[str, str]] = Counter()
+    if resume:
+        truncate_partial_line(results_path)
+        if usage is not None:
+            _restore_usage(usage, run_dir)
+        retried = 0
+        for result in _stream_outputs(results_path):
+            if result.error in _RETRIED_ERRORS:
+                retried += 1
+                continue
+            board.add(result)
+            done[(result.candidate_id, result.task_id)] += 1
+        if retried:
+            _drop_retried(results_path)
+
+    checkpoint = None if usage is None else lambda: _save_usage(usage, run_dir)
+    with JsonlWriter(results_path, append=resume, on_flush=checkpoint) as writer:
+        if workers > 1:
+            shards = iter_rule_shards(spec, _output_records(spec, config, done), workers=workers)
+            stopped_early = fill_board_from_shards(
+                board,
+                shards,
+                spec.evaluator,
+                lambda shard: writer.write_lines(shard.lines),
+            )
+            return board, stopped_early
+
+        outputs = _iter_outputs(spec, config)
+        pending = skip_scored(spec.outputs if outputs is None else outputs, done)
+        if baseline is not None:
+
+            def keep(result: RunResult) -> None:
+                board.add(result)
+                writer.write_line(result.model_dump_json())
+
+            pending = baseline.split(pending, keep)
+        scored = iter_scored(
+            spec,
+            pending,
+            concurrency=concurrency,
+            judge_cache=judge_cache,
+            usage=usage,
+            dedup=dedup,
+        )
+        stopped_early = fill_board(
+            board,
+            scored,
+            spec.evaluator,
+            lambda result: writer.write_line(result.model_dump_json()),
+        )
+    return board, stopped_early
+
+
+def _make_deduper(spec: RunSpec) -> JudgeDeduper | None:
+    if spec.evaluator.type != "llm_judge" or not spec.evaluator.dedup:
+        return None
+    from .skill import JudgeDeduper
+
+    return JudgeDeduper()
+
+
+def _dedup_note(dedup: JudgeDeduper) -> str:
+    stats = dedup.stats()
+    return (
+        f"Deduplication: {stats['judged']} of {stats['outputs']} judged outputs were unique; "
+        f"{stats['reused']} reused a score (dedup ratio {stats['dedup_ratio']:.1%})."
+    )
+
+
+def _early_stop_note(board: ScoreBoard) -> str:
+    leader = board.leaderboard()[0]
+    return (
+        f"Scoring stopped early: {leader['candidate_id']} is separated from every other "
+        f"candidate at {board.confidence:.0%} confidence."
+    )
+
+
 def _write_report(path: Path, title: str, sections: list[tuple[str, str]]) -> None:
     lines = [f"# {title}", ""]
     for heading, body in sections:
@@ -38,68 +324,590 @@ def _write_report(path: Path, title: str, sections: list[tuple[str, str]]) -> No
     path.write_text("\n".join(lines), encoding="utf-8")
 
 
+def _write_traced_report(
+    run_dir: Path, title: str, sections: list[tuple[str, str]], tracer: Tracer | None
+) -> None:
+    """Write ``report.md`` with a per-stage latency table."""
+    if tracer is None:
+        _write_report(run_dir / "report.md", title, sections)
+        return
+    sections = [*sections, ("Latency", summary_table(tracer.summary()))]
+    with span("write_report"):
+        _write_report(run_dir / "report.md", title, sections)
+
+
 @app.command()
 def validate(config: Path) -> None:
     """Validate a run configuration file."""
-    spec = _load_spec(config)
-    errors = validate_spec(spec)
-    if errors:
-        for err in errors:
-            typer.echo(f"error: {err}")
-        raise typer.Exit(code=1)
-    typer.echo("ok")
+    spec, load_seconds = _load_spec(config)
+    _validate_or_exit(spec, config)
+    typer.echo(f"ok ({_load_note(config, load_seconds)})")
 
 
 @app.command()
-def evaluate(config: Path) -> None:
+def evaluate(
+    config: Path,
+    concurrency: int | None = typer.Option(None, min=1, help="Parallel judge calls."),
+    resume: Path | None = typer.Option(None, help="Continue a partial run directory."),
+    workers: int = typer.Option(1, min=1, help="Processes for rule-based scoring."),
+    output_format: str = typer.Option(
+        "jsonl",
+        "--format",
+        help="Results file format: jsonl, columnar (.prlc) or parquet (needs the parquet extra).",
+    ),
+    baseline_dir: Path | None = typer.Option(
+        None, "--baseline", help="Reuse unchanged scores from an earlier run directory."
+    ),
+) -> None:
     """Evaluate candidates using precomputed outputs."""
-    spec = _load_spec(config)
-    errors = validate_spec(spec)
-    if errors:
-        for err in errors:
-            typer.echo(f"error: {err}")
+    with tracing() as tracer:
+        spec, load_seconds = _load_spec(config)
+        with span("validate"):
+            _validate_or_exit(spec, config)
+        _check_format_or_exit(output_format)
+        if workers > 1 and spec.evaluator.type != "rule_based":
+            typer.echo(f"error: workers_unsupported:{spec.evaluator.type}")
+            raise typer.Exit(code=1)
+        from .baseline import spec_fingerprints
+
+        fingerprints = spec_fingerprints(spec)
+        baseline = None
+        if baseline_dir is not None:
+            baseline = _load_baseline(baseline_dir, fingerprints, resume=resume, workers=workers)
+
+        run_dir = _make_run_dir() if resume is None else _resume_run_dir(resume)
+        tracer.open(run_dir / "trace.json")
+        uses_llm = spec.evaluator.type == "llm_judge"
+        usage = UsageMeter.from_config(spec.evaluator) if uses_llm else None
+        dedup = _make_deduper(spec)
+        with _llm_session(spec, run_dir, uses_llm=uses_llm) as judge_cache:
+            with span("score", evaluator=spec.evaluator.type, workers=workers):
+                board, stopped_early = _score_run(
+                    spec,
+                    config,
+                    run_dir,
+                    concurrency=concurrency,
+                    resume=resume is not None,
+                    judge_cache=judge_cache,
+                    workers=workers,
+                    usage=usage,
+                    dedup=dedup,
+                    baseline=baseline,
+                )
+
+        aggregates = _aggregates(
+            board,
+            evaluator=spec.evaluator.type,
+            shard=spec.shard,
+            stopped_early=stopped_early,
+            usage=usage,
+            fingerprints=fingerprints,
+        )
+        save_json(run_dir / "aggregates.json", aggregates)
+        if baseline is not None:
+            save_json(run_dir / "baseline.json", baseline.summary())
+        notes = [_load_note(config, load_seconds)]
+        if dedup is not None:
+            save_json(run_dir / "dedup_stats.json", dedup.stats())
+            notes.append(_dedup_note(dedup))
+        _finish_results(run_dir, output_format)
+        _write_evaluation(
+            run_dir,
+            board,
+            spec.evaluator.type,
+            stopped_early,
+            notes,
+            tracer=tracer,
+            usage=usage,
+            baseline=baseline,
+        )
+    typer.echo(str(run_dir))
+
+
+def _load_baseline(
+    run_dir: Path, fingerprints: dict[str, Any], *, resume: Path | None, workers: int
+) -> Baseline:
+    reason = "resume" if resume is not None else "workers" if workers > 1 else None
+    if reason:
+        typer.echo(f"error: baseline_unsupported:{reason}")
         raise typer.Exit(code=1)
+    try:
+        from .baseline import Baseline
+
+        baseline = Baseline.load(run_dir)
+    except ValueError as exc:
+        typer.echo(f"error: {exc}")
+        raise typer.Exit(code=1) from exc
+    baseline.compare(fingerprints)
+    return baseline
 
-    result = skill_evaluate(spec)
-    run_dir = _make_run_dir()
 
-    save_json(run_dir / "results.json", [r.model_dump() for r in result.run_results])
-    save_json(run_dir / "leaderboard.json", result.leaderboard)
+# Recomputed entries listed in report.md; baseline.json has all of them.
+_REPORT_RECOMPUTED_LIMIT = 20
 
+
+def _baseline_section(baseline: Baseline) -> str:
+    summary = baseline.summary()
+    total = summary["reused_count"] + summary["recomputed_count"]
+    lines = [
+        f"Reused {summary['reused_count']} of {total} scores from {summary['baseline']}; "
+        f"recomputed {summary['recomputed_count']}.",
+    ]
+    if summary["evaluator_changed"]:
+        lines.append("The evaluator config changed, so every output was scored again.")
+    if summary["changed_candidates"]:
+        lines.append("Changed or new candidates: " + ", ".join(summary["changed_candidates"]))
+    if summary["changed_tasks"]:
+        lines.append("Changed or new tasks: " + ", ".join(summary["changed_tasks"]))
+    lines.extend(["", "| Candidate | Reused | Recomputed |", "|---|---:|---:|"])
+    for candidate_id, counts in summary["by_candidate"].items():
+        lines.append(f"| {candidate_id} | {counts['reused']} | {counts['recomputed']} |")
+    lines.extend(["", "Recomputed entries (candidate, task):"])
+    recomputed = summary["recomputed"]
+    lines.extend(f"- {cid}, {tid}" for cid, tid in recomputed[:_REPORT_RECOMPUTED_LIMIT])
+    if len(recomputed) > _REPORT_RECOMPUTED_LIMIT:
+        lines.append(f"- … {len(recomputed) - _REPORT_RECOMPUTED_LIMIT} more")
+    lines.append("Every reused and recomputed entry is listed in baseline.json.")
+    return "\n".join(lines)
+
+
+def _aggregates(
+    board: ScoreBoard,
+    *,
+    evaluator: str,
+    shard: ShardInfo | None,
+    stopped_early: bool,
+    usage: UsageMeter | None = None,
+    fingerprints: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Per-candidate partial sums that ``prl merge`` combines across shard runs."""
+    return {
+        "shard": shard.model_dump() if shard else None,
+        "evaluator": evaluator,
+        "confidence": board.confidence,
+        "stopped_early": stopped_early,
+        "candidates": [c.model_dump() for c in board.candidates],
+        "partials": {
+            candidate_id: {"count": count, "total": total, "m2": m2}
+            for candidate_id, (count, total, m2) in board.partials().items()
+        },
+        "usage": None
+        if usage is None
+        else {
+            "input_cost_per_mtok": usage.input_cost_per_mtok,
+            "output_cost_per_mtok": usage.output_cost_per_mtok,
+            "partials": _usage_partials(usage),
+        },
+        "fingerprints": fingerprints,
+    }
+
+
+def _usage_section(usage: UsageMeter) -> str:
+    totals = usage.totals()
+    lines = [
+        f"Input tokens: {totals['input_tokens']}",
+        f"Output tokens: {totals['output_tokens']}",
+        f"Cost: {totals['cost']:.4f}",
+    ]
+    if usage.max_tokens is not None or usage.max_cost is not None:
+        limits = []
+        if usage.max_tokens is not None:
+            limits.append(f"{usage.max_tokens} tokens")
+        if usage.max_cost is not None:
+            limits.append(f"cost {usage.max_cost:g}")
+        state = "exhausted" if totals["exhausted"] else "not reached"
+        lines.append(f"Budget ({', '.join(limits)}): {state}.")
+        if totals["exhausted"]:
+            lines.append("Outputs reached after that were left unscored (budget_exhausted).")
+    return "\n".join(lines)
+
+
+def _write_evaluation(
+    run_dir: Path,
+    board: ScoreBoard,
+    evaluator_type: str,
+    stopped_early: bool,
+    extra_notes: list[str] | None = None,
+    *,
+    tracer: Tracer | None = None,
+    usage: UsageMeter | None = None,
+    baseline: Baseline | None = None,
+) -> None:
+    leaderboard = board.leaderboard()
+    if usage is not None:
+        leaderboard = usage.annotate(leaderboard)
+    save_json(run_dir / "leaderboard.json", leaderboard)
+
+    notes = [
+        f"Scored with the {evaluator_type} evaluator.",
+        f"Intervals are Hoeffding bounds at {board.confidence:.0%} confidence.",
+    ]
+    if stopped_early:
+        notes.append(_early_stop_note(board))
+    notes.extend(extra_notes or [])
     report_sections = [
-        ("Leaderboard", json.dumps(result.leaderboard, indent=2, ensure_ascii=False)),
-        ("Notes", "This evaluation uses rule-based scoring only."),
+        ("Leaderboard", json.dumps(leaderboard, indent=2, ensure_ascii=False)),
     ]
-    _write_report(run_dir / "report.md", "Evaluation Report", report_sections)
+    if usage is not None:
+        report_sections.append(("Usage", _usage_section(usage)))
+    if baseline is not None:
+        report_sections.append(("Baseline", _baseline_section(baseline)))
+    report_sections.append(("Notes", "\n".join(notes)))
+    _write_traced_report(run_dir, "Evaluation Report", report_sections, tracer)
 
-    typer.echo(str(run_dir))
+
+@app.command()
+def shard(
+    config: Path,
+    shards: int = typer.Option(..., min=1, help="Number of sub-specs to write."),
+    by: str = typer.Option("task", help="Partition by 'task' or 'candidate'."),
+    out: Path | None = typer.Option(None, help="Output directory (default: <config>.shards)."),
+) -> None:
+    """Split a run spec into self-contained sub-specs for separate hosts."""
+    from .skill import split_spec
+
+    spec, _ = _load_spec(config)
+    _validate_or_exit(spec, config)
+    try:
+        sub_specs, routes = split_spec(spec, shards, by=by)
+    except ValueError as exc:
+        typer.echo(f"error: {exc}")
+        raise typer.Exit(code=1) from exc
+
+    out = out or config.parent / f"{config.stem}.shards"
+    shard_dirs = [out / f"shard-{index:03d}" for index in range(shards)]
+    for shard_dir in shard_dirs:
+        shard_dir.mkdir(parents=True, exist_ok=True)
+    writers = [JsonlWriter(shard_dir / "outputs.jsonl") for shard_dir in shard_dirs]
+    try:
+        outputs = _iter_outputs(spec, config)
+        for output in spec.outputs if outputs is None else outputs:
+            key = output.task_id if by == "task" else output.candidate_id
+            writers[routes[key]].write_line(output.model_dump_json())
+    finally:
+        for writer in writers:
+            writer.close()
+
+    for sub_spec, shard_dir in zip(sub_specs, shard_dirs, strict=True):
+        payload = sub_spec.model_dump(mode="json", by_alias=True, exclude={"outputs"})
+        payload["outputs_path"] = "outputs.jsonl"
+        save_json(shard_dir / "spec.json", payload)
+        typer.echo(str(shard_dir / "spec.json"))
+
+
+def _load_aggregates(run_dir: Path) -> dict[str, Any]:
+    path = run_dir / "aggregates.json"
+    if not path.is_file():
+        typer.echo(f"error: aggregates_missing:{path}")
+        raise typer.Exit(code=1)
+    return load_data(path)
+
+
+def _check_shards(runs: list[tuple[Path, dict[str, Any]]]) -> list[str]:
+    shards = [aggregates["shard"] for _, aggregates in runs]
+    if all(info is None for info in shards):
+        return []
+    if any(info is None for info in shards):
+        return ["shard_mismatch:unsharded_run"]
+    layouts = {(info["count"], info["by"]) for info in shards}
+    if len(layouts) > 1:
+        return ["shard_mismatch:layout"]
+    count = shards[0]["count"]
+    seen = Counter(info["index"] for info in shards)
+    errors = [f"shard_duplicate:{index}" for index, n in sorted(seen.items()) if n > 1]
+    errors.extend(f"shard_missing:{index}" for index in range(count) if index not in seen)
+    return errors
+
+
+def _merge_fingerprints(runs: list[dict[str, Any]]) -> dict[str, Any] | None:
+    """Union the shards' fingerprints so a merged run can serve as a ``--baseline``."""
+    fingerprints = [aggregates.get("fingerprints") for aggregates in runs]
+    if not all(fingerprints) or len({f["evaluator"] for f in fingerprints}) > 1:
+        return None
+    return {
+        "evaluator": fingerprints[0]["evaluator"],
+        "candidates": {k: v for f in fingerprints for k, v in f["candidates"].items()},
+        "tasks": {k: v for f in fingerprints for k, v in f["tasks"].items()},
+    }
 
 
 @app.command()
-def optimize(config: Path, steps: int = typer.Option(5, min=1)) -> None:
-    """Optimize candidates (MVP: select best candidate by score)."""
-    spec = _load_spec(config)
-    _ = steps  # placeholder for future iterative optimization
+def merge(
+    run_dirs: list[Path],
+    output_format: str = typer.Option(
+        "jsonl",
+        "--format",
+        help="Results file format: jsonl, columnar (.prlc) or parquet (needs the parquet extra).",
+    ),
+) -> None:
+    """Combine shard run directories into one leaderboard and report."""
+    from .skill import ScoreBoard
 
-    errors = validate_spec(spec)
+    _check_format_or_exit(output_format)
+    runs = [(run_dir, _load_aggregates(run_dir)) for run_dir in run_dirs]
+    errors = _check_shards(runs)
+    for key in ("evaluator", "confidence"):
+        if len({aggregates[key] for _, aggregates in runs}) > 1:
+            errors.append(f"merge_mismatch:{key}")
     if errors:
         for err in errors:
             typer.echo(f"error: {err}")
         raise typer.Exit(code=1)
+    runs.sort(key=lambda run: run[1]["shard"]["index"] if run[1]["shard"] else 0)
 
-    result = skill_optimize(spec)
-    run_dir = _make_run_dir()
+    candidates: dict[str, Candidate] = {}
+    for _, aggregates in runs:
+        for candidate in aggregates["candidates"]:
+            candidates.setdefault(candidate["id"], Candidate.model_validate(candidate))
+    board = ScoreBoard(list(candidates.values()), confidence=runs[0][1]["confidence"])
+    usage_runs = [aggregates["usage"] for _, aggregates in runs if aggregates.get("usage")]
+    usage = None
+    if usage_runs:
+        usage = UsageMeter(
+            input_cost_per_mtok=usage_runs[0]["input_cost_per_mtok"],
+            output_cost_per_mtok=usage_runs[0]["output_cost_per_mtok"],
+        )
+        for usage_run in usage_runs:
+            for candidate_id, tokens in usage_run["partials"].items():
+                usage.add(candidate_id, tokens["input_tokens"], tokens["output_tokens"])
 
-    save_json(run_dir / "results.json", [r.model_dump() for r in result.run_results])
-    save_json(run_dir / "leaderboard.json", result.leaderboard)
+    run_dir = _make_run_dir()
+    with JsonlWriter(run_dir / "results.jsonl") as writer:
+        for source_dir, aggregates in runs:
+            for candidate_id, partial in aggregates["partials"].items():
+                board.merge(candidate_id, partial["count"], partial["total"], partial["m2"])
+            source = results_file(source_dir)
+            if source.suffix == ".jsonl":
+                for _, _, line in iter_jsonl_lines(source):
+                    writer.write_line(line.rstrip("\n"))
+            else:
+                for record in iter_results(source):
+                    writer.write_line(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
 
-    best_candidate_json = json.dumps(
-        result.best_candidate.model_dump(), indent=2, ensure_ascii=False
+    notes = [f"Merged from {len(runs)} run(s): " + ", ".join(str(d) for d, _ in runs) + "."]
+    notes.extend(
+        f"{source_dir} stopped early; its totals cover only the outputs it scored."
+        for source_dir, aggregates in runs
+        if aggregates["stopped_early"]
     )
-    report_sections = [
-        ("Best Candidate", best_candidate_json),
-        ("Diff", result.diff or "(no diff)"),
-    ]
-    _write_report(run_dir / "report.md", "Optimization Report", report_sections)
+    evaluator_type = runs[0][1]["evaluator"]
+    merged = _aggregates(
+        board,
+        evaluator=evaluator_type,
+        shard=None,
+        stopped_early=False,
+        usage=usage,
+        fingerprints=_merge_fingerprints([aggregates for _, aggregates in runs]),
+    )
+    merged["merged_from"] = [str(source_dir) for source_dir, _ in runs]
+    save_json(run_dir / "aggregates.json", merged)
+    _write_evaluation(run_dir, board, evaluator_type, False, notes, usage=usage)
+    _finish_results(run_dir, output_format)
+    typer.echo(str(run_dir))
+
 
+@app.command()
+def optimize(
+    config: Path,
+    steps: int | None = typer.Option(
+        None, min=0, help="Refinement rounds (overrides optimize_config.rounds)."
+    ),
+    concurrency: int | None = typer.Option(None, min=1, help="Parallel judge calls."),
+    resume: Path | None = typer.Option(None, help="Continue a partial run directory."),
+    output_format: str = typer.Option(
+        "jsonl",
+        "--format",
+        help="Results file format: jsonl, columnar (.prlc) or parquet (needs the parquet extra).",
+    ),
+) -> None:
+    """Optimize candidates: score them, then run mutate/execute/judge refinement rounds."""
+    from .skill import race, refine, select_best
+
+    with tracing() as tracer:
+        spec, load_seconds = _load_spec(config)
+        rounds = spec.optimize_config.rounds if steps is None else steps
+        with span("validate"):
+            _validate_or_exit(spec, config, rounds=rounds)
+        _check_format_or_exit(output_format)
+        racing = spec.optimize_config.selection == "successive_halving"
+        if resume is not None and (rounds or racing):
+            reason = "rounds" if rounds else spec.optimize_config.selection
+            typer.echo(f"error: resume_unsupported:{reason}")
+            raise typer.Exit(code=1)
+
+        run_dir = _make_run_dir() if resume is None else _resume_run_dir(resume)
+        tracer.open(run_dir / "trace.json")
+        uses_llm = spec.evaluator.type == "llm_judge" or rounds > 0
+        usage = UsageMeter.from_config(spec.evaluator) if uses_llm else None
+        dedup = _make_deduper(spec)
+        race_result = None
+        start = None
+        early_stop_note = None
+        with _llm_session(spec, run_dir, uses_llm=uses_llm) as judge_cache:
+            if racing:
+                with JsonlWriter(run_dir / "results.jsonl") as writer, span("race"):
+                    race_result = race(
+                        spec,
+                        _iter_outputs(spec, config),
+                        concurrency=concurrency,
+                        judge_cache=judge_cache,
+                        on_result=lambda result: writer.write_line(result.model_dump_json()),
+                        usage=usage,
+                        dedup=dedup,
+                    )
+                board = race_result.board
+                save_json(run_dir / "racing.json", race_result.summary())
+                start = select_best(board.scored_candidates(), race_result.leaderboard())[0]
+            else:
+                with span("score", evaluator=spec.evaluator.type):
+                    board, stopped_early = _score_run(
+                        spec,
+                        config,
+                        run_dir,
+                        concurrency=concurrency,
+                        resume=resume is not None,
+                        judge_cache=judge_cache,
+                        usage=usage,
+                        dedup=dedup,
+                    )
+                if stopped_early:
+                    early_stop_note = _early_stop_note(board)
+            if rounds:
+                with JsonlWriter(run_dir / "results.jsonl", append=True) as writer, span("refine"):
+                    rounds_log = refine(
+                        spec,
+                        board,
+                        rounds=rounds,
+                        concurrency=concurrency,
+                        judge_cache=judge_cache,
+                        on_result=lambda result: writer.write_line(result.model_dump_json()),
+                        start=start,
+                        usage=usage,
+                        dedup=dedup,
+                        feedback=_stream_outputs(run_dir / "results.jsonl"),
+                    )
+                save_json(run_dir / "run_log.json", rounds_log)
+
+        candidates = board.scored_candidates()
+        if race_result is not None and not rounds:
+            leaderboard = race_result.leaderboard()
+        else:
+            leaderboard = board.leaderboard()
+        best_candidate, diff = select_best(candidates, leaderboard)
+        if usage is not None:
+            leaderboard = usage.annotate(leaderboard)
+        save_json(run_dir / "leaderboard.json", leaderboard)
+        if rounds:
+            save_json(run_dir / "candidates.json", [c.model_dump() for c in candidates])
+
+        best_candidate_json = json.dumps(best_candidate.model_dump(), indent=2, ensure_ascii=False)
+        report_sections = [
+            ("Best Candidate", best_candidate_json),
+            ("Diff", diff or "(no diff)"),
+        ]
+        if race_result is not None:
+            summary = race_result.summary()
+            report_sections.append(
+                (
+                    "Racing",
+                    f"Successive halving scored {summary['outputs_scored']} of "
+                    f"{summary['outputs']} outputs ({summary['outputs_skipped']} skipped) "
+                    f"with {summary['judge_calls']} judge calls.",
+                )
+            )
+        if early_stop_note:
+            report_sections.append(("Early Stopping", early_stop_note))
+        if usage is not None:
+            report_sections.append(("Usage", _usage_section(usage)))
+        notes = [_load_note(config, load_seconds)]
+        if dedup is not None:
+            save_json(run_dir / "dedup_stats.json", dedup.stats())
+            notes.append(_dedup_note(dedup))
+        report_sections.append(("Notes", "\n".join(notes)))
+        _finish_results(run_dir, output_format)
+        _write_traced_report(run_dir, "Optimization Report", report_sections, tracer)
     typer.echo(str(run_dir))
+
+
+@app.command()
+def bench(
+    candidates: int = typer.Option(8, min=1, help="Candidates in the synthetic spec."),
+    tasks: int = typer.Option(1000, min=1, help="Tasks in the synthetic spec."),
+    output_length: int = typer.Option(64, min=1, help="Characters per output."),
+    rule_mix: str = typer.Option(
+        "exact=0.5,regex=0.3,numeric=0.2", help="Relative weights of judge rule types."
+    ),
+    repeat: int = typer.Option(5, min=1, help="Timed runs per stage."),
+    chunk_size: int = typer.Option(
+        100, min=1, help="Outputs per timed operation for the latency percentiles."
+    ),
+    seed: int = typer.Option(0, help="Generator seed."),
+    spec_format: str = typer.Option("json", help="Spec file format: json or yaml."),
+    out: Path | None = typer.Option(None, help="Also write the JSON report to this file."),
+) -> None:
+    """Time load/validate/evaluate/optimize/report on a synthetic spec and print JSON."""
+    from .bench import parse_rule_mix, run_bench
+
+    try:
+        mix = parse_rule_mix(rule_mix)
+        if spec_format not in ("json", "yaml"):
+            raise ValueError(f"spec_format_unknown:{spec_format}")
+    except ValueError as exc:
+        typer.echo(f"error: {exc}")
+        raise typer.Exit(code=1) from exc
+
+    report = run_bench(
+        candidates=candidates,
+        tasks=tasks,
+        output_length=output_length,
+        rule_mix=mix,
+        repeat=repeat,
+        seed=seed,
+        spec_format=spec_format,
+        chunk_size=chunk_size,
+    )
+    if out is not None:
+        save_json(out, report)
+    typer.echo(json.dumps(report, indent=2))
+
+
+@app.command("stub-server")
+def stub_server(
+    host: str = typer.Option("127.0.0.1", help="Interface to bind."),
+    port: int = typer.Option(8765, min=0, help="Port to listen on."),
+    latency: str = typer.Option(
+        "fixed:0", help="Latency in ms: fixed:MS, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA."
+    ),
+    error_rate: float = typer.Option(0.0, min=0, max=1, help="Fraction of 503 responses."),
+    throttle_rate: float = typer.Option(0.0, min=0, max=1, help="Fraction of 429 responses."),
+    retry_after: float = typer.Option(0.0, min=0, help="Retry-After seconds sent with 429s."),
+    seed: int = typer.Option(0, help="Seed for latency and fault injection."),
+    chunk_chars: int = typer.Option(8, min=1, help="Characters per streamed event."),
+    chunk_delay: float = typer.Option(0.0, min=0, help="Milliseconds between streamed events."),
+    reason_chars: int = typer.Option(0, min=0, help="Pad judge reasons to this many characters."),
+) -> None:
+    """Serve the OpenAI, Anthropic, Gemini and Ollama chat APIs locally for offline load tests."""
+    from .stub_server import StubConfig, StubServer
+
+    config = StubConfig(
+        latency=latency,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        retry_after=retry_after,
+        seed=seed,
+        chunk_chars=chunk_chars,
+        chunk_delay_ms=chunk_delay,
+        reason_chars=reason_chars,
+    )
+    try:
+        server = StubServer(config, host=host, port=port)
+    except (ValueError, OSError) as exc:
+        typer.echo(f"error: {exc}")
+        raise typer.Exit(code=1) from exc
+    typer.echo(f"stub server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
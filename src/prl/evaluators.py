@@ -1,57 +1,102 @@
 from __future__ import annotations
 
+import http.client
 import json
+import math
 import re
-from dataclasses import dataclass
-from typing import Any
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any
 
-from .llm_clients import (
-    LLMRequest,
-    call_anthropic,
-    call_gemini,
-    call_ollama_chat,
-    call_openai_chat,
-)
+from .llm_clients import PROVIDERS, LLMHTTPError, LLMRequest, LLMResponse, call_llm
+from .tracing import span
 
+if TYPE_CHECKING:
+    from .cache import JudgeCache
 
-@dataclass
+
+@dataclass(frozen=True)
 class EvalOutcome:
     score: float
     reason: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    error: str | None = None
+
+
+# Raised by call_llm once the provider's retries are used up.
+_CALL_ERRORS = (LLMHTTPError, OSError, http.client.HTTPException)
+
+
+def _judge_failed(exc: Exception) -> EvalOutcome:
+    return EvalOutcome(score=0.0, reason=str(exc) or type(exc).__name__, error="judge_failed")
+
+
+@dataclass
+class EvalItem:
+    expected: str
+    output: str
+    rule: dict[str, Any] | str
 
 
 class Evaluator:
     def score(self, *, expected: str, output: str, rule: dict[str, Any] | str) -> EvalOutcome:
         raise NotImplementedError
 
+    def score_batch(self, items: list[EvalItem]) -> list[EvalOutcome]:
+        return [
+            self.score(expected=item.expected, output=item.output, rule=item.rule) for item in items
+        ]
+
+
+RuleScorer = Callable[[str], EvalOutcome]
+
+_PASS = EvalOutcome(score=1.0)
+_FAIL = EvalOutcome(score=0.0)
+_NOT_NUMERIC = EvalOutcome(score=0.0, reason="output_not_numeric")
+
 
 class RuleBasedEvaluator(Evaluator):
-    def score(self, *, expected: str, output: str, rule: dict[str, Any] | str) -> EvalOutcome:
+    def compile(self, rule: dict[str, Any] | str, *, expected: str) -> RuleScorer:
+        """Build a scorer for one task with the rule parsed and its regex/bounds prepared."""
         if isinstance(rule, str):
             rule = {"type": rule}
         rule_type = rule.get("type", "exact")
 
         if rule_type == "exact":
-            return EvalOutcome(score=1.0 if output == expected else 0.0)
+            return lambda output: _PASS if output == expected else _FAIL
 
         if rule_type == "regex":
-            pattern = rule.get("pattern", "")
-            return EvalOutcome(score=1.0 if re.search(pattern, output) else 0.0)
+            search = re.compile(rule.get("pattern", "")).search
+            return lambda output: _PASS if search(output) else _FAIL
 
         if rule_type == "numeric":
-            try:
-                value = float(output)
-            except ValueError:
-                return EvalOutcome(score=0.0, reason="output_not_numeric")
             min_value = rule.get("min")
             max_value = rule.get("max")
-            if min_value is not None and value < float(min_value):
-                return EvalOutcome(score=0.0)
-            if max_value is not None and value > float(max_value):
-                return EvalOutcome(score=0.0)
-            return EvalOutcome(score=1.0)
+            low = float(min_value) if min_value is not None else -math.inf
+            high = float(max_value) if max_value is not None else math.inf
+
+            def numeric(output: str) -> EvalOutcome:
+                try:
+                    value = float(output)
+                except ValueError:
+                    return _NOT_NUMERIC
+                return _FAIL if value < low or value > high else _PASS
+
+            return numeric
 
-        return EvalOutcome(score=0.0, reason=f"unknown_rule:{rule_type}")
+        unknown = EvalOutcome(score=0.0, reason=f"unknown_rule:{rule_type}")
+        return lambda output: unknown
+
+    def score(self, *, expected: str, output: str, rule: dict[str, Any] | str) -> EvalOutcome:
+        return self.compile(rule, expected=expected)(output)
+
+    def score_many(
+        self, *, expected: str, outputs: Iterable[str], rule: dict[str, Any] | str
+    ) -> list[EvalOutcome]:
+        """Score every output of one task against a single compiled rule."""
+        return list(map(self.compile(rule, expected=expected), outputs))
 
 
 class LLMAsJudgeEvaluator(Evaluator):
@@ -64,6 +109,9 @@ class LLMAsJudgeEvaluator(Evaluator):
         api_key_env: str | None,
         temperature: float,
         judge_prompt: str | None,
+        cache: JudgeCache | None = None,
+        stream: bool = False,
+        max_reason_chars: int | None = None,
     ) -> None:
         self.provider = provider
         self.model = model
@@ -71,19 +119,47 @@ class LLMAsJudgeEvaluator(Evaluator):
         self.api_key_env = api_key_env
         self.temperature = temperature
         self.judge_prompt = judge_prompt
+        self.cache = cache
+        self.stream = stream
+        self.max_reason_chars = max_reason_chars
+        self.calls = 0
+        self._calls_lock = threading.Lock()
 
-    def score(self, *, expected: str, output: str, rule: dict[str, Any] | str) -> EvalOutcome:
+    def _call(self, request: LLMRequest, **kwargs: Any) -> LLMResponse:
+        """``call_llm``, counted in ``calls`` (cache hits and reused outcomes never get here)."""
+        with self._calls_lock:
+            self.calls += 1
+        return call_llm(request, **kwargs)
+
+    def render_prompt(self, *, expected: str, output: str) -> str:
         if self.judge_prompt:
-            prompt = self.judge_prompt.replace("{{expected}}", expected).replace(
-                "{{output}}", output
-            )
-        else:
-            prompt = (
-                "Compare expected vs output and return JSON only: "
-                '{"score": 0.0-1.0, "reason": "short"}.\n'
-                f"EXPECTED:\n{expected}\nOUTPUT:\n{output}"
+            return self.judge_prompt.replace("{{expected}}", expected).replace("{{output}}", output)
+        return (
+            "Compare expected vs output and return JSON only: "
+            '{"score": 0.0-1.0, "reason": "short"}.\n'
+            f"EXPECTED:\n{expected}\nOUTPUT:\n{output}"
+        )
+
+    def render_batch_prompt(self, items: list[EvalItem]) -> str:
+        lines = [
+            "Score every item by comparing its expected value with its output. "
+            "Return JSON only: an array with one object per item, "
+            '[{"id": <item id>, "score": 0.0-1.0, "reason": "short"}].'
+        ]
+        if self.judge_prompt:
+            instructions = self.judge_prompt.replace("{{expected}}", "<expected>").replace(
+                "{{output}}", "<output>"
             )
-        request = LLMRequest(
+            lines.append(f"Apply these instructions to each item:\n{instructions}")
+        batch = [
+            {"id": index, "expected": item.expected, "output": item.output}
+            for index, item in enumerate(items, start=1)
+        ]
+        lines.append("ITEMS:\n" + json.dumps(batch, ensure_ascii=False, indent=1))
+        return "\n".join(lines)
+
+    def _request(self, prompt: str) -> LLMRequest:
+        return LLMRequest(
             prompt=prompt,
             model=self.model,
             temperature=self.temperature,
@@ -92,22 +168,270 @@ class LLMAsJudgeEvaluator(Evaluator):
             provider=self.provider,
         )
 
-        if self.provider == "openai":
-            content = call_openai_chat(request)
-        elif self.provider == "anthropic":
-            content = call_anthropic(request)
-        elif self.provider == "gemini":
-            content = call_gemini(request)
-        elif self.provider == "ollama":
-            content = call_ollama_chat(request)
+    def _lookup(
+        self, request: LLMRequest, *, scope: str | None = None
+    ) -> tuple[str | None, EvalOutcome | None]:
+        if self.cache is None:
+            return None, None
+        from .cache import request_key
+
+        key = request_key(request, scope=scope)
+        return key, self.cache.get(key)
+
+    def _judge(self, request: LLMRequest, key: str | None) -> EvalOutcome:
+        parsers: list[JudgeStreamParser] = []
+
+        def new_parser() -> Callable[[str], bool]:
+            parsers.append(JudgeStreamParser(self.max_reason_chars))
+            return parsers[-1].feed
+
+        try:
+            if self.stream:
+                response = self._call(request, stop_factory=new_parser)
+            else:
+                response = self._call(request)
+        except _CALL_ERRORS as exc:
+            return _judge_failed(exc)
+        truncated = False
+        try:
+            with span("llm.parse"):
+                if parsers and parsers[-1].score is not None:
+                    outcome = parsers[-1].outcome()
+                    truncated = parsers[-1].truncated
+                else:
+                    outcome = _parse_judgement(json.loads(response.content))
+        except (ValueError, json.JSONDecodeError) as exc:
+            outcome = EvalOutcome(score=0.0, reason=f"invalid_judge_json:{exc}")
         else:
+            # A cut reason would be served to later runs that read the whole reply.
+            if key is not None and not truncated:
+                self.cache.put(key, outcome)
+        return replace(
+            outcome, input_tokens=response.input_tokens, output_tokens=response.output_tokens
+        )
+
+    def score(self, *, expected: str, output: str, rule: dict[str, Any] | str) -> EvalOutcome:
+        if self.provider not in PROVIDERS:
             return EvalOutcome(score=0.0, reason=f"unknown_provider:{self.provider}")
+        return self._score_request(
+            self._request(self.render_prompt(expected=expected, output=output))
+        )
+
+    def _score_request(self, request: LLMRequest) -> EvalOutcome:
+        key, cached = self._lookup(request)
+        if cached is not None:
+            return cached
+        return self._judge(request, key)
+
+    def score_batch(self, items: list[EvalItem]) -> list[EvalOutcome]:
+        """Judge ``items`` in one request, falling back to single calls for bad entries.
+
+        The batch request's token usage is split evenly across the items it covered.
+        Outcomes parsed from a batch reply are cached in a separate ``batch`` scope, so an
+        unbatched run never reuses a judgement made with the batch prompt.
+        """
+        if len(items) <= 1 or self.provider not in PROVIDERS:
+            return super().score_batch(items)
+
+        requests = [
+            self._request(self.render_prompt(expected=item.expected, output=item.output))
+            for item in items
+        ]
+        lookups = [self._lookup(request, scope="batch") for request in requests]
+        outcomes = [cached for _, cached in lookups]
+        pending = [index for index, outcome in enumerate(outcomes) if outcome is None]
+
+        shares: dict[int, tuple[int, int]] = {}
+        if len(pending) > 1:
+            batch_request = self._request(self.render_batch_prompt([items[i] for i in pending]))
+            try:
+                response = self._call(batch_request)
+            except _CALL_ERRORS as exc:
+                # Retrying item by item would only add load to a provider that is failing.
+                failed = _judge_failed(exc)
+                return [failed if outcome is None else outcome for outcome in outcomes]
+            shares = _split_usage(response, pending)
+            with span("llm.parse", items=len(pending)):
+                parsed = _parse_batch_judgement(response.content)
+            for item_id, outcome in parsed.items():
+                if not 1 <= item_id <= len(pending):
+                    continue
+                index = pending[item_id - 1]
+                outcomes[index] = outcome
+                key = lookups[index][0]
+                if key is not None:
+                    self.cache.put(key, outcome)
+
+        judged = [
+            outcome if outcome is not None else self._score_request(requests[index])
+            for index, outcome in enumerate(outcomes)
+        ]
+        for index, (input_tokens, output_tokens) in shares.items():
+            outcome = judged[index]
+            judged[index] = replace(
+                outcome,
+                input_tokens=outcome.input_tokens + input_tokens,
+                output_tokens=outcome.output_tokens + output_tokens,
+            )
+        return judged
+
+
+def _split_usage(response: LLMResponse, indices: list[int]) -> dict[int, tuple[int, int]]:
+    """Spread a response's tokens over ``indices``; remainders go to the first items."""
+    input_each, input_rest = divmod(response.input_tokens, len(indices))
+    output_each, output_rest = divmod(response.output_tokens, len(indices))
+    return {
+        index: (input_each + (n < input_rest), output_each + (n < output_rest))
+        for n, index in enumerate(indices)
+    }
+
+
+class JudgeStreamParser:
+    """Incremental scanner for a streamed ``{"score": ..., "reason": ...}`` judge reply.
+
+    ``feed`` takes text deltas. With ``max_reason_chars`` set it returns True once the score
+    is known and the reason has closed or reached that many characters (``0`` stops right
+    after the score), and the reason is cut to that length. Without it, ``feed`` never asks
+    to stop, so the stream is read to the end and its usage report arrives. Text before the
+    first ``{`` is ignored.
+    """
+
+    def __init__(self, max_reason_chars: int | None = None) -> None:
+        self.max_reason_chars = max_reason_chars
+        self.score: float | None = None
+        self.reason: str | None = None
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._reading_value = False
+        self._key: str | None = None
+        self._raw: list[str] = []
+        self._reason_chars = 0
 
+    def feed(self, text: str) -> bool:
+        for char in text:
+            if self.complete:
+                break
+            self._step(char)
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        if self.score is None or self.max_reason_chars is None:
+            return False
+        return (
+            self.complete or self.reason is not None or self._reason_chars >= self.max_reason_chars
+        )
+
+    @property
+    def truncated(self) -> bool:
+        """Whether ``outcome`` holds less of the reason than the full reply would."""
+        if self.reason is None:
+            return not self.complete
+        return self.max_reason_chars is not None and len(self.reason) > self.max_reason_chars
+
+    def _step(self, char: str) -> None:
+        if self._depth == 0:
+            if char == "{":
+                self._depth = 1
+            return
+        if self._in_string:
+            self._raw.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1 and not self._reading_value:
+                    self._key = json.loads("".join(self._raw))
+                    self._raw = []
+            elif self._depth == 1 and self._key == "reason":
+                self._reason_chars += 1
+            return
+        if self._depth == 1 and char in ",}":
+            self._finish_value()
+            if char == "}":
+                self._depth = 0
+                self.complete = True
+            return
+        if self._depth == 1 and char == ":":
+            self._reading_value = True
+            return
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+        self._raw.append(char)
+
+    def _finish_value(self) -> None:
+        raw = "".join(self._raw).strip()
+        key = self._key
+        self._raw, self._key, self._reading_value = [], None, False
+        if not raw:
+            return
         try:
-            result = json.loads(content)
-            score = float(result.get("score", 0.0))
-            score = max(0.0, min(1.0, score))
-            reason = str(result.get("reason", ""))
-            return EvalOutcome(score=score, reason=reason)
-        except (ValueError, json.JSONDecodeError) as exc:
-            return EvalOutcome(score=0.0, reason=f"invalid_judge_json:{exc}")
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if key == "score":
+            try:
+                self.score = max(0.0, min(1.0, float(value)))
+            except (TypeError, ValueError):
+                return
+        elif key == "reason":
+            self.reason = str(value)
+
+    def outcome(self) -> EvalOutcome:
+        """The parsed judgement; a reason cut off mid-stream is returned as received so far."""
+        if self.score is None:
+            raise ValueError("judge_score_missing")
+        reason = self.reason
+        if reason is None and self._key == "reason" and self._reading_value:
+            partial = "".join(self._raw).strip().removeprefix('"').rstrip("\\")
+            try:
+                reason = json.loads(f'"{partial}"')
+            except ValueError:
+                reason = partial
+        reason = reason or ""
+        if self.max_reason_chars is not None:
+            reason = reason[: self.max_reason_chars]
+        return EvalOutcome(score=self.score, reason=reason)
+
+
+def _parse_judgement(result: Any) -> EvalOutcome:
+    if not isinstance(result, dict):
+        raise ValueError("judge_result_not_object")
+    score = float(result.get("score", 0.0))
+    score = max(0.0, min(1.0, score))
+    reason = str(result.get("reason", ""))
+    return EvalOutcome(score=score, reason=reason)
+
+
+def _parse_batch_judgement(content: str) -> dict[int, EvalOutcome]:
+    """Parse a judge reply holding a JSON array of ``{id, score, reason}`` objects.
+
+    Malformed entries are skipped so the caller can re-judge them individually.
+    """
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    if isinstance(result, dict):
+        result = result.get("results")
+    if not isinstance(result, list):
+        return {}
+
+    parsed: dict[int, EvalOutcome] = {}
+    for entry in result:
+        if not isinstance(entry, dict) or "score" not in entry:
+            continue
+        try:
+            item_id = int(entry["id"])
+            parsed[item_id] = _parse_judgement(entry)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return parsed
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import codecs
 import json
+import math
+import sys
+import time
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from itertools import pairwise
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+# libyaml's C loader is an order of magnitude faster when PyYAML was built with it.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def read_text_any(path: Path) -> str:
     data = path.read_bytes()
@@ -17,10 +27,31 @@ def read_text_any(path: Path) -> str:
     return data.decode("utf-8", errors="replace")
 
 
+def _is_utf8(data: bytes, chunk_size: int = 1 << 20) -> bool:
+    """Check ``data`` decodes as UTF-8, a chunk at a time so no full-size string is built."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    view = memoryview(data)
+    try:
+        for start in range(0, len(view), chunk_size):
+            decoder.decode(view[start : start + chunk_size])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def read_json_bytes(path: Path) -> bytes:
+    """Return a JSON file as UTF-8 bytes without a BOM, re-encoding legacy encodings."""
+    data = path.read_bytes()
+    if not _is_utf8(data):
+        return read_text_any(path).encode("utf-8")
+    return data[len(codecs.BOM_UTF8) :] if data.startswith(codecs.BOM_UTF8) else data
+
+
 def load_data(path: Path) -> dict[str, Any]:
     content = read_text_any(path)
     if path.suffix.lower() in {".yaml", ".yml"}:
-        data = yaml.safe_load(content)
+        data = yaml.load(content, Loader=_YAML_LOADER)
     else:
         data = json.loads(content)
     if not isinstance(data, dict):
@@ -30,3 +61,308 @@ def load_data(path: Path) -> dict[str, Any]:
 
 def save_json(path: Path, payload: Any) -> None:
     path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def jsonl_files(path: Path) -> list[Path]:
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() == ".jsonl")
+    return [path]
+
+
+def iter_jsonl_lines(path: Path) -> Iterator[tuple[Path, int, str]]:
+    """Yield ``(file, line_number, line)`` for each non-blank line of a JSONL file or directory."""
+    for file in jsonl_files(path):
+        with file.open("r", encoding="utf-8-sig") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                if line.strip():
+                    yield file, line_number, line
+
+
+def truncate_partial_line(path: Path) -> None:
+    """Cut a trailing line without a newline, as left behind by an interrupted writer."""
+    with path.open("rb+") as handle:
+        end = handle.seek(0, 2)
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            handle.seek(start)
+            chunk = handle.read(position - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            handle.truncate(position)
+
+
+class JsonlWriter:
+    """Append JSON lines to ``path``, flushing every ``flush_every`` lines or ``flush_seconds``.
+
+    Everything written before a crash up to the last flush stays readable. ``on_flush`` runs
+    just before each flush, so a checkpoint it saves covers every line on disk.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        append: bool = False,
+        flush_every: int = 100,
+        flush_seconds: float = 5.0,
+        on_flush: Callable[[], None] | None = None,
+    ) -> None:
+        self._handle = path.open("a" if append else "w", encoding="utf-8")
+        self.on_flush = on_flush
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.count = 0
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, record: Any) -> None:
+        self.write_line(json.dumps(record, ensure_ascii=False))
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write_line(line)
+
+    def write_line(self, line: str) -> None:
+        self._handle.write(line + "\n")
+        self.count += 1
+        self._unflushed += 1
+        if (
+            self._unflushed >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.on_flush is not None:
+            self.on_flush()
+        self._handle.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self._handle.close()
+
+    def __enter__(self) -> JsonlWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+# The columnar formats import zipfile/tempfile/pyarrow on use to keep CLI start-up light.
+RESULT_COLUMNS = ("candidate_id", "task_id", "output", "score", "error")
+RESULT_FORMATS = {"jsonl": ".jsonl", "columnar": ".prlc", "parquet": ".parquet"}
+_CODED_COLUMNS = ("candidate_id", "task_id", "error")
+
+
+def check_results_format(name: str) -> None:
+    """Raise ``ValueError`` for an unknown format or one whose optional dependency is missing."""
+    if name not in RESULT_FORMATS:
+        raise ValueError(f"format_unknown:{name}")
+    if name == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise ValueError(
+                'format_unavailable:parquet (pip install "promptrefinelab[parquet]")'
+            ) from exc
+
+
+class ColumnarWriter:
+    """Write result records to a ``.prlc`` file: a zip archive with one member per column.
+
+    Id and error columns are dictionary-encoded int32 codes (-1 for null), scores are float64
+    (NaN for null) and output text is a UTF-8 blob with int64 end offsets, so a reader can
+    load any subset of columns without decompressing the rest.
+    """
+
+    def __init__(self, path: Path) -> None:
+        import tempfile
+
+        self.path = path
+        self._values: dict[str, dict[str, int]] = {name: {} for name in _CODED_COLUMNS}
+        self._codes = {name: array("i") for name in _CODED_COLUMNS}
+        self._scores = array("d")
+        self._offsets = array("q")
+        self._text = tempfile.TemporaryFile()
+        self._size = 0
+
+    def write(self, record: dict[str, Any]) -> None:
+        for name in _CODED_COLUMNS:
+            value = record.get(name)
+            if value is None:
+                self._codes[name].append(-1)
+                continue
+            values = self._values[name]
+            code = values.get(value)
+            if code is None:
+                code = values[value] = len(values)
+            self._codes[name].append(code)
+        score = record.get("score")
+        self._scores.append(math.nan if score is None else score)
+        self._size += self._text.write(record.get("output", "").encode("utf-8"))
+        self._offsets.append(self._size)
+
+    def close(self) -> None:
+        import shutil
+        import zipfile
+
+        meta = {
+            "format": "prl-columnar",
+            "version": 1,
+            "rows": len(self._scores),
+            "byteorder": sys.byteorder,
+            "columns": list(RESULT_COLUMNS),
+        }
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("meta.json", json.dumps(meta))
+            for name in _CODED_COLUMNS:
+                archive.writestr(f"{name}.values.json", json.dumps(list(self._values[name])))
+                archive.writestr(f"{name}.codes", self._codes[name].tobytes())
+            archive.writestr("score", self._scores.tobytes())
+            archive.writestr("output.offsets", self._offsets.tobytes())
+            self._text.seek(0)
+            with archive.open("output.data", "w", force_zip64=True) as member:
+                shutil.copyfileobj(self._text, member)
+        self._text.close()
+
+    def __enter__(self) -> ColumnarWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class ParquetWriter:
+    """Write result records to a Parquet file in row groups of ``batch_size`` (needs pyarrow)."""
+
+    def __init__(self, path: Path, *, batch_size: int = 65536) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("candidate_id", pa.dictionary(pa.int32(), pa.string())),
+                ("task_id", pa.dictionary(pa.int32(), pa.string())),
+                ("output", pa.string()),
+                ("score", pa.float64()),
+                ("error", pa.dictionary(pa.int32(), pa.string())),
+            ]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        self._batch_size = batch_size
+        self._rows: list[dict[str, Any]] = []
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._rows.append(record)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self) -> ParquetWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def convert_results(path: Path, name: str) -> Path:
+    """Rewrite a ``results.jsonl`` file in format ``name``; return the new file's path."""
+    check_results_format(name)
+    target = path.with_suffix(RESULT_FORMATS[name])
+    if target == path:
+        return path
+    writer_type = ColumnarWriter if name == "columnar" else ParquetWriter
+    with writer_type(target) as writer:
+        for _, _, line in iter_jsonl_lines(path):
+            writer.write(json.loads(line))
+    return target
+
+
+def results_file(run_dir: Path) -> Path:
+    """The results file of a run directory, in whichever format it was written."""
+    for suffix in RESULT_FORMATS.values():
+        path = run_dir / f"results{suffix}"
+        if path.is_file():
+            return path
+    raise FileNotFoundError(f"results_missing:{run_dir}")
+
+
+def read_columns(
+    path: Path, columns: Iterable[str] = ("candidate_id", "task_id", "score")
+) -> dict[str, list[Any]]:
+    """Load only ``columns`` from a results file (``.prlc``, ``.parquet`` or ``.jsonl``).
+
+    Nulls are ``None``. The columnar formats never read the members of other columns, so
+    leaving out ``output`` skips the text entirely.
+    """
+    columns = list(columns)
+    unknown = [name for name in columns if name not in RESULT_COLUMNS]
+    if unknown:
+        raise ValueError(f"column_unknown:{','.join(unknown)}")
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns).to_pydict()
+    if suffix == ".jsonl":
+        table: dict[str, list[Any]] = {name: [] for name in columns}
+        for _, _, line in iter_jsonl_lines(path):
+            record = json.loads(line)
+            for name in columns:
+                table[name].append(record.get(name))
+        return table
+
+    import zipfile
+
+    with zipfile.ZipFile(path) as archive:
+        meta = json.loads(archive.read("meta.json"))
+        swap = meta["byteorder"] != sys.byteorder
+
+        def load(member: str, typecode: str) -> array:
+            values = array(typecode)
+            values.frombytes(archive.read(member))
+            if swap:
+                values.byteswap()
+            return values
+
+        table = {}
+        for name in columns:
+            if name in _CODED_COLUMNS:
+                values = json.loads(archive.read(f"{name}.values.json"))
+                table[name] = [
+                    None if code < 0 else values[code] for code in load(f"{name}.codes", "i")
+                ]
+            elif name == "score":
+                table[name] = [None if score != score else score for score in load("score", "d")]
+            else:
+                data = archive.read("output.data")
+                offsets = [0, *load("output.offsets", "q")]
+                table[name] = [data[start:end].decode("utf-8") for start, end in pairwise(offsets)]
+        return table
+
+
+def iter_results(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield every result record of a results file as a dict, in any supported format."""
+    if path.suffix.lower() == ".jsonl":
+        for _, _, line in iter_jsonl_lines(path):
+            yield json.loads(line)
+        return
+    table = read_columns(path, RESULT_COLUMNS)
+    for row in zip(*(table[name] for name in RESULT_COLUMNS), strict=True):
+        yield dict(zip(RESULT_COLUMNS, row, strict=True))
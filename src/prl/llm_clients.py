@@ -1,10 +1,25 @@
 from __future__ import annotations
 
+import http.client
 import json
 import os
-import urllib.request
+import random
+import socket
+import ssl
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from typing import Any
+from urllib.parse import urlsplit
+
+from .tracing import span
+
+PROVIDERS = ("openai", "anthropic", "gemini", "ollama")
+
+RETRYABLE_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
 
 
 @dataclass
@@ -17,35 +32,287 @@ class LLMRequest:
     provider: str
 
 
+@dataclass
+class LLMResponse:
+    content: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    stopped: bool = False  # a streamed completion cut short by its ``stop`` callback
+
+
 def _read_api_key(env_name: str | None) -> str | None:
     if not env_name:
         return None
     return os.environ.get(env_name)
 
 
+class LLMHTTPError(Exception):
+    def __init__(self, status: int, reason: str, headers: dict[str, str], body: str) -> None:
+        super().__init__(f"http_{status}:{reason}")
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class ConnectionPool:
+    """Thread-safe pool of persistent HTTP/1.1 connections, keyed by scheme/host/port.
+
+    Up to ``pool_size`` idle connections are kept per host; extra connections opened under
+    higher concurrency are closed after use instead of blocking callers.
+    """
+
+    def __init__(self, *, pool_size: int = 8, timeout: float = 60.0) -> None:
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def _connect(self, key: tuple[str, str, int]) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self._ssl_context
+            )
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        conn.connect()
+        # Small JSON requests on a reused socket otherwise stall on Nagle + delayed ACK.
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def _acquire(self, key: tuple[str, str, int]) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key: tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(
+        self, method: str, url: str, body: bytes | None, headers: dict[str, str]
+    ) -> tuple[tuple[str, str, int], http.client.HTTPConnection, http.client.HTTPResponse]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                return key, conn, conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+    def request(
+        self, method: str, url: str, body: bytes | None, headers: dict[str, str]
+    ) -> tuple[int, dict[str, str], bytes]:
+        key, conn, response = self._send(method, url, body, headers)
+        try:
+            data = response.read()
+        except BaseException:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return response.status, dict(response.getheaders()), data
+
+    @contextmanager
+    def stream(
+        self, method: str, url: str, body: bytes | None, headers: dict[str, str]
+    ) -> Iterator[tuple[int, dict[str, str], http.client.HTTPResponse]]:
+        """Yield the response before its body is read.
+
+        The connection returns to the pool only if the caller read the body to the end; a
+        stream abandoned part-way is closed.
+        """
+        key, conn, response = self._send(method, url, body, headers)
+        try:
+            yield response.status, dict(response.getheaders()), response
+        except BaseException:
+            conn.close()
+            raise
+        if response.isclosed() and not response.will_close:
+            self._release(key, conn)
+        else:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+_pool = ConnectionPool()
+
+
+def configure_transport(*, pool_size: int | None = None, timeout: float | None = None) -> None:
+    """Replace the shared connection pool when its settings change."""
+    global _pool
+    pool_size = _pool.pool_size if pool_size is None else pool_size
+    timeout = _pool.timeout if timeout is None else timeout
+    if (pool_size, timeout) == (_pool.pool_size, _pool.timeout):
+        return
+    previous, _pool = _pool, ConnectionPool(pool_size=pool_size, timeout=timeout)
+    previous.close()
+
+
 def _post_json(url: str, payload: dict[str, Any], headers: dict[str, str]) -> dict[str, Any]:
     data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(url, data=data, headers=headers, method="POST")
-    with urllib.request.urlopen(request, timeout=60) as response:
-        body = response.read().decode("utf-8")
-        return json.loads(body)
+    status, response_headers, body = _pool.request("POST", url, data, headers)
+    text = body.decode("utf-8", errors="replace")
+    if status >= 400:
+        raise LLMHTTPError(status, http.client.responses.get(status, ""), response_headers, text)
+    return json.loads(text)
+
+
+StopFn = Callable[[str], bool]
+
+
+def _sse_events(response: http.client.HTTPResponse) -> Iterator[dict[str, Any]]:
+    """Decode ``data:`` payloads of a server-sent event stream, ending at ``[DONE]``."""
+    data: list[str] = []
+    for raw in response:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if line.startswith("data:"):
+            data.append(line[5:].removeprefix(" "))
+        elif not line and data:
+            text, data = "\n".join(data), []
+            if text == "[DONE]":
+                return
+            yield json.loads(text)
+    if data and data != ["[DONE]"]:
+        yield json.loads("\n".join(data))
+
+
+def _ndjson_events(response: http.client.HTTPResponse) -> Iterator[dict[str, Any]]:
+    for raw in response:
+        if raw.strip():
+            yield json.loads(raw)
+
+
+# Each extractor maps one stream event to (text delta, input tokens, output tokens); counts are
+# None when the event does not report them.
+StreamExtract = Callable[[dict[str, Any]], tuple[str, int | None, int | None]]
+
+
+def _stream_chat(
+    url: str,
+    payload: dict[str, Any],
+    headers: dict[str, str],
+    *,
+    events: Callable[[http.client.HTTPResponse], Iterator[dict[str, Any]]],
+    extract: StreamExtract,
+    prompt: str,
+    stop: StopFn,
+) -> LLMResponse:
+    """Stream a completion, calling ``stop`` with each text delta until it returns True.
+
+    Providers report usage at the end of a stream, so a cut stream estimates the missing
+    counts at 4 characters per token.
+    """
+    data = json.dumps(payload).encode("utf-8")
+    parts: list[str] = []
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    stopped = False
+    with _pool.stream("POST", url, data, headers) as (status, response_headers, response):
+        if status >= 400:
+            text = response.read().decode("utf-8", errors="replace")
+            reason = http.client.responses.get(status, "")
+            raise LLMHTTPError(status, reason, response_headers, text)
+        for event in events(response):
+            text, event_input, event_output = extract(event)
+            input_tokens = event_input if event_input is not None else input_tokens
+            output_tokens = event_output if event_output is not None else output_tokens
+            if text:
+                parts.append(text)
+                if stop(text):
+                    stopped = True
+                    break
+    content = "".join(parts)
+    return LLMResponse(
+        content=content,
+        input_tokens=len(prompt) // 4 + 1 if input_tokens is None else input_tokens,
+        output_tokens=len(content) // 4 + 1 if output_tokens is None else output_tokens,
+        stopped=stopped,
+    )
+
 
+def _openai_delta(event: dict[str, Any]) -> tuple[str, int | None, int | None]:
+    usage = event.get("usage") or {}
+    choices = event.get("choices") or [{}]
+    text = (choices[0].get("delta") or {}).get("content") or ""
+    return text, usage.get("prompt_tokens"), usage.get("completion_tokens")
 
-def call_openai_chat(req: LLMRequest) -> str:
+
+def call_openai_chat(req: LLMRequest, stop: StopFn | None = None) -> LLMResponse:
     base = (req.base_url or "https://api.openai.com").rstrip("/")
     url = f"{base}/v1/chat/completions"
     api_key = _read_api_key(req.api_key_env) or ""
     headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
-    payload = {
+    payload: dict[str, Any] = {
         "model": req.model,
         "messages": [{"role": "user", "content": req.prompt}],
         "temperature": req.temperature,
     }
+    if stop is not None:
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        return _stream_chat(
+            url,
+            payload,
+            headers,
+            events=_sse_events,
+            extract=_openai_delta,
+            prompt=req.prompt,
+            stop=stop,
+        )
     response = _post_json(url, payload, headers)
-    return response["choices"][0]["message"]["content"]
+    usage = response.get("usage") or {}
+    return LLMResponse(
+        content=response["choices"][0]["message"]["content"],
+        input_tokens=usage.get("prompt_tokens") or 0,
+        output_tokens=usage.get("completion_tokens") or 0,
+    )
+
 
+def _ollama_delta(event: dict[str, Any]) -> tuple[str, int | None, int | None]:
+    text = (event.get("message") or {}).get("content") or ""
+    return text, event.get("prompt_eval_count"), event.get("eval_count")
 
-def call_ollama_chat(req: LLMRequest) -> str:
+
+def call_ollama_chat(req: LLMRequest, stop: StopFn | None = None) -> LLMResponse:
     base = (req.base_url or "http://localhost:11434").rstrip("/")
     url = f"{base}/api/chat"
     headers = {"Content-Type": "application/json"}
@@ -53,13 +320,40 @@ def call_ollama_chat(req: LLMRequest) -> str:
         "model": req.model,
         "messages": [{"role": "user", "content": req.prompt}],
         "options": {"temperature": req.temperature},
-        "stream": False,
+        "stream": stop is not None,
     }
+    if stop is not None:
+        return _stream_chat(
+            url,
+            payload,
+            headers,
+            events=_ndjson_events,
+            extract=_ollama_delta,
+            prompt=req.prompt,
+            stop=stop,
+        )
     response = _post_json(url, payload, headers)
-    return response["message"]["content"]
+    return LLMResponse(
+        content=response["message"]["content"],
+        input_tokens=response.get("prompt_eval_count") or 0,
+        output_tokens=response.get("eval_count") or 0,
+    )
+
+
+def _anthropic_delta(event: dict[str, Any]) -> tuple[str, int | None, int | None]:
+    kind = event.get("type")
+    if kind == "message_start":
+        # Its output_tokens is a placeholder; the real count comes with message_delta.
+        usage = (event.get("message") or {}).get("usage") or {}
+        return "", usage.get("input_tokens"), None
+    if kind == "message_delta":
+        return "", None, (event.get("usage") or {}).get("output_tokens")
+    if kind == "content_block_delta":
+        return (event.get("delta") or {}).get("text") or "", None, None
+    return "", None, None
 
 
-def call_anthropic(req: LLMRequest) -> str:
+def call_anthropic(req: LLMRequest, stop: StopFn | None = None) -> LLMResponse:
     base = (req.base_url or "https://api.anthropic.com").rstrip("/")
     url = f"{base}/v1/messages"
     api_key = _read_api_key(req.api_key_env) or ""
@@ -68,24 +362,356 @@ def call_anthropic(req: LLMRequest) -> str:
         "x-api-key": api_key,
         "anthropic-version": "2023-06-01",
     }
-    payload = {
+    payload: dict[str, Any] = {
         "model": req.model,
         "max_tokens": 400,
         "temperature": req.temperature,
         "messages": [{"role": "user", "content": req.prompt}],
     }
+    if stop is not None:
+        payload["stream"] = True
+        return _stream_chat(
+            url,
+            payload,
+            headers,
+            events=_sse_events,
+            extract=_anthropic_delta,
+            prompt=req.prompt,
+            stop=stop,
+        )
     response = _post_json(url, payload, headers)
-    return response["content"][0]["text"]
+    usage = response.get("usage") or {}
+    return LLMResponse(
+        content=response["content"][0]["text"],
+        input_tokens=usage.get("input_tokens") or 0,
+        output_tokens=usage.get("output_tokens") or 0,
+    )
+
+
+def _gemini_delta(event: dict[str, Any]) -> tuple[str, int | None, int | None]:
+    usage = event.get("usageMetadata") or {}
+    candidates = event.get("candidates") or [{}]
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    text = "".join(part.get("text", "") for part in parts)
+    return text, usage.get("promptTokenCount"), usage.get("candidatesTokenCount")
 
 
-def call_gemini(req: LLMRequest) -> str:
+def call_gemini(req: LLMRequest, stop: StopFn | None = None) -> LLMResponse:
     base = (req.base_url or "https://generativelanguage.googleapis.com").rstrip("/")
     api_key = _read_api_key(req.api_key_env) or ""
-    url = f"{base}/v1beta/models/{req.model}:generateContent?key={api_key}"
     headers = {"Content-Type": "application/json"}
     payload = {
         "contents": [{"parts": [{"text": req.prompt}]}],
         "generationConfig": {"temperature": req.temperature},
     }
+    if stop is not None:
+        url = f"{base}/v1beta/models/{req.model}:streamGenerateContent?alt=sse&key={api_key}"
+        return _stream_chat(
+            url,
+            payload,
+            headers,
+            events=_sse_events,
+            extract=_gemini_delta,
+            prompt=req.prompt,
+            stop=stop,
+        )
+    url = f"{base}/v1beta/models/{req.model}:generateContent?key={api_key}"
     response = _post_json(url, payload, headers)
-    return response["candidates"][0]["content"]["parts"][0]["text"]
+    usage = response.get("usageMetadata") or {}
+    return LLMResponse(
+        content=response["candidates"][0]["content"]["parts"][0]["text"],
+        input_tokens=usage.get("promptTokenCount") or 0,
+        output_tokens=usage.get("candidatesTokenCount") or 0,
+    )
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` units per minute."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self._available = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until ``amount`` units are available; return the seconds spent waiting."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                refill = (now - self._updated) * self.per_minute / 60.0
+                self._available = min(self.capacity, self._available + refill)
+                self._updated = now
+                if self._available >= amount:
+                    self._available -= amount
+                    return waited
+                delay = (amount - self._available) * 60.0 / self.per_minute
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveLimiter:
+    """Concurrency cap with AIMD control: +1 after a window of successes, halved on throttling."""
+
+    def __init__(self, max_limit: int) -> None:
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+    def set_max(self, max_limit: int) -> None:
+        """Change the cap, keeping any reduction that throttling has already made."""
+        with self._cond:
+            throttled = self.limit < self.max_limit
+            self.max_limit = max(1, max_limit)
+            self.limit = min(self.limit, self.max_limit) if throttled else self.max_limit
+            self._cond.notify_all()
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given zero-based retry attempt."""
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def _retry_after(headers: dict[str, str]) -> float | None:
+    value = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _rebucket(bucket: TokenBucket | None, per_minute: float | None) -> TokenBucket | None:
+    if not per_minute:
+        return None
+    if bucket is not None and bucket.per_minute == per_minute:
+        return bucket
+    return TokenBucket(per_minute)
+
+
+class ProviderGate:
+    """Per-provider request/token budgets, adaptive concurrency, retries and counters."""
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        self.limiter = AdaptiveLimiter(concurrency)
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.retry = retry or RetryPolicy()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def configure(
+        self,
+        *,
+        concurrency: int,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        """Update the limits in place; unchanged buckets, AIMD state and counters carry over."""
+        self.limiter.set_max(concurrency)
+        self.requests = _rebucket(self.requests, requests_per_minute)
+        self.tokens = _rebucket(self.tokens, tokens_per_minute)
+        self.retry = retry or RetryPolicy()
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.stats: dict[str, Any] = {
+                "requests": 0,
+                "retries": 0,
+                "throttled": 0,
+                "failures": 0,
+                "throttle_seconds": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+            }
+
+    def _count(self, **deltas: float) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["concurrency_limit"] = self.limiter.limit
+        stats["throttle_seconds"] = round(stats["throttle_seconds"], 3)
+        return stats
+
+    def _wait_for_budget(self, estimated_tokens: int) -> None:
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire()
+        if self.tokens is not None:
+            waited += self.tokens.acquire(estimated_tokens)
+        if waited:
+            self._count(throttle_seconds=waited)
+
+    def run(self, call: Callable[[LLMRequest], LLMResponse], req: LLMRequest) -> LLMResponse:
+        estimated_tokens = len(req.prompt) // 4 + 1
+        attempt = 0
+        while True:
+            with span("llm.queue", provider=req.provider):
+                self._wait_for_budget(estimated_tokens)
+                self.limiter.acquire()
+            self._count(requests=1)
+            try:
+                with span(
+                    "llm.call", provider=req.provider, model=req.model, attempt=attempt
+                ) as call_span:
+                    try:
+                        response = call(req)
+                    except LLMHTTPError as exc:
+                        call_span.set(status=exc.status)
+                        raise
+                    call_span.set(
+                        status=200,
+                        input_tokens=response.input_tokens,
+                        output_tokens=response.output_tokens,
+                    )
+                    if response.stopped:
+                        call_span.set(stopped=True)
+            except LLMHTTPError as exc:
+                if exc.status not in RETRYABLE_STATUSES or attempt >= self.retry.max_retries:
+                    self._count(failures=1)
+                    raise
+                if exc.status in (429, 529):
+                    self.limiter.on_throttle()
+                    self._count(throttled=1)
+                delay = _retry_after(exc.headers)
+                if delay is None:
+                    delay = self.retry.backoff(attempt)
+            except (OSError, http.client.HTTPException):
+                if attempt >= self.retry.max_retries:
+                    self._count(failures=1)
+                    raise
+                delay = self.retry.backoff(attempt)
+            else:
+                self.limiter.on_success()
+                self._count(
+                    input_tokens=response.input_tokens, output_tokens=response.output_tokens
+                )
+                return response
+            finally:
+                self.limiter.release()
+            attempt += 1
+            self._count(retries=1, throttle_seconds=delay)
+            time.sleep(delay)
+
+
+_gates: dict[str, ProviderGate] = {}
+_gates_lock = threading.Lock()
+
+
+def configure_provider(
+    provider: str,
+    *,
+    concurrency: int,
+    requests_per_minute: float | None = None,
+    tokens_per_minute: float | None = None,
+    retry: RetryPolicy | None = None,
+) -> None:
+    """Set the rate limits and retry policy used for every call to ``provider``.
+
+    The provider's gate is created once and updated on later calls, so configuring again
+    between scoring passes keeps its throttling state and counters.
+    """
+    with _gates_lock:
+        gate = _gates.get(provider)
+        if gate is None:
+            gate = _gates[provider] = ProviderGate(concurrency=concurrency)
+    gate.configure(
+        concurrency=concurrency,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        retry=retry,
+    )
+
+
+def _gate(provider: str) -> ProviderGate:
+    with _gates_lock:
+        gate = _gates.get(provider)
+        if gate is None:
+            gate = _gates[provider] = ProviderGate(concurrency=64)
+        return gate
+
+
+def provider_stats() -> dict[str, dict[str, Any]]:
+    with _gates_lock:
+        gates = dict(_gates)
+    return {provider: gate.snapshot() for provider, gate in sorted(gates.items())}
+
+
+def reset_provider_stats() -> None:
+    with _gates_lock:
+        gates = list(_gates.values())
+    for gate in gates:
+        gate.reset_stats()
+
+
+def call_llm(req: LLMRequest, *, stop_factory: Callable[[], StopFn] | None = None) -> LLMResponse:
+    """Dispatch ``req`` to its provider through that provider's limits and retry policy.
+
+    With ``stop_factory`` the completion is streamed; each attempt gets a fresh callback from
+    the factory, fed every text delta, and the stream is cut once it returns True.
+    """
+    if req.provider == "openai":
+        call = call_openai_chat
+    elif req.provider == "anthropic":
+        call = call_anthropic
+    elif req.provider == "gemini":
+        call = call_gemini
+    elif req.provider == "ollama":
+        call = call_ollama_chat
+    else:
+        raise ValueError(f"unknown_provider:{req.provider}")
+    if stop_factory is None:
+        return _gate(req.provider).run(call, req)
+    return _gate(req.provider).run(lambda request: call(request, stop_factory()), req)
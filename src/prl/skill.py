@@ -1,19 +1,78 @@
 from __future__ import annotations
 
 import difflib
-from dataclasses import dataclass
-from typing import Any
+import hashlib
+import heapq
+import http.client
+import math
+import random
+import threading
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from itertools import islice
+from typing import Any, TypeVar
 
-from .evaluators import LLMAsJudgeEvaluator, RuleBasedEvaluator
+from .cache import JudgeCache
+from .evaluators import (
+    EvalItem,
+    EvalOutcome,
+    Evaluator,
+    LLMAsJudgeEvaluator,
+    RuleBasedEvaluator,
+    RuleScorer,
+)
+from .llm_clients import (
+    LLMHTTPError,
+    LLMRequest,
+    RetryPolicy,
+    call_llm,
+    configure_provider,
+    configure_transport,
+)
 from .models import Candidate, RunResult, Task
-from .spec import RunSpec
+from .spec import EvalConfig, ExecutionConfig, RunSpec, ShardInfo
+from .table import ScoreTable
+from .tracing import span
+from .usage import UsageMeter
+from .validation import ensure_task_ids
+from .validation import validate_spec as validate_spec
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 @dataclass
 class EvaluateResult:
-    run_results: list[RunResult]
     candidates: list[Candidate]
     leaderboard: list[dict[str, Any]]
+    table: ScoreTable
+    outputs: Sequence[RunResult] | None
+    stopped_early: bool = False
+    usage: UsageMeter | None = None
+    dedup: JudgeDeduper | None = None
+
+    @cached_property
+    def run_results(self) -> list[RunResult]:
+        """Scored RunResults, built from the columnar ``table`` on first access.
+
+        Needs the outputs as a sequence; streamed outputs are not kept, so only the table and
+        leaderboard are available for them.
+        """
+        if self.outputs is None:
+            raise ValueError("run_results_unavailable:streamed_outputs")
+        return self.table.results(islice(self.outputs, len(self.table)))
+
+    def task_breakdown(self) -> dict[str, dict[str, float]]:
+        return self.table.task_breakdown()
 
 
 @dataclass
@@ -22,104 +81,722 @@ class OptimizeResult:
     leaderboard: list[dict[str, Any]]
     diff: str | None
     run_results: list[RunResult]
+    candidates: list[Candidate] = field(default_factory=list)
+    rounds: list[dict[str, Any]] = field(default_factory=list)
+    racing: dict[str, Any] | None = None
+    usage: UsageMeter | None = None
+    dedup: JudgeDeduper | None = None
+
+
+@dataclass
+class RaceResult:
+    board: ScoreBoard
+    run_results: list[RunResult]
+    rungs: list[dict[str, Any]]
+    reached: dict[str, int]
+    judge_calls: int
+    exhaustive_calls: int
+
+    def leaderboard(self) -> list[dict[str, Any]]:
+        """Rank by the rung each candidate reached, then by mean score within that rung."""
+        rows = self.board.leaderboard()
+        rows.sort(key=lambda row: self.reached.get(row["candidate_id"], 0), reverse=True)
+        for rank, row in enumerate(rows, start=1):
+            row["rank"] = rank
+            row["rung"] = self.reached.get(row["candidate_id"], 0)
+        return rows
+
+    def summary(self) -> dict[str, Any]:
+        """Racing's saving is the outputs it never scored; ``judge_calls`` is the requests
+        sent, which dedup, the judge cache and batching lower further."""
+        return {
+            "selection": "successive_halving",
+            "outputs": self.exhaustive_calls,
+            "outputs_scored": len(self.run_results),
+            "outputs_skipped": self.exhaustive_calls - len(self.run_results),
+            "judge_calls": self.judge_calls,
+            "rungs": self.rungs,
+        }
+
+
+def split_spec(
+    spec: RunSpec, shards: int, *, by: str = "task"
+) -> tuple[list[RunSpec], dict[str, int]]:
+    """Split ``spec`` into ``shards`` contiguous blocks of tasks or candidates.
+
+    Returns the sub-specs (without outputs) and a map from task or candidate id to shard
+    index for routing outputs. Blocks are contiguous so concatenating the shards in index
+    order restores the original candidate order.
+    """
+    if by not in ("task", "candidate"):
+        raise ValueError(f"shard_by_unknown:{by}")
+    tasks = ensure_task_ids(spec.tasks)
+    items: list[Any] = tasks if by == "task" else spec.candidates
+    if not 1 <= shards <= len(items):
+        raise ValueError(f"shard_count_invalid:{shards}:{len(items)}_{by}s")
+
+    sub_specs: list[RunSpec] = []
+    routes: dict[str, int] = {}
+    for index in range(shards):
+        block = items[index * len(items) // shards : (index + 1) * len(items) // shards]
+        routes.update((item.id, index) for item in block)
+        sub_specs.append(
+            spec.model_copy(
+                update={
+                    "tasks": block if by == "task" else tasks,
+                    "candidates": spec.candidates if by == "task" else block,
+                    "outputs": [],
+                    "outputs_path": None,
+                    "shard": ShardInfo(index=index, count=shards, by=by),
+                }
+            )
+        )
+    return sub_specs, routes
+
+
+def _build_evaluator(config: EvalConfig, judge_cache: JudgeCache | None = None) -> Evaluator:
+    if config.type == "rule_based":
+        return RuleBasedEvaluator()
+    return LLMAsJudgeEvaluator(
+        provider=config.provider or "openai",
+        model=config.model or "",
+        base_url=config.base_url,
+        api_key_env=config.api_key_env,
+        temperature=config.temperature,
+        judge_prompt=config.judge_prompt,
+        cache=judge_cache,
+        stream=config.stream,
+        max_reason_chars=config.max_reason_chars,
+    )
+
+
+def _ordered_map(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[R]:
+    """Map ``fn`` over ``items`` with up to ``workers`` threads, yielding in input order.
+
+    At most ``2 * workers`` items are in flight, so ``items`` may be an unbounded iterator.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from _ordered_submit(executor, fn, items, 2 * workers)
+
+
+def _ordered_submit(
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], window: int
+) -> Iterator[R]:
+    pending: deque[Future[R]] = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Closing the generator early (e.g. early stopping) drops work not yet started.
+        for future in pending:
+            future.cancel()
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _configure_judge(config: EvalConfig, concurrency: int | None) -> int:
+    if config.type != "llm_judge":
+        return 1
+    workers = concurrency or config.max_concurrency
+    provider = config.provider or "openai"
+    configure_transport(pool_size=max(config.pool_size, workers), timeout=config.timeout)
+    configure_provider(
+        provider,
+        concurrency=config.provider_concurrency.get(provider, workers),
+        requests_per_minute=config.requests_per_minute,
+        tokens_per_minute=config.tokens_per_minute,
+        retry=RetryPolicy(max_retries=config.max_retries),
+    )
+    return workers
+
+
+class ScoreBoard:
+    """Running per-candidate score statistics, fed one result at a time.
+
+    Besides the mean, each candidate keeps a Welford variance and a Hoeffding confidence
+    interval at ``confidence`` (scores are bounded in [0, 1]).
+    """
+
+    def __init__(self, candidates: list[Candidate], *, confidence: float = 0.95) -> None:
+        self.candidates = list(candidates)
+        self.confidence = confidence
+        self.totals: dict[str, float] = {c.id: 0.0 for c in candidates}
+        self.counts: dict[str, int] = {c.id: 0 for c in candidates}
+        self.means: dict[str, float] = {c.id: 0.0 for c in candidates}
+        self.m2: dict[str, float] = {c.id: 0.0 for c in candidates}
+
+    def add_candidate(self, candidate: Candidate) -> None:
+        self.candidates.append(candidate)
+        self.totals.setdefault(candidate.id, 0.0)
+        self.counts.setdefault(candidate.id, 0)
+        self.means.setdefault(candidate.id, 0.0)
+        self.m2.setdefault(candidate.id, 0.0)
+
+    def add(self, result: RunResult) -> None:
+        if result.score is not None:
+            self.add_score(result.candidate_id, result.score)
+
+    def add_score(self, candidate_id: str, score: float) -> None:
+        count = self.counts.get(candidate_id, 0) + 1
+        mean = self.means.get(candidate_id, 0.0)
+        delta = score - mean
+        mean += delta / count
+        self.totals[candidate_id] = self.totals.get(candidate_id, 0.0) + score
+        self.counts[candidate_id] = count
+        self.means[candidate_id] = mean
+        self.m2[candidate_id] = self.m2.get(candidate_id, 0.0) + delta * (score - mean)
+
+    def merge(self, candidate_id: str, count: int, total: float, m2: float) -> None:
+        """Fold in a partial aggregate of ``count`` scores (Chan et al. pairwise update)."""
+        if not count:
+            return
+        seen = self.counts.get(candidate_id, 0)
+        mean = self.means.get(candidate_id, 0.0)
+        delta = total / count - mean
+        merged = seen + count
+        self.totals[candidate_id] = self.totals.get(candidate_id, 0.0) + total
+        self.counts[candidate_id] = merged
+        self.means[candidate_id] = mean + delta * count / merged
+        self.m2[candidate_id] = (
+            self.m2.get(candidate_id, 0.0) + m2 + delta * delta * seen * count / merged
+        )
+
+    def partials(self) -> dict[str, tuple[int, float, float]]:
+        """Per-candidate ``(count, total, m2)``, in candidate order, for ``merge``."""
+        return {
+            c.id: (self.counts.get(c.id, 0), self.totals.get(c.id, 0.0), self.m2.get(c.id, 0.0))
+            for c in self.candidates
+        }
+
+    def mean(self, candidate_id: str) -> float:
+        count = self.counts.get(candidate_id, 0)
+        return self.totals.get(candidate_id, 0.0) / count if count else 0.0
 
+    def interval(self, candidate_id: str) -> tuple[float, float]:
+        count = self.counts.get(candidate_id, 0)
+        if not count:
+            return 0.0, 1.0
+        mean = self.mean(candidate_id)
+        half_width = math.sqrt(math.log(2 / (1 - self.confidence)) / (2 * count))
+        return max(0.0, mean - half_width), min(1.0, mean + half_width)
 
-def _ensure_task_ids(tasks: list[Task]) -> list[Task]:
-    normalized: list[Task] = []
-    for index, task in enumerate(tasks, start=1):
-        if task.id is None:
-            normalized.append(task.model_copy(update={"id": f"t{index}"}))
+    def scored_candidates(self) -> list[Candidate]:
+        return [c.model_copy(update={"score": self.mean(c.id)}) for c in self.candidates]
+
+    def leaderboard(self) -> list[dict[str, Any]]:
+        """Rows sorted by mean score.
+
+        ``separated`` is set when a row's lower bound is above the upper bound of every row
+        ranked below it.
+        """
+        leaderboard = []
+        for candidate in self.candidates:
+            count = self.counts.get(candidate.id, 0)
+            low, high = self.interval(candidate.id)
+            leaderboard.append(
+                {
+                    "candidate_id": candidate.id,
+                    "score": self.mean(candidate.id),
+                    "n": count,
+                    "variance": self.m2[candidate.id] / (count - 1) if count > 1 else 0.0,
+                    "ci_low": low,
+                    "ci_high": high,
+                }
+            )
+        leaderboard.sort(key=lambda item: item["score"], reverse=True)
+
+        best_high_below = -math.inf
+        for row in reversed(leaderboard):
+            row["separated"] = row["ci_low"] > best_high_below
+            best_high_below = max(best_high_below, row["ci_high"])
+        if leaderboard:
+            leaderboard[-1]["separated"] = False
+        for rank, row in enumerate(leaderboard, start=1):
+            row["rank"] = rank
+        return leaderboard
+
+    def leader_separated(self, min_samples: int) -> bool:
+        """True once every candidate has ``min_samples`` scores and the leader's interval
+        is above every other candidate's."""
+        if len(self.candidates) < 2:
+            return False
+        if any(self.counts.get(c.id, 0) < min_samples for c in self.candidates):
+            return False
+        ranked = sorted(self.candidates, key=lambda c: self.mean(c.id), reverse=True)
+        leader_low = self.interval(ranked[0].id)[0]
+        return all(leader_low > self.interval(c.id)[1] for c in ranked[1:])
+
+
+def _rule_rows(
+    outputs: Iterable[RunResult], evaluator: RuleBasedEvaluator, task_index: dict[str, Task]
+) -> Iterator[tuple[RunResult, float, str | None]]:
+    scorers = {
+        task_id: evaluator.compile(task.judge_rule, expected=task.expected)
+        for task_id, task in task_index.items()
+    }
+    for output in outputs:
+        scorer = scorers.get(output.task_id)
+        if scorer is None:
+            yield output, 0.0, "task_not_found"
         else:
-            normalized.append(task)
-    return normalized
-
-
-def validate_spec(spec: RunSpec) -> list[str]:
-    errors: list[str] = []
-    candidate_ids = {c.id for c in spec.candidates}
-    task_ids = {t.id for t in _ensure_task_ids(spec.tasks)}
-
-    if spec.evaluator.type not in {"rule_based", "llm_judge"}:
-        errors.append(f"evaluator_unknown:{spec.evaluator.type}")
-    if spec.evaluator.type == "llm_judge":
-        if not spec.evaluator.provider:
-            errors.append("evaluator_provider_missing")
-        if not spec.evaluator.model:
-            errors.append("evaluator_model_missing")
-        if spec.evaluator.provider != "ollama" and not spec.evaluator.api_key_env:
-            errors.append("evaluator_api_key_env_missing")
-
-    for output in spec.outputs:
-        if output.candidate_id not in candidate_ids:
-            errors.append(f"output_candidate_missing:{output.candidate_id}")
-        if output.task_id not in task_ids:
-            errors.append(f"output_task_missing:{output.task_id}")
-    return errors
-
-
-def evaluate(spec: RunSpec) -> EvaluateResult:
-    tasks = _ensure_task_ids(spec.tasks)
-    if spec.evaluator.type == "rule_based":
-        evaluator = RuleBasedEvaluator()
-    else:
-        evaluator = LLMAsJudgeEvaluator(
-            provider=spec.evaluator.provider or "openai",
-            model=spec.evaluator.model or "",
-            base_url=spec.evaluator.base_url,
-            api_key_env=spec.evaluator.api_key_env,
-            temperature=spec.evaluator.temperature,
-            judge_prompt=spec.evaluator.judge_prompt,
+            yield output, scorer(output.output).score, None
+
+
+def _score_rules(
+    outputs: Iterable[RunResult], evaluator: RuleBasedEvaluator, task_index: dict[str, Task]
+) -> Iterator[RunResult]:
+    for output, score, error in _rule_rows(outputs, evaluator, task_index):
+        update: dict[str, Any] = {"score": score}
+        if error is not None:
+            update["error"] = error
+        yield output.model_copy(update=update)
+
+
+@dataclass
+class RuleShard:
+    """One chunk of outputs scored in a worker process.
+
+    ``lines`` are the scored RunResults as JSON, in input order; ``stats`` maps each candidate
+    to its partial ``(count, total, m2)`` for ``ScoreBoard.merge``.
+    """
+
+    lines: list[str]
+    stats: dict[str, tuple[int, float, float]]
+
+
+_shard_scorers: dict[str, RuleScorer] = {}
+
+
+def _init_rule_worker(rules: dict[str, tuple[dict[str, Any] | str, str]]) -> None:
+    evaluator = RuleBasedEvaluator()
+    _shard_scorers.clear()
+    for task_id, (rule, expected) in rules.items():
+        _shard_scorers[task_id] = evaluator.compile(rule, expected=expected)
+
+
+def _score_rule_shard(records: list[tuple[Any, int, str]]) -> RuleShard:
+    lines: list[str] = []
+    running: dict[str, list[float]] = {}
+    for source, line_number, line in records:
+        try:
+            output = RunResult.model_validate_json(line)
+        except ValueError as exc:
+            raise ValueError(f"invalid_output_record:{source}:{line_number}") from exc
+        scorer = _shard_scorers.get(output.task_id)
+        if scorer is None:
+            output.score = 0.0
+            output.error = "task_not_found"
+        else:
+            output.score = scorer(output.output).score
+        lines.append(output.model_dump_json())
+
+        # Welford update of [count, total, mean, m2] for this shard.
+        stats = running.get(output.candidate_id)
+        if stats is None:
+            stats = running[output.candidate_id] = [0, 0.0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += output.score
+        delta = output.score - stats[2]
+        stats[2] += delta / stats[0]
+        stats[3] += delta * (output.score - stats[2])
+    return RuleShard(
+        lines=lines,
+        stats={cid: (int(count), total, m2) for cid, (count, total, _, m2) in running.items()},
+    )
+
+
+def iter_rule_shards(
+    spec: RunSpec,
+    records: Iterable[tuple[Any, int, str]],
+    *,
+    workers: int,
+    chunk_size: int = 2048,
+) -> Iterator[RuleShard]:
+    """Score rule-based outputs across ``workers`` processes, yielding shards in input order.
+
+    ``records`` are ``(source, line_number, json_line)`` RunResult records, as produced by
+    ``iter_jsonl_lines``; parsing, scoring and serialisation all happen in the workers, each
+    of which compiles the task rules once.
+    """
+    if spec.evaluator.type != "rule_based":
+        raise ValueError(f"workers_unsupported:{spec.evaluator.type}")
+    rules = {
+        task.id: (task.judge_rule, task.expected)
+        for task in ensure_task_ids(spec.tasks)
+        if task.id is not None
+    }
+    if workers <= 1:
+        _init_rule_worker(rules)
+        yield from map(_score_rule_shard, _batched(records, chunk_size))
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_rule_worker, initargs=(rules,)
+    ) as executor:
+        yield from _ordered_submit(
+            executor, _score_rule_shard, _batched(records, chunk_size), 2 * workers
         )
-    run_results: list[RunResult] = []
 
-    task_index = {t.id: t for t in tasks if t.id is not None}
 
-    for output in spec.outputs:
-        task = task_index.get(output.task_id)
-        if task is None:
-            run_results.append(output.model_copy(update={"score": 0.0, "error": "task_not_found"}))
+DedupKey = tuple[str, bytes]
+
+
+class JudgeDeduper:
+    """Judges each distinct ``(task_id, normalised output)`` once per run.
+
+    Outputs are normalised by collapsing whitespace. Later duplicates reuse the first
+    outcome, and duplicates that arrive while that judgement is still in flight wait for it,
+    so identical requests never reach the provider together. Token usage stays with the
+    output that was actually judged; reused outcomes carry none. Failed judgements are passed
+    to waiting duplicates but not kept, so a later duplicate is judged again.
+
+    Only the scores of the ``max_entries`` most recently used keys are kept, so memory stays
+    bounded on streamed runs; an evicted key is judged again (or found in the judge cache).
+    Reused outcomes carry no reason.
+    """
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._done: OrderedDict[DedupKey, float] = OrderedDict()
+        self._pending: dict[DedupKey, Future[EvalOutcome]] = {}
+        self.judged = 0
+        self.reused = 0
+
+    @staticmethod
+    def key(task_id: str, output: str) -> DedupKey:
+        normalised = " ".join(output.split()).encode("utf-8")
+        return task_id, hashlib.blake2b(normalised, digest_size=16).digest()
+
+    def score_batch(
+        self,
+        keys: list[DedupKey],
+        items: list[EvalItem],
+        judge: Callable[[list[EvalItem]], list[EvalOutcome]],
+    ) -> list[EvalOutcome]:
+        """Score ``items`` through ``judge``, sending only keys not judged or in flight."""
+        outcomes: list[EvalOutcome | None] = [None] * len(items)
+        owned: dict[DedupKey, list[int]] = {}
+        waits: list[tuple[int, Future[EvalOutcome]]] = []
+        with self._lock:
+            for index, key in enumerate(keys):
+                if key in owned:
+                    owned[key].append(index)
+                elif key in self._done:
+                    self._done.move_to_end(key)
+                    outcomes[index] = EvalOutcome(score=self._done[key])
+                elif key in self._pending:
+                    waits.append((index, self._pending[key]))
+                else:
+                    owned[key] = [index]
+                    self._pending[key] = Future()
+            self.judged += len(owned)
+            self.reused += len(items) - len(owned)
+
+        if owned:
+            try:
+                judged = judge([items[indices[0]] for indices in owned.values()])
+            except BaseException as exc:
+                with self._lock:
+                    for key in owned:
+                        self._pending.pop(key).set_exception(exc)
+                raise
+            with self._lock:
+                for (key, indices), outcome in zip(owned.items(), judged, strict=True):
+                    shared = replace(outcome, input_tokens=0, output_tokens=0)
+                    if outcome.error is None:
+                        self._done[key] = outcome.score
+                        if len(self._done) > self.max_entries:
+                            self._done.popitem(last=False)
+                    self._pending.pop(key).set_result(shared)
+                    outcomes[indices[0]] = outcome
+                    for index in indices[1:]:
+                        outcomes[index] = shared
+        for index, future in waits:
+            outcomes[index] = future.result()
+        return outcomes  # type: ignore[return-value]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            judged, reused = self.judged, self.reused
+        total = judged + reused
+        return {
+            "outputs": total,
+            "judged": judged,
+            "reused": reused,
+            "dedup_ratio": reused / total if total else 0.0,
+        }
+
+
+def _score_judged(
+    outputs: Iterable[RunResult],
+    evaluator: Evaluator,
+    task_index: dict[str, Task],
+    workers: int,
+    batch_size: int,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+) -> Iterator[RunResult]:
+    def score_batch(batch: list[RunResult]) -> list[RunResult]:
+        if usage is not None and usage.exhausted:
+            return [
+                output.model_copy(update={"score": None, "error": "budget_exhausted"})
+                for output in batch
+            ]
+        found = [(output, task_index.get(output.task_id)) for output in batch]
+        items = [
+            EvalItem(expected=task.expected, output=output.output, rule=task.judge_rule)
+            for output, task in found
+            if task is not None
+        ]
+        if dedup is None:
+            outcomes = iter(evaluator.score_batch(items))
+        else:
+            keys = [dedup.key(output.task_id, output.output) for output, task in found if task]
+            outcomes = iter(dedup.score_batch(keys, items, evaluator.score_batch))
+        scored = []
+        for output, task in found:
+            if task is None:
+                scored.append(output.model_copy(update={"score": 0.0, "error": "task_not_found"}))
+                continue
+            outcome = next(outcomes)
+            if usage is not None:
+                usage.add(output.candidate_id, outcome.input_tokens, outcome.output_tokens)
+            if outcome.error is not None:
+                scored.append(output.model_copy(update={"score": None, "error": outcome.error}))
+            else:
+                scored.append(output.model_copy(update={"score": outcome.score}))
+        return scored
+
+    for batch in _ordered_map(score_batch, _batched(outputs, batch_size), workers):
+        yield from batch
+
+
+def skip_scored(
+    outputs: Iterable[RunResult], done: Counter[tuple[str, str]]
+) -> Iterator[RunResult]:
+    """Drop outputs whose ``(candidate_id, task_id)`` pair is still counted in ``done``.
+
+    Each skipped output consumes one count, so duplicated pairs resume correctly.
+    """
+    for output in outputs:
+        key = (output.candidate_id, output.task_id)
+        if done[key] > 0:
+            done[key] -= 1
             continue
-        outcome = evaluator.score(
-            expected=task.expected, output=output.output, rule=task.judge_rule
-        )
-        run_results.append(output.model_copy(update={"score": outcome.score}))
+        yield output
 
-    candidate_scores: dict[str, list[float]] = {c.id: [] for c in spec.candidates}
-    for result in run_results:
-        if result.score is not None:
-            candidate_scores.setdefault(result.candidate_id, []).append(result.score)
-
-    scored_candidates: list[Candidate] = []
-    for candidate in spec.candidates:
-        scores = candidate_scores.get(candidate.id, [])
-        avg_score = sum(scores) / len(scores) if scores else 0.0
-        scored_candidates.append(candidate.model_copy(update={"score": avg_score}))
-
-    leaderboard = sorted(
-        [{"candidate_id": c.id, "score": c.score or 0.0} for c in scored_candidates],
-        key=lambda item: item["score"],
-        reverse=True,
+
+def fill_board(
+    board: ScoreBoard,
+    results: Iterable[RunResult],
+    config: EvalConfig,
+    on_result: Callable[[RunResult], None] | None = None,
+) -> bool:
+    """Add ``results`` to ``board``; return True if scoring stopped early.
+
+    With ``config.early_stop`` the stream is closed as soon as the leader's confidence
+    interval no longer overlaps any other candidate's.
+    """
+    iterator = iter(results)
+    try:
+        for result in iterator:
+            board.add(result)
+            if on_result is not None:
+                on_result(result)
+            if config.early_stop and board.leader_separated(config.early_stop_min_samples):
+                return True
+        return False
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def fill_board_from_shards(
+    board: ScoreBoard,
+    shards: Iterable[RuleShard],
+    config: EvalConfig,
+    on_shard: Callable[[RuleShard], None] | None = None,
+) -> bool:
+    """``fill_board`` for ``iter_rule_shards``; early stopping is checked once per shard."""
+    iterator = iter(shards)
+    try:
+        for shard in iterator:
+            for candidate_id, (count, total, m2) in shard.stats.items():
+                board.merge(candidate_id, count, total, m2)
+            if on_shard is not None:
+                on_shard(shard)
+            if config.early_stop and board.leader_separated(config.early_stop_min_samples):
+                return True
+        return False
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def iter_scored(
+    spec: RunSpec,
+    outputs: Iterable[RunResult] | None = None,
+    *,
+    concurrency: int | None = None,
+    judge_cache: JudgeCache | None = None,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+) -> Iterator[RunResult]:
+    """Score outputs lazily, in input order.
+
+    ``outputs`` overrides ``spec.outputs``; pass an iterator to score in constant memory.
+    Judge token usage is recorded in ``usage``, and once its budget is exhausted the remaining
+    outputs are left unscored with error ``budget_exhausted``. With ``evaluator.dedup`` on,
+    duplicate outputs are judged once through ``dedup`` (a fresh one if not given).
+    """
+    evaluator = _build_evaluator(spec.evaluator, judge_cache)
+    source = spec.outputs if outputs is None else outputs
+    return _score_with(spec, evaluator, source, concurrency, usage, _deduper(spec.evaluator, dedup))
+
+
+def _score_with(
+    spec: RunSpec,
+    evaluator: Evaluator,
+    outputs: Iterable[RunResult],
+    concurrency: int | None,
+    usage: UsageMeter | None,
+    dedup: JudgeDeduper | None,
+) -> Iterator[RunResult]:
+    tasks = ensure_task_ids(spec.tasks)
+    task_index = {t.id: t for t in tasks if t.id is not None}
+    workers = _configure_judge(spec.evaluator, concurrency)
+    if isinstance(evaluator, RuleBasedEvaluator):
+        return _score_rules(outputs, evaluator, task_index)
+    return _score_judged(
+        outputs, evaluator, task_index, workers, spec.evaluator.batch_size, usage, dedup
     )
 
-    for rank, row in enumerate(leaderboard, start=1):
-        row["rank"] = rank
 
+def _judge_calls(evaluator: Evaluator, scored: int) -> int:
+    """Requests actually sent to the judge; every scored output counts for rule-based runs."""
+    return evaluator.calls if isinstance(evaluator, LLMAsJudgeEvaluator) else scored
+
+
+def _deduper(config: EvalConfig, dedup: JudgeDeduper | None) -> JudgeDeduper | None:
+    if dedup is None and config.type == "llm_judge" and config.dedup:
+        return JudgeDeduper()
+    return dedup
+
+
+def _fill_table(
+    spec: RunSpec,
+    outputs: Iterable[RunResult] | None,
+    table: ScoreTable,
+    board: ScoreBoard,
+    *,
+    concurrency: int | None,
+    judge_cache: JudgeCache | None,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+) -> bool:
+    """Score outputs into ``table``, one row per output in input order; return whether scoring
+    stopped early.
+
+    ``board`` is only fed row by row when ``evaluator.early_stop`` needs running intervals.
+    """
+    config = spec.evaluator
+    task_index = {t.id: t for t in ensure_task_ids(spec.tasks) if t.id is not None}
+    evaluator = _build_evaluator(config, judge_cache)
+    source = spec.outputs if outputs is None else outputs
+    if isinstance(evaluator, RuleBasedEvaluator):
+        rows = _rule_rows(source, evaluator, task_index)
+    else:
+        workers = _configure_judge(config, concurrency)
+        scored = _score_judged(
+            source, evaluator, task_index, workers, config.batch_size, usage, dedup
+        )
+        rows = ((result, result.score, result.error) for result in scored)
+
+    try:
+        for output, score, error in rows:
+            table.append(output.candidate_id, output.task_id, score, error)
+            if config.early_stop and score is not None:
+                board.add_score(output.candidate_id, score)
+                if board.leader_separated(config.early_stop_min_samples):
+                    return True
+        return False
+    finally:
+        rows.close()
+
+
+def evaluate(
+    spec: RunSpec,
+    outputs: Iterable[RunResult] | None = None,
+    *,
+    concurrency: int | None = None,
+    judge_cache: JudgeCache | None = None,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+) -> EvaluateResult:
+    if usage is None and spec.evaluator.type == "llm_judge":
+        usage = UsageMeter.from_config(spec.evaluator)
+    dedup = _deduper(spec.evaluator, dedup)
+    table = ScoreTable([c.id for c in spec.candidates])
+    board = ScoreBoard(spec.candidates, confidence=spec.evaluator.confidence)
+    source = spec.outputs if outputs is None else outputs
+    stopped_early = _fill_table(
+        spec,
+        source,
+        table,
+        board,
+        concurrency=concurrency,
+        judge_cache=judge_cache,
+        usage=usage,
+        dedup=dedup,
+    )
+    if not spec.evaluator.early_stop:
+        for candidate_id, (count, total, m2) in table.group_stats().items():
+            board.merge(candidate_id, count, total, m2)
+
+    leaderboard = board.leaderboard()
     return EvaluateResult(
-        run_results=run_results, candidates=scored_candidates, leaderboard=leaderboard
+        candidates=board.scored_candidates(),
+        leaderboard=leaderboard if usage is None else usage.annotate(leaderboard),
+        table=table,
+        outputs=source if isinstance(source, Sequence) else None,
+        stopped_early=stopped_early,
+        usage=usage,
+        dedup=dedup,
     )
 
 
-def optimize(spec: RunSpec) -> OptimizeResult:
-    eval_result = evaluate(spec)
-    if not eval_result.leaderboard:
+def select_best(
+    candidates: list[Candidate], leaderboard: list[dict[str, Any]]
+) -> tuple[Candidate, str | None]:
+    """Return the top leaderboard candidate and its diff against its parent, if any."""
+    if not leaderboard:
         raise ValueError("no_candidates")
 
-    best_id = eval_result.leaderboard[0]["candidate_id"]
-    best_candidate = next(c for c in eval_result.candidates if c.id == best_id)
+    best_id = leaderboard[0]["candidate_id"]
+    best_candidate = next(c for c in candidates if c.id == best_id)
 
     diff_text: str | None = None
     if best_candidate.parent_id:
-        parent = next((c for c in eval_result.candidates if c.id == best_candidate.parent_id), None)
+        parent = next((c for c in candidates if c.id == best_candidate.parent_id), None)
         if parent is not None:
             diff_text = "\n".join(
                 difflib.unified_diff(
@@ -130,10 +807,401 @@ def optimize(spec: RunSpec) -> OptimizeResult:
                     lineterm="",
                 )
             )
+    return best_candidate, diff_text
+
+
+def race(
+    spec: RunSpec,
+    outputs: Iterable[RunResult] | None = None,
+    *,
+    concurrency: int | None = None,
+    judge_cache: JudgeCache | None = None,
+    on_result: Callable[[RunResult], None] | None = None,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+) -> RaceResult:
+    """Successive halving over precomputed outputs.
+
+    Candidates are scored on a growing, seeded-shuffled task prefix (``min_tasks`` times
+    ``eta`` per rung); after each rung only the top ``1/eta`` advance. Racing stops when one
+    candidate is left or every task has been scored. Outputs are indexed in memory.
+    """
+    config = spec.optimize_config
+    dedup = _deduper(spec.evaluator, dedup)
+    evaluator = _build_evaluator(spec.evaluator, judge_cache)
+    tasks = ensure_task_ids(spec.tasks)
+    order = [t.id for t in tasks if t.id is not None]
+    random.Random(config.seed).shuffle(order)
+
+    by_pair: dict[tuple[str, str], list[RunResult]] = {}
+    exhaustive_calls = 0
+    for output in spec.outputs if outputs is None else outputs:
+        by_pair.setdefault((output.candidate_id, output.task_id), []).append(output)
+        exhaustive_calls += 1
+
+    board = ScoreBoard(spec.candidates, confidence=spec.evaluator.confidence)
+    run_results: list[RunResult] = []
+    survivors = [c.id for c in spec.candidates]
+    reached = {candidate_id: 0 for candidate_id in survivors}
+    rungs: list[dict[str, Any]] = []
+    scored_tasks = 0
+    rung = 0
+    while True:
+        target = min(len(order), config.min_tasks * config.eta**rung)
+        batch = [
+            output
+            for task_id in order[scored_tasks:target]
+            for candidate_id in survivors
+            for output in by_pair.get((candidate_id, task_id), [])
+        ]
+        calls_before = _judge_calls(evaluator, len(run_results))
+        for result in _score_with(spec, evaluator, batch, concurrency, usage, dedup):
+            board.add(result)
+            run_results.append(result)
+            if on_result is not None:
+                on_result(result)
+        scored_tasks = target
+        rungs.append(
+            {
+                "rung": rung,
+                "tasks": target,
+                "candidates": len(survivors),
+                "judge_calls": _judge_calls(evaluator, len(run_results)) - calls_before,
+            }
+        )
+        if target >= len(order) or len(survivors) <= 1:
+            break
+        means = {c.id: c.score or 0.0 for c in board.scored_candidates()}
+        keep = max(1, math.ceil(len(survivors) / config.eta))
+        survivors = sorted(survivors, key=lambda candidate_id: means[candidate_id], reverse=True)
+        survivors = survivors[:keep]
+        rung += 1
+        for candidate_id in survivors:
+            reached[candidate_id] = rung
+        if len(survivors) == 1:
+            break
+
+    return RaceResult(
+        board=board,
+        run_results=run_results,
+        rungs=rungs,
+        reached=reached,
+        judge_calls=_judge_calls(evaluator, len(run_results)),
+        exhaustive_calls=exhaustive_calls,
+    )
+
+
+DEFAULT_MUTATION_PROMPT = (
+    "You are improving a prompt used to solve tasks.\n"
+    "CURRENT PROMPT:\n{{prompt}}\n\n"
+    "CASES WHERE IT FELL SHORT:\n{{feedback}}\n\n"
+    "Write one improved version of the prompt that fixes these weaknesses. "
+    "Return only the new prompt text."
+)
+
+
+def render_candidate(candidate: Candidate, task: Task) -> str:
+    """Build the prompt that runs ``candidate`` on ``task``.
+
+    ``{{input}}`` in the candidate is replaced by the task input; otherwise the input is appended.
+    """
+    if "{{input}}" in candidate.content:
+        return candidate.content.replace("{{input}}", task.input)
+    return f"{candidate.content}\n\n{task.input}"
+
+
+def _llm_request(config: ExecutionConfig, prompt: str) -> LLMRequest:
+    return LLMRequest(
+        prompt=prompt,
+        model=config.model or "",
+        temperature=config.temperature,
+        base_url=config.base_url,
+        api_key_env=config.api_key_env,
+        provider=config.provider or "ollama",
+    )
+
+
+# Weakest scored cases shown to the mutator.
+_FEEDBACK_CASES = 5
+
+
+def _feedback(
+    results: list[RunResult], task_index: dict[str, Task], limit: int = _FEEDBACK_CASES
+) -> str:
+    if not results:
+        return "(no scored cases yet)"
+    weakest = sorted(
+        (r for r in results if (r.score or 0.0) < 1.0 and r.task_id in task_index),
+        key=lambda r: r.score or 0.0,
+    )[:limit]
+    if not weakest:
+        return "(no failing cases observed)"
+    blocks = []
+    for result in weakest:
+        task = task_index[result.task_id]
+        blocks.append(
+            f"INPUT:\n{task.input}\nEXPECTED:\n{task.expected}\n"
+            f"OUTPUT:\n{result.output}\nSCORE: {result.score or 0.0:.2f}"
+        )
+    return "\n---\n".join(blocks)
+
+
+def refine(
+    spec: RunSpec,
+    board: ScoreBoard,
+    *,
+    rounds: int | None = None,
+    concurrency: int | None = None,
+    judge_cache: JudgeCache | None = None,
+    on_result: Callable[[RunResult], None] | None = None,
+    start: Candidate | None = None,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+    feedback: Iterable[RunResult] | None = None,
+) -> list[dict[str, Any]]:
+    """Run mutate -> execute -> judge rounds starting from ``start`` or the board's best.
+
+    Within a round, every mutation call runs in parallel and each mutant's task runs (generation
+    followed by judging) are submitted as soon as that mutant exists, so a round takes roughly
+    one mutation + generation + judge chain. New candidates are added to ``board`` with
+    ``parent_id`` set to the candidate they were derived from; each scored result is passed to
+    ``on_result``. Returns one log entry per round.
+
+    Generation, mutation and judge tokens are charged to ``usage`` under the candidate they
+    produced or scored; no new round starts once its budget is exhausted, and task runs
+    dispatched after that are left unscored with error ``budget_exhausted``. Generated
+    outputs go through ``dedup`` like precomputed ones.
+
+    ``feedback`` holds results already scored before the rounds; the start candidate's weakest
+    ones feed the first mutation prompt.
+    """
+    config = spec.optimize_config
+    dedup = _deduper(spec.evaluator, dedup)
+    rounds = config.rounds if rounds is None else rounds
+    tasks = ensure_task_ids(spec.tasks)
+    task_index = {t.id: t for t in tasks if t.id is not None}
+    evaluator = _build_evaluator(spec.evaluator, judge_cache)
+    workers = max(config.max_concurrency, _configure_judge(spec.evaluator, concurrency))
+    mutator = config.mutator or spec.execution_config
+    template = config.mutation_prompt or DEFAULT_MUTATION_PROMPT
+    rng = random.Random(config.seed)
+
+    best = start or select_best(board.scored_candidates(), board.leaderboard())[0]
+    known_ids = {c.id for c in board.candidates}
+    feedback_results: dict[str, list[RunResult]] = {}
+    if feedback is not None:
+        # Only the weakest cases are shown, so the earlier results need not all be kept.
+        feedback_results[best.id] = heapq.nsmallest(
+            _FEEDBACK_CASES,
+            (r for r in feedback if r.candidate_id == best.id and r.error is None),
+            key=lambda r: r.score or 0.0,
+        )
+    log: list[dict[str, Any]] = []
+
+    def charge(candidate_id: str, input_tokens: int, output_tokens: int) -> None:
+        if usage is not None:
+            usage.add(candidate_id, input_tokens, output_tokens)
+
+    def run_and_judge(candidate: Candidate, task: Task) -> RunResult:
+        if usage is not None and usage.exhausted:
+            return RunResult(
+                candidate_id=candidate.id,
+                task_id=task.id or "",
+                output="",
+                error="budget_exhausted",
+            )
+        request = _llm_request(spec.execution_config, render_candidate(candidate, task))
+        try:
+            with span("generate", candidate_id=candidate.id, task_id=task.id):
+                response = call_llm(request)
+        except (LLMHTTPError, OSError, http.client.HTTPException) as exc:
+            return RunResult(
+                candidate_id=candidate.id,
+                task_id=task.id or "",
+                output="",
+                score=0.0,
+                error=f"generation_failed:{exc}",
+            )
+        charge(candidate.id, response.input_tokens, response.output_tokens)
+        output = response.content
+        try:
+            if dedup is None:
+                outcome = evaluator.score(
+                    expected=task.expected, output=output, rule=task.judge_rule
+                )
+            else:
+                item = EvalItem(expected=task.expected, output=output, rule=task.judge_rule)
+                key = dedup.key(task.id or "", output)
+                outcome = dedup.score_batch([key], [item], evaluator.score_batch)[0]
+        except (LLMHTTPError, OSError, http.client.HTTPException):
+            outcome = EvalOutcome(score=0.0, error="judge_failed")
+        charge(candidate.id, outcome.input_tokens, outcome.output_tokens)
+        return RunResult(
+            candidate_id=candidate.id,
+            task_id=task.id or "",
+            output=output,
+            score=None if outcome.error else outcome.score,
+            error=outcome.error,
+        )
+
+    def mutate(parent: Candidate, prompt: str, round_number: int, index: int) -> Candidate | None:
+        try:
+            with span("mutate", parent_id=parent.id, round=round_number):
+                response = call_llm(_llm_request(mutator, prompt))
+        except (LLMHTTPError, OSError, http.client.HTTPException):
+            return None
+        content = response.content.strip()
+        candidate_id = f"{parent.id}.r{round_number}m{index}"
+        if not content or candidate_id in known_ids:
+            charge(parent.id, response.input_tokens, response.output_tokens)
+            return None
+        charge(candidate_id, response.input_tokens, response.output_tokens)
+        return Candidate(id=candidate_id, content=content, parent_id=parent.id)
+
+    for round_number in range(1, rounds + 1):
+        if usage is not None and usage.exhausted:
+            break
+        if config.samples is None or config.samples >= len(tasks):
+            sample = tasks
+        else:
+            sample = rng.sample(tasks, config.samples)
+        prompt = template.replace("{{prompt}}", best.content).replace(
+            "{{feedback}}", _feedback(feedback_results.get(best.id, []), task_index)
+        )
+        parent = best
+
+        population: dict[int, Candidate] = {0: parent}
+        runs: list[tuple[int, int, Future[RunResult]]] = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for task_number, task in enumerate(sample):
+                runs.append((0, task_number, pool.submit(run_and_judge, parent, task)))
+            mutations = {
+                pool.submit(mutate, parent, prompt, round_number, index): index
+                for index in range(1, config.mutations_per_round + 1)
+            }
+            for future in as_completed(mutations):
+                candidate = future.result()
+                if candidate is None:
+                    continue
+                index = mutations[future]
+                population[index] = candidate
+                for task_number, task in enumerate(sample):
+                    runs.append((index, task_number, pool.submit(run_and_judge, candidate, task)))
+            scored = sorted(
+                ((index, task_number, future.result()) for index, task_number, future in runs),
+                key=lambda item: item[:2],
+            )
+
+        round_results: dict[int, list[RunResult]] = {index: [] for index in population}
+        for index in sorted(population):
+            if index:
+                board.add_candidate(population[index])
+                known_ids.add(population[index].id)
+        for index, _, result in scored:
+            round_results[index].append(result)
+            board.add(result)
+            if on_result is not None:
+                on_result(result)
+
+        round_scores: dict[int, float] = {}
+        for index, results in round_results.items():
+            values = [r.score or 0.0 for r in results]
+            round_scores[index] = sum(values) / len(values) if values else 0.0
+            feedback_results[population[index].id] = results
+        winner = max(sorted(population), key=lambda index: round_scores[index])
+        best = population[winner]
+
+        log.append(
+            {
+                "round": round_number,
+                "parent_id": parent.id,
+                "mutation_prompt": prompt,
+                "task_ids": [t.id for t in sample],
+                "candidates": [
+                    {
+                        "id": population[index].id,
+                        "parent_id": population[index].parent_id,
+                        "content": population[index].content,
+                        "round_score": round_scores[index],
+                    }
+                    for index in sorted(population)
+                ],
+                "best_id": best.id,
+                "best_round_score": round_scores[winner],
+            }
+        )
+    return log
+
+
+def optimize(
+    spec: RunSpec,
+    outputs: Iterable[RunResult] | None = None,
+    *,
+    rounds: int | None = None,
+    concurrency: int | None = None,
+    judge_cache: JudgeCache | None = None,
+    usage: UsageMeter | None = None,
+    dedup: JudgeDeduper | None = None,
+) -> OptimizeResult:
+    """Score the given outputs, run ``optimize_config.rounds`` refinement rounds, pick the best."""
+    if usage is None:
+        usage = UsageMeter.from_config(spec.evaluator)
+    dedup = _deduper(spec.evaluator, dedup)
+    racing: RaceResult | None = None
+    if spec.optimize_config.selection == "successive_halving":
+        racing = race(
+            spec,
+            outputs,
+            concurrency=concurrency,
+            judge_cache=judge_cache,
+            usage=usage,
+            dedup=dedup,
+        )
+        board = racing.board
+        run_results = racing.run_results
+    else:
+        board = ScoreBoard(spec.candidates, confidence=spec.evaluator.confidence)
+        run_results = []
+        scored = iter_scored(
+            spec,
+            outputs,
+            concurrency=concurrency,
+            judge_cache=judge_cache,
+            usage=usage,
+            dedup=dedup,
+        )
+        fill_board(board, scored, spec.evaluator, run_results.append)
+
+    rounds_log: list[dict[str, Any]] = []
+    if (spec.optimize_config.rounds if rounds is None else rounds) > 0:
+        rounds_log = refine(
+            spec,
+            board,
+            rounds=rounds,
+            concurrency=concurrency,
+            judge_cache=judge_cache,
+            on_result=run_results.append,
+            start=select_best(board.scored_candidates(), racing.leaderboard())[0]
+            if racing
+            else None,
+            usage=usage,
+            dedup=dedup,
+            feedback=run_results,
+        )
+
+    candidates = board.scored_candidates()
+    leaderboard = racing.leaderboard() if racing and not rounds_log else board.leaderboard()
+    best_candidate, diff_text = select_best(candidates, leaderboard)
+    leaderboard = usage.annotate(leaderboard)
 
     return OptimizeResult(
         best_candidate=best_candidate,
-        leaderboard=eval_result.leaderboard,
+        leaderboard=leaderboard,
         diff=diff_text,
-        run_results=eval_result.run_results,
+        run_results=run_results,
+        candidates=candidates,
+        rounds=rounds_log,
+        racing=racing.summary() if racing else None,
+        usage=usage,
+        dedup=dedup,
     )
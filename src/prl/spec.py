@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Literal
+from pathlib import Path
+from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
+from .io import load_data, read_json_bytes
 from .models import Candidate, RunResult, Task
 
 
@@ -15,13 +17,91 @@ class EvalConfig(BaseModel):
     api_key_env: str | None = None
     temperature: float = 0.0
     judge_prompt: str | None = None
+    max_concurrency: int = Field(1, ge=1)
+    provider_concurrency: dict[str, int] = Field(default_factory=dict)
+    batch_size: int = Field(1, ge=1)
+    dedup: bool = True
+    stream: bool = False
+    max_reason_chars: int | None = Field(None, ge=0)
+    requests_per_minute: float | None = Field(None, gt=0)
+    tokens_per_minute: float | None = Field(None, gt=0)
+    max_retries: int = Field(5, ge=0)
+    timeout: float = Field(60.0, gt=0)
+    pool_size: int = Field(8, ge=1)
+    cache: bool = False
+    cache_max_entries: int | None = Field(None, ge=1)
+    cache_max_age_days: float | None = Field(None, gt=0)
+    confidence: float = Field(0.95, gt=0, lt=1)
+    early_stop: bool = False
+    early_stop_min_samples: int = Field(30, ge=1)
+    input_cost_per_mtok: float = Field(0.0, ge=0)
+    output_cost_per_mtok: float = Field(0.0, ge=0)
+    max_tokens_budget: int | None = Field(None, ge=1)
+    max_cost: float | None = Field(None, gt=0)
+
+
+class ExecutionConfig(BaseModel):
+    """LLM used to run candidate prompts against task inputs (YAML key ``model_config``)."""
+
+    model_config = ConfigDict(extra="allow")
+
+    provider: Literal["openai", "anthropic", "gemini", "ollama"] | None = None
+    model: str | None = None
+    base_url: str | None = None
+    api_key_env: str | None = None
+    temperature: float = 0.7
+
+
+class OptimizeConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    rounds: int = Field(0, ge=0)
+    mutations_per_round: int = Field(4, ge=1)
+    samples: int | None = Field(None, ge=1)
+    seed: int = 0
+    max_concurrency: int = Field(4, ge=1)
+    mutation_prompt: str | None = None
+    mutator: ExecutionConfig | None = None
+    selection: Literal["exhaustive", "successive_halving"] = "exhaustive"
+    eta: int = Field(2, ge=2)
+    min_tasks: int = Field(10, ge=1)
+
+
+class ShardInfo(BaseModel):
+    """Where a sub-spec written by ``prl shard`` sits in the full run."""
+
+    index: int = Field(ge=0)
+    count: int = Field(ge=1)
+    by: Literal["task", "candidate"]
 
 
 class RunSpec(BaseModel):
     version: str = "0.1"
     candidates: list[Candidate]
     tasks: list[Task]
-    outputs: list[RunResult] = Field(default_factory=list)
+    # A string is a path to externally stored outputs; it is moved to ``outputs_path`` after
+    # validation. (A "before" model validator would push JSON input off pydantic's fast path.)
+    outputs: list[RunResult] | str = Field(default_factory=list)
+    outputs_path: str | None = None
     evaluator: EvalConfig = Field(default_factory=EvalConfig)
-    execution_config: dict[str, Any] = Field(default_factory=dict, alias="model_config")
-    optimize_config: dict[str, Any] = Field(default_factory=dict)
+    execution_config: ExecutionConfig = Field(default_factory=ExecutionConfig, alias="model_config")
+    optimize_config: OptimizeConfig = Field(default_factory=OptimizeConfig)
+    shard: ShardInfo | None = None
+
+    @model_validator(mode="after")
+    def _external_outputs(self) -> RunSpec:
+        # `outputs: path/to/outputs.jsonl` (or a directory of *.jsonl) streams outputs from disk.
+        if isinstance(self.outputs, str):
+            self.outputs_path = self.outputs
+            self.outputs = []
+        return self
+
+
+def load_spec(path: Path) -> RunSpec:
+    """Load and validate a spec file.
+
+    JSON is validated straight from bytes by pydantic; YAML goes through ``load_data``.
+    """
+    if path.suffix.lower() == ".json":
+        return RunSpec.model_validate_json(read_json_bytes(path))
+    return RunSpec.model_validate(load_data(path))
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+# Offline stand-in for the provider APIs used by llm_clients, for load-testing concurrency,
+# retries and caching without Ollama or API keys.
+
+_SINGLE_JUDGE = re.compile(r"EXPECTED:\n(.*)\nOUTPUT:\n(.*)\Z", re.S)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse a latency distribution in milliseconds into a sampler returning seconds.
+
+    ``fixed:MS``, ``uniform:LOW,HIGH`` or ``lognormal:MEDIAN,SIGMA``.
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(value) for value in args.split(",")] if args else []
+    except ValueError as exc:
+        raise ValueError(f"latency_invalid:{spec}") from exc
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2 and values[0] > 0:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"latency_invalid:{spec}")
+
+
+@dataclass
+class StubConfig:
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float | None = 0.0
+    seed: int = 0
+    chunk_chars: int = 8
+    chunk_delay_ms: float = 0.0
+    reason_chars: int = 0
+
+
+def judge_reply(prompt: str, reason_chars: int = 0) -> str:
+    """Deterministic reply: exact-match judgements for judge prompts, a digest otherwise.
+
+    Single judgements put the score first and pad the reason to ``reason_chars``, like a
+    verbose judge.
+    """
+    if "ITEMS:\n" in prompt:
+        items = json.loads(prompt.split("ITEMS:\n", 1)[1])
+        return json.dumps(
+            [
+                {
+                    "id": item["id"],
+                    "score": 1.0 if item["expected"].strip() == item["output"].strip() else 0.0,
+                    "reason": "stub",
+                }
+                for item in items
+            ]
+        )
+    match = _SINGLE_JUDGE.search(prompt)
+    if match:
+        expected, output = match.groups()
+        score = 1.0 if expected.strip() == output.strip() else 0.0
+        reason = "stub" + "." * max(0, reason_chars - 4)
+        return json.dumps({"score": score, "reason": reason})
+    return f"stub-{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _usage(prompt: str, text: str) -> tuple[int, int]:
+    return max(1, len(prompt) // 4), max(1, len(text) // 4)
+
+
+def _openai(payload: dict[str, Any], text: str) -> dict[str, Any]:
+    prompt_tokens, completion_tokens = _usage(payload["messages"][-1]["content"], text)
+    return {
+        "object": "chat.completion",
+        "model": payload.get("model"),
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _anthropic(payload: dict[str, Any], text: str) -> dict[str, Any]:
+    input_tokens, output_tokens = _usage(payload["messages"][-1]["content"], text)
+    return {
+        "type": "message",
+        "role": "assistant",
+        "model": payload.get("model"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+def _gemini(payload: dict[str, Any], text: str) -> dict[str, Any]:
+    prompt_tokens, output_tokens = _usage(payload["contents"][0]["parts"][0]["text"], text)
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+    }
+
+
+def _ollama(payload: dict[str, Any], text: str) -> dict[str, Any]:
+    prompt_tokens, output_tokens = _usage(payload["messages"][-1]["content"], text)
+    return {
+        "model": payload.get("model"),
+        "message": {"role": "assistant", "content": text},
+        "done": True,
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": output_tokens,
+    }
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _sse(data: Any, event: str | None = None) -> bytes:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n".encode()
+
+
+def _openai_stream(payload: dict[str, Any], text: str, size: int) -> list[bytes]:
+    events = [
+        _sse(
+            {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": c}}]}
+        )
+        for c in _chunks(text, size)
+    ]
+    if (payload.get("stream_options") or {}).get("include_usage"):
+        events.append(_sse({"choices": [], "usage": _openai(payload, text)["usage"]}))
+    events.append(b"data: [DONE]\n\n")
+    return events
+
+
+def _anthropic_stream(payload: dict[str, Any], text: str, size: int) -> list[bytes]:
+    usage = _anthropic(payload, text)["usage"]
+    start = {"type": "message", "role": "assistant", "content": [], "usage": {**usage}}
+    start["usage"]["output_tokens"] = 1
+    events = [
+        _sse({"type": "message_start", "message": start}, "message_start"),
+        _sse(
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text"}},
+            "content_block_start",
+        ),
+    ]
+    events.extend(
+        _sse(
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": c}},
+            "content_block_delta",
+        )
+        for c in _chunks(text, size)
+    )
+    events.append(_sse({"type": "content_block_stop", "index": 0}, "content_block_stop"))
+    events.append(
+        _sse(
+            {"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]}},
+            "message_delta",
+        )
+    )
+    events.append(_sse({"type": "message_stop"}, "message_stop"))
+    return events
+
+
+def _gemini_stream(payload: dict[str, Any], text: str, size: int) -> list[bytes]:
+    usage = _gemini(payload, text)["usageMetadata"]
+    return [
+        _sse(
+            {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": c}]}}],
+                "usageMetadata": usage,
+            }
+        )
+        for c in _chunks(text, size)
+    ]
+
+
+def _ollama_stream(payload: dict[str, Any], text: str, size: int) -> list[bytes]:
+    lines = [
+        {
+            "model": payload.get("model"),
+            "message": {"role": "assistant", "content": c},
+            "done": False,
+        }
+        for c in _chunks(text, size)
+    ]
+    final = _ollama(payload, text)
+    final["message"]["content"] = ""
+    lines.append(final)
+    return [json.dumps(line).encode() + b"\n" for line in lines]
+
+
+def _route(path: str) -> tuple[str, Callable[[dict[str, Any]], str]] | None:
+    if path == "/v1/chat/completions":
+        return "openai", lambda payload: payload["messages"][-1]["content"]
+    if path == "/v1/messages":
+        return "anthropic", lambda payload: payload["messages"][-1]["content"]
+    if path.startswith("/v1beta/models/") and path.endswith(
+        (":generateContent", ":streamGenerateContent")
+    ):
+        return "gemini", lambda payload: payload["contents"][0]["parts"][0]["text"]
+    if path == "/api/chat":
+        return "ollama", lambda payload: payload["messages"][-1]["content"]
+    return None
+
+
+_RESPONSES = {"openai": _openai, "anthropic": _anthropic, "gemini": _gemini, "ollama": _ollama}
+_STREAMS = {
+    "openai": _openai_stream,
+    "anthropic": _anthropic_stream,
+    "gemini": _gemini_stream,
+    "ollama": _ollama_stream,
+}
+
+
+class StubServer:
+    """Threaded HTTP server speaking the OpenAI, Anthropic, Gemini and Ollama chat formats.
+
+    Each request sleeps for a sampled latency, then fails with 429 (``throttle_rate``) or 503
+    (``error_rate``), or answers with ``judge_reply``. Streaming requests get SSE (NDJSON for
+    Ollama) events of ``chunk_chars`` characters, ``chunk_delay_ms`` apart. ``GET /stats``
+    returns counters.
+    """
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self._sample_latency = parse_latency(self.config.latency)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats: Counter[str] = Counter()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self) -> tuple[float, float]:
+        with self._lock:
+            return self._sample_latency(self._rng), self._rng.random()
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            self.stats.update(keys)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: Any, headers: dict[str, str] | None = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, content_type: str, events: list[bytes]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                delay = server.config.chunk_delay_ms / 1000
+                try:
+                    for index, event in enumerate(events):
+                        if index and delay:
+                            time.sleep(delay)
+                        self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    server._count("streams_cut")
+                    self.close_connection = True
+
+            def do_GET(self) -> None:
+                if self.path == "/stats":
+                    with server._lock:
+                        self._send(200, dict(server.stats))
+                elif self.path == "/api/tags":
+                    self._send(200, {"models": []})
+                else:
+                    self._send(404, {"error": "not_found"})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                route = _route(self.path.split("?", 1)[0])
+                if route is None:
+                    self._send(404, {"error": "not_found"})
+                    return
+                provider, prompt_of = route
+                server._count("requests", f"requests:{provider}")
+
+                latency, roll = server._draw()
+                if latency > 0:
+                    time.sleep(latency)
+                config = server.config
+                if roll < config.throttle_rate:
+                    server._count("throttled")
+                    headers = {}
+                    if config.retry_after is not None:
+                        headers["Retry-After"] = f"{config.retry_after:g}"
+                    self._send(429, {"error": "rate_limited"}, headers)
+                    return
+                if roll < config.throttle_rate + config.error_rate:
+                    server._count("errors")
+                    self._send(503, {"error": "unavailable"})
+                    return
+
+                try:
+                    payload = json.loads(body)
+                    text = judge_reply(prompt_of(payload), config.reason_chars)
+                except (ValueError, KeyError, IndexError, TypeError):
+                    server._count("bad_requests")
+                    self._send(400, {"error": "bad_request"})
+                    return
+                server._count("ok")
+                if payload.get("stream") is True or ":streamGenerateContent" in self.path:
+                    server._count("streams")
+                    events = _STREAMS[provider](payload, text, max(1, config.chunk_chars))
+                    content_type = (
+                        "application/x-ndjson" if provider == "ollama" else "text/event-stream"
+                    )
+                    self._send_stream(content_type, events)
+                else:
+                    self._send(200, _RESPONSES[provider](payload, text))
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> StubServer:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> StubServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
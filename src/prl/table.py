@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+from array import array
+from collections.abc import Iterable
+
+from .models import RunResult
+
+try:  # optional: vectorised group-bys
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is not installed
+    np = None
+
+
+class ScoreTable:
+    """Columnar store of scored outputs.
+
+    Candidate and task ids are interned to integer codes; each row is a candidate code, a task
+    code and a float score (NaN for unscored rows), with errors kept sparsely. RunResults are
+    only rebuilt by ``results`` at the serialisation boundary.
+    """
+
+    def __init__(self, candidate_ids: Iterable[str] = (), task_ids: Iterable[str] = ()) -> None:
+        self.candidate_ids: list[str] = []
+        self.task_ids: list[str] = []
+        self._candidate_codes: dict[str, int] = {}
+        self._task_codes: dict[str, int] = {}
+        for candidate_id in candidate_ids:
+            self.candidate_code(candidate_id)
+        for task_id in task_ids:
+            self.task_code(task_id)
+        self.candidates = array("i")
+        self.tasks = array("i")
+        self.scores = array("d")
+        self.errors: dict[int, str] = {}
+
+    def candidate_code(self, candidate_id: str) -> int:
+        code = self._candidate_codes.get(candidate_id)
+        if code is None:
+            code = self._candidate_codes[candidate_id] = len(self.candidate_ids)
+            self.candidate_ids.append(candidate_id)
+        return code
+
+    def task_code(self, task_id: str) -> int:
+        code = self._task_codes.get(task_id)
+        if code is None:
+            code = self._task_codes[task_id] = len(self.task_ids)
+            self.task_ids.append(task_id)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def append(
+        self, candidate_id: str, task_id: str, score: float | None, error: str | None = None
+    ) -> None:
+        if error is not None:
+            self.errors[len(self.scores)] = error
+        self.candidates.append(self.candidate_code(candidate_id))
+        self.tasks.append(self.task_code(task_id))
+        self.scores.append(math.nan if score is None else score)
+
+    def append_result(self, result: RunResult) -> None:
+        self.append(result.candidate_id, result.task_id, result.score, result.error)
+
+    def score(self, row: int) -> float | None:
+        value = self.scores[row]
+        return None if math.isnan(value) else value
+
+    def results(self, outputs: Iterable[RunResult]) -> list[RunResult]:
+        """Rebuild scored RunResults from the unscored ``outputs`` the rows were appended for."""
+        return [
+            output.model_copy(
+                update={"score": self.score(row), "error": self.errors.get(row, output.error)}
+            )
+            for row, output in enumerate(outputs)
+        ]
+
+    def group_stats(self) -> dict[str, tuple[int, float, float]]:
+        """Per-candidate ``(count, total, m2)`` over scored rows, for ``ScoreBoard.merge``."""
+        counts, totals, m2 = self._grouped(self.candidates, len(self.candidate_ids))
+        return {
+            candidate_id: (counts[code], totals[code], m2[code])
+            for code, candidate_id in enumerate(self.candidate_ids)
+        }
+
+    def task_breakdown(self) -> dict[str, dict[str, float]]:
+        """Mean score per task and candidate, for pairs with at least one scored row."""
+        width = len(self.candidate_ids)
+        if np is not None:
+            tasks = np.frombuffer(self.tasks, dtype=np.int32).astype(np.int64)
+            pairs = tasks * width + np.frombuffer(self.candidates, dtype=np.int32)
+        else:
+            pairs = [
+                task * width + cand for task, cand in zip(self.tasks, self.candidates, strict=True)
+            ]
+        counts, totals, _ = self._grouped(pairs, len(self.task_ids) * width)
+        breakdown: dict[str, dict[str, float]] = {}
+        for pair, count in enumerate(counts):
+            if count:
+                task, cand = divmod(pair, width)
+                breakdown.setdefault(self.task_ids[task], {})[self.candidate_ids[cand]] = (
+                    totals[pair] / count
+                )
+        return breakdown
+
+    def _grouped(self, codes, groups: int) -> tuple[list[int], list[float], list[float]]:
+        if np is not None:
+            scores = np.frombuffer(self.scores, dtype=np.float64)
+            codes = np.asarray(codes, dtype=np.int64)
+            scored = ~np.isnan(scores)
+            codes, scores = codes[scored], scores[scored]
+            counts = np.bincount(codes, minlength=groups)
+            totals = np.bincount(codes, weights=scores, minlength=groups)
+            means = np.divide(totals, counts, out=np.zeros(groups), where=counts > 0)
+            m2 = np.bincount(codes, weights=(scores - means[codes]) ** 2, minlength=groups)
+            return counts.tolist(), totals.tolist(), m2.tolist()
+
+        counts = [0] * groups
+        totals = [0.0] * groups
+        for code, score in zip(codes, self.scores, strict=True):
+            if score == score:  # skip NaN
+                counts[code] += 1
+                totals[code] += score
+        means = [
+            total / count if count else 0.0 for total, count in zip(totals, counts, strict=True)
+        ]
+        m2 = [0.0] * groups
+        for code, score in zip(codes, self.scores, strict=True):
+            if score == score:
+                m2[code] += (score - means[code]) ** 2
+        return counts, totals, m2
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any
+
+
+class Span:
+    __slots__ = ("name", "attrs")
+
+    def __init__(self, name: str, attrs: dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+# Durations kept per span name for the latency percentiles.
+RESERVOIR_SIZE = 1024
+
+
+class _SpanStats:
+    """Count and total of one span name, with a uniform sample of its durations."""
+
+    __slots__ = ("count", "total_ms", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples: list[float] = []
+
+    def add(self, duration_ms: float, rng: random.Random) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(duration_ms)
+        else:
+            slot = rng.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = duration_ms
+
+
+class Tracer:
+    """Collects timed spans from any thread.
+
+    Spans nest by time on the thread that opened them, which is how Chrome/Perfetto draws
+    complete (``ph: X``) events. Events are held in memory until ``open`` names a trace
+    file; from then on each event is written as it ends and ``close`` completes the file.
+    The latency summary comes from per-name counts and a bounded sample of durations, so a
+    streaming tracer's memory does not grow with the number of spans.
+    """
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._threads: dict[int, str] = {}
+        self._stats: dict[str, _SpanStats] = {}
+        self._rng = random.Random(0)
+        self._file: IO[str] | None = None
+        self._written = 0
+
+    def open(self, path: Path) -> None:
+        """Write the events so far to ``path`` and stream later ones there."""
+        with self._lock:
+            self._file = path.open("w", encoding="utf-8")
+            self._file.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+            events, self._events = self._events, []
+            for event in events:
+                self._write_event(event)
+
+    def _write_event(self, event: dict[str, Any]) -> None:
+        assert self._file is not None
+        if self._written:
+            self._file.write(",\n")
+        self._file.write(json.dumps(event, default=str))
+        self._written += 1
+
+    def close(self) -> None:
+        """Finish the trace file with the thread names; a no-op unless ``open`` was called."""
+        with self._lock:
+            if self._file is None:
+                return
+            for event in self._metadata():
+                self._write_event(event)
+            self._file.write("\n]}\n")
+            self._file.close()
+            self._file = None
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        current = Span(name, attrs)
+        with self._lock:
+            # Registered on entry so the summary lists names in the order spans start.
+            stats = self._stats.setdefault(name, _SpanStats())
+        start = time.perf_counter_ns()
+        try:
+            yield current
+        except BaseException as exc:
+            current.attrs.setdefault("error", type(exc).__name__)
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            thread = threading.current_thread()
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": self._pid,
+                "tid": thread.ident,
+                "args": current.attrs,
+            }
+            with self._lock:
+                stats.add((end - start) / 1_000_000, self._rng)
+                self._threads.setdefault(thread.ident, thread.name)
+                if self._file is None:
+                    self._events.append(event)
+                else:
+                    self._write_event(event)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Per-span-name count, total and p50/p95/p99 latency in milliseconds.
+
+        Percentiles are exact up to ``RESERVOIR_SIZE`` spans of a name and estimated from a
+        uniform sample beyond that.
+        """
+        with self._lock:
+            stats = {
+                name: (entry.count, entry.total_ms, list(entry.samples))
+                for name, entry in self._stats.items()
+                if entry.count
+            }
+        return {
+            name: {
+                "count": count,
+                "total_ms": total_ms,
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+            }
+            for name, (count, total_ms, samples) in stats.items()
+        }
+
+    def _metadata(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in self._threads.items()
+        ]
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """The events held in memory, i.e. all of them unless ``open`` was called."""
+        with self._lock:
+            events = list(self._events)
+            metadata = self._metadata()
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+_active: Tracer | None = None
+
+
+@contextmanager
+def tracing() -> Iterator[Tracer]:
+    """Install a fresh tracer that ``span`` records into until the block exits.
+
+    A trace file opened on the tracer is completed on exit, even when the block raises.
+    """
+    global _active
+    tracer = Tracer()
+    previous, _active = _active, tracer
+    try:
+        yield tracer
+    finally:
+        _active = previous
+        tracer.close()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a block under the active tracer; a no-op span when tracing is off."""
+    tracer = _active
+    if tracer is None:
+        yield Span(name, attrs)
+        return
+    with tracer.span(name, **attrs) as current:
+        yield current
+
+
+def summary_table(summary: dict[str, dict[str, float]]) -> str:
+    """Render ``Tracer.summary()`` as a markdown table for reports."""
+    lines = ["| Stage | Count | p50 ms | p95 ms | p99 ms |", "|---|---:|---:|---:|---:|"]
+    for name, row in summary.items():
+        lines.append(
+            f"| {name} | {row['count']} | {row['p50_ms']:.2f} | {row['p95_ms']:.2f} "
+            f"| {row['p99_ms']:.2f} |"
+        )
+    return "\n".join(lines)
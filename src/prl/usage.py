@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .spec import EvalConfig
+
+
+class UsageMeter:
+    """Thread-safe token and cost totals per candidate, with an optional hard budget.
+
+    Cost uses per-million-token prices. Once ``max_tokens`` or ``max_cost`` is reached,
+    ``exhausted`` turns true and callers stop dispatching new LLM calls; calls already in
+    flight still complete and are counted.
+    """
+
+    def __init__(
+        self,
+        *,
+        input_cost_per_mtok: float = 0.0,
+        output_cost_per_mtok: float = 0.0,
+        max_tokens: int | None = None,
+        max_cost: float | None = None,
+    ) -> None:
+        self.input_cost_per_mtok = input_cost_per_mtok
+        self.output_cost_per_mtok = output_cost_per_mtok
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self._lock = threading.Lock()
+        self._by_candidate: dict[str, list[int]] = {}
+        self._input_tokens = 0
+        self._output_tokens = 0
+
+    @classmethod
+    def from_config(cls, config: EvalConfig) -> UsageMeter:
+        return cls(
+            input_cost_per_mtok=config.input_cost_per_mtok,
+            output_cost_per_mtok=config.output_cost_per_mtok,
+            max_tokens=config.max_tokens_budget,
+            max_cost=config.max_cost,
+        )
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        return (
+            input_tokens * self.input_cost_per_mtok + output_tokens * self.output_cost_per_mtok
+        ) / 1_000_000
+
+    def add(self, candidate_id: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            counts = self._by_candidate.setdefault(candidate_id, [0, 0])
+            counts[0] += input_tokens
+            counts[1] += output_tokens
+            self._input_tokens += input_tokens
+            self._output_tokens += output_tokens
+
+    @property
+    def exhausted(self) -> bool:
+        with self._lock:
+            spent = self._input_tokens + self._output_tokens
+            cost = self.cost(self._input_tokens, self._output_tokens)
+        if self.max_tokens is not None and spent >= self.max_tokens:
+            return True
+        return self.max_cost is not None and cost >= self.max_cost
+
+    def _row(self, input_tokens: int, output_tokens: int) -> dict[str, Any]:
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "cost": self.cost(input_tokens, output_tokens),
+        }
+
+    def totals(self) -> dict[str, Any]:
+        with self._lock:
+            row = self._row(self._input_tokens, self._output_tokens)
+        row["max_tokens_budget"] = self.max_tokens
+        row["max_cost"] = self.max_cost
+        row["exhausted"] = self.exhausted
+        return row
+
+    def partials(self) -> dict[str, tuple[int, int]]:
+        """Per-candidate ``(input_tokens, output_tokens)``, for merging shard runs."""
+        with self._lock:
+            return {cid: (values[0], values[1]) for cid, values in self._by_candidate.items()}
+
+    def by_candidate(self) -> dict[str, dict[str, Any]]:
+        return {cid: self._row(*values) for cid, values in self.partials().items()}
+
+    def annotate(self, leaderboard: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Copy ``leaderboard`` with each row's token counts and cost added."""
+        by_candidate = self.by_candidate()
+        empty = self._row(0, 0)
+        return [{**row, **by_candidate.get(row["candidate_id"], empty)} for row in leaderboard]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from .models import RunResult, Task
+from .spec import RunSpec
+
+
+def ensure_task_ids(tasks: list[Task]) -> list[Task]:
+    normalized: list[Task] = []
+    for index, task in enumerate(tasks, start=1):
+        if task.id is None:
+            normalized.append(task.model_copy(update={"id": f"t{index}"}))
+        else:
+            normalized.append(task)
+    return normalized
+
+
+def validate_spec(
+    spec: RunSpec, outputs: Iterable[RunResult] | None = None, *, rounds: int | None = None
+) -> list[str]:
+    """Check the evaluator config and that every output references a known candidate/task.
+
+    ``outputs`` overrides ``spec.outputs`` so externally stored outputs can be streamed;
+    ``rounds`` overrides ``optimize_config.rounds`` when checking the execution model.
+    """
+    errors: list[str] = []
+    candidate_ids = {c.id for c in spec.candidates}
+    task_ids = {t.id for t in ensure_task_ids(spec.tasks)}
+
+    if spec.evaluator.type not in {"rule_based", "llm_judge"}:
+        errors.append(f"evaluator_unknown:{spec.evaluator.type}")
+    if spec.evaluator.type == "llm_judge":
+        if not spec.evaluator.provider:
+            errors.append("evaluator_provider_missing")
+        if not spec.evaluator.model:
+            errors.append("evaluator_model_missing")
+        if spec.evaluator.provider != "ollama" and not spec.evaluator.api_key_env:
+            errors.append("evaluator_api_key_env_missing")
+
+    rounds = spec.optimize_config.rounds if rounds is None else rounds
+    if rounds > 0:
+        execution = spec.execution_config
+        if not execution.provider:
+            errors.append("execution_provider_missing")
+        if not execution.model:
+            errors.append("execution_model_missing")
+        if execution.provider not in (None, "ollama") and not execution.api_key_env:
+            errors.append("execution_api_key_env_missing")
+
+    for output in spec.outputs if outputs is None else outputs:
+        if output.candidate_id not in candidate_ids:
+            errors.append(f"output_candidate_missing:{output.candidate_id}")
+        if output.task_id not in task_ids:
+            errors.append(f"output_task_missing:{output.task_id}")
+    return errors
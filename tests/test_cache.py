@@ -0,0 +1,74 @@
+import json
+
+from prl.cache import JudgeCache
+from prl.evaluators import EvalItem, EvalOutcome, LLMAsJudgeEvaluator
+from prl.llm_clients import LLMResponse
+
+
+def test_judge_cache_skips_repeat_calls(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call_llm(request):
+        calls.append(request)
+        return LLMResponse(json.dumps({"score": 0.75, "reason": "close"}))
+
+    monkeypatch.setattr("prl.evaluators.call_llm", fake_call_llm)
+    cache = JudgeCache(tmp_path / "judge.sqlite")
+    evaluator = LLMAsJudgeEvaluator(
+        provider="ollama",
+        model="m",
+        base_url=None,
+        api_key_env=None,
+        temperature=0.0,
+        judge_prompt=None,
+        cache=cache,
+    )
+
+    first = evaluator.score(expected="a", output="b", rule="exact")
+    second = evaluator.score(expected="a", output="b", rule="exact")
+    evaluator.score(expected="a", output="c", rule="exact")
+
+    assert first == second == EvalOutcome(score=0.75, reason="close")
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_judge_cache_evicts_by_size_and_age(tmp_path):
+    cache = JudgeCache(tmp_path / "judge.sqlite", max_entries=2)
+    for index in range(4):
+        cache.put(f"k{index}", EvalOutcome(score=1.0))
+    assert cache.evict() == 2
+    assert len(cache) == 2
+    assert cache.get("k3") is not None
+
+    cache.max_age_seconds = 0.0
+    cache.evict()
+    assert len(cache) == 0
+
+
+def test_batch_judgements_are_cached_apart_from_single_ones(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call_llm(request):
+        calls.append(request)
+        if "ITEMS:" in request.prompt:
+            return LLMResponse(json.dumps([{"id": 1, "score": 1.0}, {"id": 2, "score": 0.0}]))
+        return LLMResponse(json.dumps({"score": 0.5}))
+
+    monkeypatch.setattr("prl.evaluators.call_llm", fake_call_llm)
+    evaluator = LLMAsJudgeEvaluator(
+        provider="ollama",
+        model="m",
+        base_url=None,
+        api_key_env=None,
+        temperature=0.0,
+        judge_prompt=None,
+        cache=JudgeCache(tmp_path / "judge.sqlite"),
+    )
+    items = [EvalItem(expected="a", output="a", rule="j"), EvalItem("a", "b", "j")]
+
+    assert [o.score for o in evaluator.score_batch(items)] == [1.0, 0.0]
+    assert evaluator.score(expected="a", output="a", rule="j").score == 0.5
+    assert [o.score for o in evaluator.score_batch(items)] == [1.0, 0.0]
+    assert len(calls) == 2
@@ -0,0 +1,394 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+from typer.testing import CliRunner
+
+from prl.baseline import spec_fingerprints
+from prl.cli import app
+from prl.evaluators import LLMAsJudgeEvaluator, RuleBasedEvaluator
+from prl.io import read_columns
+from prl.spec import load_spec
+from prl.stub_server import StubServer
+
+runner = CliRunner()
+
+
+def _write_spec(tmp_path, outputs):
+    spec = {
+        "candidates": [{"id": "c1", "content": "x"}, {"id": "c2", "content": "y"}],
+        "tasks": [
+            {"id": f"t{i}", "input": "q", "expected": str(i), "judge_rule": "exact"}
+            for i in range(3)
+        ],
+        "outputs": outputs,
+    }
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return path
+
+
+def _records():
+    return [
+        {"candidate_id": c, "task_id": f"t{i}", "output": str(i) if c == "c2" else "x"}
+        for c in ("c1", "c2")
+        for i in range(3)
+    ]
+
+
+def test_evaluate_streams_external_jsonl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "outputs").mkdir()
+    lines = [json.dumps(record) for record in _records()]
+    (tmp_path / "outputs" / "part1.jsonl").write_text("\n".join(lines[:3]), encoding="utf-8")
+    (tmp_path / "outputs" / "part2.jsonl").write_text("\n".join(lines[3:]), encoding="utf-8")
+    streamed = runner.invoke(app, ["evaluate", str(_write_spec(tmp_path, "outputs"))])
+    inline = runner.invoke(app, ["evaluate", str(_write_spec(tmp_path, _records()))])
+    assert streamed.exit_code == 0, streamed.output
+    assert inline.exit_code == 0, inline.output
+
+    streamed_dir = Path(streamed.output.strip())
+    inline_dir = Path(inline.output.strip())
+    for name in ("results.jsonl", "leaderboard.json"):
+        assert (streamed_dir / name).read_text() == (inline_dir / name).read_text()
+    leaderboard = json.loads((streamed_dir / "leaderboard.json").read_text())
+    assert leaderboard[0]["candidate_id"] == "c2"
+    assert leaderboard[0]["score"] == 1.0
+
+
+def test_validate_reports_missing_outputs_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ["validate", str(_write_spec(tmp_path, "missing.jsonl"))])
+    assert result.exit_code == 1
+    assert "outputs_path_missing" in result.output
+
+
+def test_evaluate_resume_scores_only_missing_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = str(_write_spec(tmp_path, _records()))
+    full = runner.invoke(app, ["evaluate", config])
+    full_dir = Path(full.output.strip())
+
+    partial_dir = tmp_path / "partial"
+    partial_dir.mkdir()
+    lines = (full_dir / "results.jsonl").read_text().splitlines(keepends=True)
+    (partial_dir / "results.jsonl").write_text("".join(lines[:2]) + lines[2][:10])
+
+    scored = []
+    original = RuleBasedEvaluator.compile
+
+    def counting_compile(self, rule, *, expected):
+        scorer = original(self, rule, expected=expected)
+        return lambda output: scored.append(output) or scorer(output)
+
+    monkeypatch.setattr(RuleBasedEvaluator, "compile", counting_compile)
+    resumed = runner.invoke(app, ["evaluate", config, "--resume", str(partial_dir)])
+
+    assert resumed.exit_code == 0, resumed.output
+    assert len(scored) == len(lines) - 2
+    for name in ("results.jsonl", "leaderboard.json"):
+        assert (partial_dir / name).read_text() == (full_dir / name).read_text()
+
+
+def test_evaluate_workers_match_single_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lines = [json.dumps(record) for record in _records() * 50]
+    (tmp_path / "outputs.jsonl").write_text("\n".join(lines), encoding="utf-8")
+    config = str(_write_spec(tmp_path, "outputs.jsonl"))
+
+    single = runner.invoke(app, ["evaluate", config])
+    sharded = runner.invoke(app, ["evaluate", config, "--workers", "2"])
+    assert single.exit_code == 0, single.output
+    assert sharded.exit_code == 0, sharded.output
+
+    single_dir = Path(single.output.strip())
+    sharded_dir = Path(sharded.output.strip())
+    for name in ("results.jsonl", "leaderboard.json"):
+        assert (sharded_dir / name).read_text() == (single_dir / name).read_text()
+
+
+def test_evaluate_workers_require_rule_based(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = _write_spec(tmp_path, _records())
+    spec = json.loads(path.read_text())
+    spec["evaluator"] = {"type": "llm_judge", "provider": "ollama", "model": "m"}
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    result = runner.invoke(app, ["evaluate", str(path), "--workers", "2"])
+    assert result.exit_code == 1
+    assert "workers_unsupported:llm_judge" in result.output
+
+
+def test_shard_and_merge_match_single_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = str(_write_spec(tmp_path, _records() * 3))
+    single = runner.invoke(app, ["evaluate", config])
+    single_dir = Path(single.output.strip())
+
+    for by, shards in (("task", 3), ("candidate", 2)):
+        out = tmp_path / f"by-{by}"
+        split = runner.invoke(
+            app, ["shard", config, "--shards", str(shards), "--by", by, "--out", str(out)]
+        )
+        assert split.exit_code == 0, split.output
+        specs = split.output.split()
+        assert len(specs) == shards
+
+        run_dirs = []
+        for sub_spec in reversed(specs):
+            result = runner.invoke(app, ["evaluate", sub_spec])
+            assert result.exit_code == 0, result.output
+            run_dirs.append(result.output.strip())
+
+        merged = runner.invoke(app, ["merge", *run_dirs])
+        assert merged.exit_code == 0, merged.output
+        merged_dir = Path(merged.output.strip())
+        assert (merged_dir / "leaderboard.json").read_text() == (
+            single_dir / "leaderboard.json"
+        ).read_text()
+        assert sorted((merged_dir / "results.jsonl").read_text().splitlines()) == sorted(
+            (single_dir / "results.jsonl").read_text().splitlines()
+        )
+
+        incomplete = runner.invoke(app, ["merge", *run_dirs[1:]])
+        assert incomplete.exit_code == 1
+        assert "shard_missing" in incomplete.output
+
+
+def test_validate_loads_json_and_yaml_specs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yaml_path = tmp_path / "spec.yaml"
+    yaml_path.write_text(yaml.safe_dump(json.loads(_write_spec(tmp_path, _records()).read_text())))
+    json_path = _write_spec(tmp_path, "outputs.jsonl")
+    (tmp_path / "outputs.jsonl").write_text(
+        "\n".join(json.dumps(record) for record in _records()), encoding="utf-8"
+    )
+    json_path.write_bytes(b"\xef\xbb\xbf" + json_path.read_bytes())
+
+    for path in (json_path, yaml_path):
+        result = runner.invoke(app, ["validate", str(path)])
+        assert result.exit_code == 0, result.output
+        assert result.output.startswith("ok (Loaded ")
+
+
+def test_evaluate_writes_columnar_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = str(_write_spec(tmp_path, _records()))
+    plain = Path(runner.invoke(app, ["evaluate", config]).output.strip())
+    result = runner.invoke(app, ["evaluate", config, "--format", "columnar"])
+    assert result.exit_code == 0, result.output
+
+    run_dir = Path(result.output.strip())
+    assert not (run_dir / "results.jsonl").exists()
+    assert read_columns(run_dir / "results.prlc") == read_columns(plain / "results.jsonl")
+
+    unknown = runner.invoke(app, ["evaluate", config, "--format", "csv"])
+    assert unknown.exit_code == 1
+    assert "format_unknown:csv" in unknown.output
+
+
+def test_evaluate_writes_parquet_results(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.chdir(tmp_path)
+    config = str(_write_spec(tmp_path, _records()))
+    plain = Path(runner.invoke(app, ["evaluate", config]).output.strip())
+    result = runner.invoke(app, ["evaluate", config, "--format", "parquet"])
+    assert result.exit_code == 0, result.output
+    run_dir = Path(result.output.strip())
+    assert read_columns(run_dir / "results.parquet") == read_columns(plain / "results.jsonl")
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    missing = runner.invoke(app, ["evaluate", config, "--format", "parquet"])
+    assert missing.exit_code == 1
+    assert "format_unavailable:parquet" in missing.output
+    assert "promptrefinelab[parquet]" in missing.output
+
+
+def test_bench_reports_stage_timings(tmp_path):
+    out = tmp_path / "bench.json"
+    result = runner.invoke(
+        app,
+        [
+            *("bench", "--candidates", "3", "--tasks", "20", "--repeat", "2"),
+            *("--chunk-size", "1", "--out", str(out)),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(out.read_text())
+    assert report["params"]["outputs"] == 60
+    assert set(report["stages"]) == {"load", "validate", "evaluate", "optimize", "report"}
+    for stage in report["stages"].values():
+        assert stage["samples"] == 120
+        assert stage["p50_seconds"] <= stage["p99_seconds"] <= stage["max_seconds"]
+        assert stage["ops_per_sec"] > 0 and "rss_delta_mb" in stage
+    assert report["leader"] == "c2"
+
+    bad = runner.invoke(app, ["bench", "--rule-mix", "fuzzy=1"])
+    assert bad.exit_code == 1
+    assert "rule_mix_unknown:fuzzy" in bad.output
+
+
+def test_evaluate_reports_usage_and_stops_at_budget(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STUB_API_KEY", "stub")
+    with StubServer() as server:
+        path = _write_spec(tmp_path, _records())
+        spec = json.loads(path.read_text())
+        spec["evaluator"] = {
+            "type": "llm_judge",
+            "provider": "openai",
+            "model": "stub",
+            "base_url": server.url,
+            "api_key_env": "STUB_API_KEY",
+            "input_cost_per_mtok": 1000.0,
+            "output_cost_per_mtok": 2000.0,
+        }
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        full = runner.invoke(app, ["evaluate", str(path)])
+        spec["evaluator"]["max_cost"] = 0.1
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        capped = runner.invoke(app, ["evaluate", str(path)])
+        capped_dir = Path(capped.output.strip())
+        before = (capped_dir / "results.jsonl").read_text()
+        # The resumed run starts from the tokens already spent, so nothing more is judged.
+        again = runner.invoke(app, ["evaluate", str(path), "--resume", str(capped_dir)])
+        assert again.exit_code == 0, again.output
+        assert sorted((capped_dir / "results.jsonl").read_text().splitlines()) == sorted(
+            before.splitlines()
+        )
+        spec["evaluator"]["max_cost"] = None
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        lifted = runner.invoke(app, ["evaluate", str(path), "--resume", str(capped_dir)])
+        assert lifted.exit_code == 0, lifted.output
+    assert full.exit_code == 0, full.output
+    assert capped.exit_code == 0, capped.output
+
+    full_dir = Path(full.output.strip())
+    leaderboard = json.loads((full_dir / "leaderboard.json").read_text())
+    row = leaderboard[0]
+    assert row["input_tokens"] > 0 and row["output_tokens"] > 0
+    assert row["cost"] == (row["input_tokens"] * 1000 + row["output_tokens"] * 2000) / 1e6
+    assert "## Usage" in (full_dir / "report.md").read_text()
+    assert json.loads((full_dir / "dedup_stats.json").read_text())["judged"] == 6
+
+    results = [json.loads(line) for line in before.splitlines()]
+    skipped = [r for r in results if r["error"] == "budget_exhausted"]
+    assert 0 < len(skipped) < len(results)
+    assert all(r["score"] is None for r in skipped)
+
+    resumed = [json.loads(line) for line in (capped_dir / "results.jsonl").read_text().splitlines()]
+    assert len(resumed) == len(results)
+    assert not any(r["error"] for r in resumed)
+    assert json.loads((capped_dir / "leaderboard.json").read_text())[0]["cost"] == row["cost"]
+
+
+def test_resuming_an_interrupted_run_counts_its_checkpointed_tokens(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    original = LLMAsJudgeEvaluator._call
+
+    def crash_on_fourth_call(self, request, **kwargs):
+        if self.calls == 3:
+            raise RuntimeError("killed")
+        return original(self, request, **kwargs)
+
+    with StubServer() as server:
+        path = _write_spec(tmp_path, _records())
+        spec = json.loads(path.read_text())
+        spec["evaluator"] = {
+            "type": "llm_judge",
+            "provider": "ollama",
+            "model": "stub",
+            "base_url": server.url,
+            "cache": False,
+        }
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        monkeypatch.setattr(LLMAsJudgeEvaluator, "_call", crash_on_fourth_call)
+        crashed = runner.invoke(app, ["evaluate", str(path)])
+        monkeypatch.setattr(LLMAsJudgeEvaluator, "_call", original)
+        assert crashed.exit_code != 0
+        (run_dir,) = (tmp_path / ".prl" / "runs").iterdir()
+        assert not (run_dir / "aggregates.json").exists()
+        (run_dir / "results.jsonl").write_text(
+            (run_dir / "results.jsonl").read_text() + '{"candidate_id": "c2", "ta'
+        )
+        spent = json.loads((run_dir / "usage.json").read_text())["partials"]
+        tokens = sum(t["input_tokens"] + t["output_tokens"] for t in spent.values())
+        assert tokens > 0
+
+        spec["evaluator"]["max_tokens_budget"] = tokens
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        before = server.stats["requests"]
+        resumed = runner.invoke(app, ["evaluate", str(path), "--resume", str(run_dir)])
+        assert resumed.exit_code == 0, resumed.output
+        assert server.stats["requests"] == before
+
+    results = [json.loads(line) for line in (run_dir / "results.jsonl").read_text().splitlines()]
+    assert [r["error"] for r in results] == [None] * 3 + ["budget_exhausted"] * 3
+
+
+def test_evaluate_baseline_rejudges_only_changed_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STUB_API_KEY", "stub")
+    with StubServer() as server:
+        path = _write_spec(tmp_path, _records())
+        spec = json.loads(path.read_text())
+        spec["evaluator"] = {
+            "type": "llm_judge",
+            "provider": "openai",
+            "model": "stub",
+            "base_url": server.url,
+            "api_key_env": "STUB_API_KEY",
+        }
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        first = runner.invoke(app, ["evaluate", str(path)])
+        assert first.exit_code == 0, first.output
+        baseline_dir = first.output.strip()
+
+        spec["candidates"][1]["content"] = "y2"
+        spec["outputs"][0]["output"] = "zero"
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        before = server.stats["requests"]
+        second = runner.invoke(app, ["evaluate", str(path), "--baseline", baseline_dir])
+        judged = server.stats["requests"] - before
+        fresh = runner.invoke(app, ["evaluate", str(path)])
+    assert second.exit_code == 0, second.output
+    assert judged == 4
+
+    run_dir = Path(second.output.strip())
+    summary = json.loads((run_dir / "baseline.json").read_text())
+    assert summary["changed_candidates"] == ["c2"]
+    assert summary["reused"] == [["c1", "t1"], ["c1", "t2"]]
+    assert summary["recomputed"] == [["c1", "t0"], ["c2", "t0"], ["c2", "t1"], ["c2", "t2"]]
+    report = (run_dir / "report.md").read_text()
+    assert "Reused 2 of 6 scores" in report
+    assert "| c2 | 0 | 3 |" in report
+    leaderboard = json.loads((run_dir / "leaderboard.json").read_text())
+    expected = json.loads((Path(fresh.output.strip()) / "leaderboard.json").read_text())
+    assert [(r["candidate_id"], r["score"]) for r in leaderboard] == [
+        (r["candidate_id"], r["score"]) for r in expected
+    ]
+
+    missing = runner.invoke(app, ["evaluate", str(path), "--baseline", str(tmp_path)])
+    assert missing.exit_code == 1
+    assert "baseline_aggregates_missing" in missing.output
+
+
+def test_baseline_report_caps_recomputed_entries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = _write_spec(tmp_path, _records() * 5)
+    first = runner.invoke(app, ["evaluate", str(path)])
+    spec = json.loads(path.read_text())
+    spec["candidates"] = [{"id": "c1", "content": "x2"}, {"id": "c2", "content": "y2"}]
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    second = runner.invoke(app, ["evaluate", str(path), "--baseline", first.output.strip()])
+    assert second.exit_code == 0, second.output
+
+    report = (Path(second.output.strip()) / "report.md").read_text()
+    assert report.count("\n- c") == 20
+    assert "- … 10 more" in report
+
+    fingerprints = spec_fingerprints(load_spec(path))
+    spec["evaluator"] = {"base_url": "http://localhost:1"}
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    assert spec_fingerprints(load_spec(path))["evaluator"] != fingerprints["evaluator"]
@@ -1,4 +1,7 @@
-from prl.evaluators import RuleBasedEvaluator
+import json
+
+from prl.evaluators import EvalItem, JudgeStreamParser, LLMAsJudgeEvaluator, RuleBasedEvaluator
+from prl.llm_clients import LLMResponse
 
 
 def test_rule_based_exact():
@@ -19,3 +22,65 @@ def test_rule_based_numeric():
     evaluator = RuleBasedEvaluator()
     outcome = evaluator.score(expected="", output="5", rule={"type": "numeric", "min": 3, "max": 7})
     assert outcome.score == 1.0
+
+
+def test_llm_judge_batch_falls_back_for_missing_items(monkeypatch):
+    prompts = []
+
+    def fake_call_llm(request):
+        prompts.append(request.prompt)
+        if "ITEMS:" in request.prompt:
+            entries = [{"id": 1, "score": 1.0, "reason": "ok"}, {"id": 3, "score": "?"}]
+            return LLMResponse(json.dumps(entries), input_tokens=30, output_tokens=9)
+        return LLMResponse(json.dumps({"score": 0.5, "reason": "single"}), 5, 1)
+
+    monkeypatch.setattr("prl.evaluators.call_llm", fake_call_llm)
+    evaluator = LLMAsJudgeEvaluator(
+        provider="ollama",
+        model="m",
+        base_url=None,
+        api_key_env=None,
+        temperature=0.0,
+        judge_prompt=None,
+    )
+    items = [EvalItem(expected="a", output=o, rule="exact") for o in ("a", "b", "c")]
+    outcomes = evaluator.score_batch(items)
+
+    assert [o.score for o in outcomes] == [1.0, 0.5, 0.5]
+    # The batch's tokens are split three ways; the two re-judged items add their own calls.
+    assert [(o.input_tokens, o.output_tokens) for o in outcomes] == [(10, 3), (15, 4), (15, 4)]
+    assert len(prompts) == 3
+    assert '"id": 2' in prompts[0]
+
+
+def test_rule_based_score_many_matches_score():
+    evaluator = RuleBasedEvaluator()
+    rules = [
+        "exact",
+        {"type": "regex", "pattern": "^4"},
+        {"type": "numeric", "min": 3},
+        {"type": "numeric", "max": "4.5"},
+        {"type": "bogus"},
+    ]
+    outputs = ["4", "42", "x", "5.0", "3"]
+    for rule in rules:
+        many = evaluator.score_many(expected="4", outputs=outputs, rule=rule)
+        single = [evaluator.score(expected="4", output=o, rule=rule) for o in outputs]
+        assert many == single
+
+
+def test_judge_stream_parser_handles_split_chunks():
+    reply = '```json\n{"reason": "has \\"quotes\\", {braces}", "score": "0.5"}\n```'
+    parser = JudgeStreamParser(max_reason_chars=0)
+    assert not any(parser.feed(reply[i : i + 3]) for i in range(0, 40, 3))
+    assert parser.feed(reply[40:]) and parser.outcome().score == 0.5
+
+    parser = JudgeStreamParser(max_reason_chars=5)
+    assert parser.feed('{"score": 1.2, "reason": "abcdefgh')
+    assert (parser.outcome().score, parser.outcome().reason) == (1.0, "abcde")
+    assert parser.truncated
+
+    parser = JudgeStreamParser()
+    assert not parser.feed('{"score": 0.25, "reason": "ok"} trailing')
+    assert parser.complete and parser.outcome().reason == "ok"
+    assert not parser.truncated
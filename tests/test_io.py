@@ -1,4 +1,18 @@
-from prl.io import read_text_any
+import zipfile
+
+import pytest
+
+from prl.io import (
+    ColumnarWriter,
+    JsonlWriter,
+    ParquetWriter,
+    _is_utf8,
+    iter_jsonl_lines,
+    iter_results,
+    read_columns,
+    read_json_bytes,
+    read_text_any,
+)
 
 
 def test_read_text_any_shift_jis(tmp_path):
@@ -6,3 +20,75 @@ def test_read_text_any_shift_jis(tmp_path):
     path = tmp_path / "sample.txt"
     path.write_bytes(content.encode("shift_jis"))
     assert read_text_any(path) == content
+
+
+def test_jsonl_writer_flushes_periodically(tmp_path):
+    path = tmp_path / "results.jsonl"
+    writer = JsonlWriter(path, flush_every=2, flush_seconds=3600)
+    writer.write({"n": 1})
+    assert path.read_text() == ""
+    writer.write({"n": "二"})
+    assert path.read_text(encoding="utf-8") == '{"n": 1}\n{"n": "二"}\n'
+    writer.close()
+
+
+def test_iter_jsonl_lines_reads_directory_in_order(tmp_path):
+    (tmp_path / "b.jsonl").write_text('{"n": 2}\n\n', encoding="utf-8")
+    (tmp_path / "a.jsonl").write_text('{"n": 1}\n', encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+    lines = [(file.name, number, line.strip()) for file, number, line in iter_jsonl_lines(tmp_path)]
+    assert lines == [("a.jsonl", 1, '{"n": 1}'), ("b.jsonl", 1, '{"n": 2}')]
+
+
+def test_read_json_bytes_strips_bom_and_reencodes(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_bytes(b"\xef\xbb\xbf" + '{"a": "二"}'.encode())
+    assert read_json_bytes(path) == '{"a": "二"}'.encode()
+    path.write_bytes('{"a": "こんにちは"}'.encode("shift_jis"))
+    assert read_json_bytes(path) == '{"a": "こんにちは"}'.encode()
+
+
+def test_utf8_check_handles_characters_split_across_chunks():
+    data = ("a" + "二" * 10).encode()
+    assert _is_utf8(data, chunk_size=2)
+    assert not _is_utf8(data[:-1], chunk_size=2)
+    assert not _is_utf8("こんにちは".encode("shift_jis"), chunk_size=3)
+
+
+def _result_records():
+    return [
+        {"candidate_id": "c1", "task_id": "t1", "output": "答え", "score": 1.0, "error": None},
+        {"candidate_id": "c2", "task_id": "t1", "output": "", "score": None, "error": "boom"},
+        {"candidate_id": "c1", "task_id": "t2", "output": "x" * 10, "score": 0.5, "error": None},
+    ]
+
+
+def test_columnar_results_read_only_requested_columns(tmp_path, monkeypatch):
+    path = tmp_path / "results.prlc"
+    with ColumnarWriter(path) as writer:
+        for record in _result_records():
+            writer.write(record)
+
+    members = []
+    original = zipfile.ZipFile.read
+    monkeypatch.setattr(
+        zipfile.ZipFile, "read", lambda self, name: members.append(name) or original(self, name)
+    )
+    assert read_columns(path) == {
+        "candidate_id": ["c1", "c2", "c1"],
+        "task_id": ["t1", "t1", "t2"],
+        "score": [1.0, None, 0.5],
+    }
+    assert not any(name.startswith("output") for name in members)
+    assert list(iter_results(path)) == _result_records()
+
+
+def test_parquet_results_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    path = tmp_path / "results.parquet"
+    with ParquetWriter(path) as writer:
+        for record in _result_records():
+            writer.write(record)
+    assert read_columns(path, ["score"]) == {"score": [1.0, None, 0.5]}
+    assert list(iter_results(path)) == _result_records()
@@ -0,0 +1,128 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from prl.llm_clients import (
+    AdaptiveLimiter,
+    ConnectionPool,
+    LLMHTTPError,
+    LLMRequest,
+    RetryPolicy,
+    call_llm,
+    call_ollama_chat,
+    configure_provider,
+    provider_stats,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections: set[int] = set()
+    failures_left = 0
+
+    def do_POST(self):
+        self.connections.add(id(self.connection))
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        status = 429 if payload["model"] == "busy" else 200
+        if payload["model"] == "flaky" and _Handler.failures_left > 0:
+            _Handler.failures_left -= 1
+            status = 503 if _Handler.failures_left % 2 else 429
+        body = json.dumps({"message": {"content": "pong"}}).encode("utf-8")
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def server(monkeypatch):
+    monkeypatch.setattr("prl.llm_clients._gates", {})
+    _Handler.connections = set()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _request(base_url, model="m"):
+    return LLMRequest(
+        prompt="ping",
+        model=model,
+        temperature=0.0,
+        base_url=base_url,
+        api_key_env=None,
+        provider="ollama",
+    )
+
+
+def test_pool_reuses_connections(server):
+    for _ in range(5):
+        assert call_ollama_chat(_request(server)).content == "pong"
+    assert len(_Handler.connections) == 1
+
+
+def test_pool_raises_http_errors(server):
+    with pytest.raises(LLMHTTPError) as excinfo:
+        call_ollama_chat(_request(server, model="busy"))
+    assert excinfo.value.status == 429
+
+
+def test_pool_reconnects_after_close(server):
+    pool = ConnectionPool(pool_size=1)
+    status, _, _ = pool.request("POST", f"{server}/api/chat", b'{"model": "m"}', {})
+    pool.close()
+    status, _, _ = pool.request("POST", f"{server}/api/chat", b'{"model": "m"}', {})
+    assert status == 200
+
+
+def test_call_llm_retries_throttling_and_server_errors(server):
+    _Handler.failures_left = 3
+    configure_provider("ollama", concurrency=4, retry=RetryPolicy(base_delay=0.001))
+    assert call_llm(_request(server, model="flaky")).content == "pong"
+    stats = provider_stats()["ollama"]
+    assert stats["retries"] == 3
+    assert stats["throttled"] == 2
+    assert stats["concurrency_limit"] == 2  # 4 -> 2 -> 1, then +1 after the success
+
+
+def test_call_llm_gives_up_after_max_retries(server):
+    configure_provider("ollama", concurrency=4, retry=RetryPolicy(max_retries=1, base_delay=0.001))
+    with pytest.raises(LLMHTTPError):
+        call_llm(_request(server, model="busy"))
+    assert provider_stats()["ollama"]["failures"] == 1
+
+
+def test_configure_provider_again_keeps_state(server):
+    _Handler.failures_left = 2
+    configure_provider("ollama", concurrency=8, retry=RetryPolicy(base_delay=0.001))
+    call_llm(_request(server, model="flaky"))
+    configure_provider("ollama", concurrency=8, retry=RetryPolicy(base_delay=0.001))
+    call_llm(_request(server))
+    stats = provider_stats()["ollama"]
+    assert stats["requests"] == 4
+    assert stats["throttled"] == 1
+    assert stats["concurrency_limit"] == 4
+
+    configure_provider("ollama", concurrency=2)
+    assert provider_stats()["ollama"]["concurrency_limit"] == 2
+
+
+def test_adaptive_limiter_halves_and_recovers():
+    limiter = AdaptiveLimiter(8)
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == 5
@@ -1,5 +1,13 @@
+import json
+import threading
+import time
+
+import pytest
+
+from prl.evaluators import EvalOutcome, LLMAsJudgeEvaluator
+from prl.llm_clients import LLMHTTPError, LLMResponse
 from prl.models import Candidate, RunResult, Task
-from prl.skill import evaluate, validate_spec
+from prl.skill import JudgeDeduper, evaluate, optimize, race, validate_spec
 from prl.spec import RunSpec
 
 
@@ -21,3 +29,343 @@ def test_evaluate_scores_candidate():
     )
     result = evaluate(spec)
     assert result.leaderboard[0]["score"] == 1.0
+
+
+def _judge_spec(**evaluator):
+    return RunSpec(
+        candidates=[Candidate(id="c1", content="x"), Candidate(id="c2", content="y")],
+        tasks=[Task(id=f"t{i}", input="q", expected=str(i), judge_rule="exact") for i in range(20)],
+        outputs=[
+            RunResult(candidate_id=c, task_id=f"t{i}", output=str(i if c == "c1" else -i))
+            for c in ("c1", "c2")
+            for i in range(20)
+        ],
+        evaluator={"type": "llm_judge", "provider": "ollama", "model": "m", **evaluator},
+    )
+
+
+def test_evaluate_concurrent_matches_serial(monkeypatch):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_call_ollama(request):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.002)
+        with lock:
+            in_flight -= 1
+        expected, output = request.prompt.split("EXPECTED:\n")[1].split("\nOUTPUT:\n")
+        return LLMResponse(json.dumps({"score": 1.0 if expected == output else 0.0}))
+
+    monkeypatch.setattr("prl.llm_clients.call_ollama_chat", fake_call_ollama)
+    spec = _judge_spec(provider_concurrency={"ollama": 3})
+
+    serial = evaluate(spec)
+    concurrent = evaluate(spec, concurrency=8)
+
+    assert [r.model_dump() for r in concurrent.run_results] == [
+        r.model_dump() for r in serial.run_results
+    ]
+    assert concurrent.leaderboard == serial.leaderboard
+    assert concurrent.leaderboard[0]["candidate_id"] == "c1"
+    assert concurrent.leaderboard[0]["score"] == 1.0
+    assert peak <= 3
+
+
+def test_evaluate_judges_duplicate_outputs_once(monkeypatch):
+    prompts = []
+    lock = threading.Lock()
+
+    def fake_call_ollama(request):
+        with lock:
+            prompts.append(request.prompt)
+        time.sleep(0.005)
+        return LLMResponse(json.dumps({"score": 1.0}), input_tokens=10, output_tokens=2)
+
+    monkeypatch.setattr("prl.llm_clients.call_ollama_chat", fake_call_ollama)
+    candidates = [Candidate(id=f"c{n}", content="x") for n in range(4)]
+    spec = RunSpec(
+        candidates=candidates,
+        tasks=[Task(id=f"t{i}", input="q", expected="a", judge_rule="j") for i in range(10)],
+        outputs=[
+            RunResult(candidate_id=c.id, task_id=f"t{i}", output=f"answer  {i}" + " " * n)
+            for n, c in enumerate(candidates)
+            for i in range(10)
+        ],
+        evaluator={"type": "llm_judge", "provider": "ollama", "model": "m"},
+    )
+
+    result = evaluate(spec, concurrency=8)
+    assert len(prompts) == 10
+    assert len(set(prompts)) == 10
+    assert all(r.score == 1.0 for r in result.run_results)
+    assert result.dedup.stats() == {"outputs": 40, "judged": 10, "reused": 30, "dedup_ratio": 0.75}
+    assert sum(row["input_tokens"] for row in result.usage.by_candidate().values()) == 100
+
+    prompts.clear()
+    spec.evaluator.dedup = False
+    result = evaluate(spec, concurrency=8)
+    assert len(prompts) == 40
+    assert result.dedup is None
+
+
+def test_deduper_keeps_a_bounded_score_map_on_streamed_runs(monkeypatch):
+    prompts = []
+
+    def fake_call_ollama(request):
+        prompts.append(request.prompt)
+        return LLMResponse(json.dumps({"score": 1.0, "reason": "x" * 1000}))
+
+    monkeypatch.setattr("prl.llm_clients.call_ollama_chat", fake_call_ollama)
+    spec = _judge_spec()
+    dedup = JudgeDeduper(max_entries=5)
+    # Each output repeats right away, then once more after 30 other outputs.
+    outputs = (r for r in spec.outputs[:30] * 2 for _ in range(2))
+    result = evaluate(spec, outputs, dedup=dedup)
+
+    assert result.outputs is None
+    assert len(dedup._done) == 5
+    assert all(isinstance(score, float) for score in dedup._done.values())
+    assert dedup.stats()["judged"] == len(prompts) == 60
+    assert result.leaderboard[0]["n"] == 80
+
+
+def test_evaluate_records_failed_judge_calls(monkeypatch):
+    def fake_call_ollama(request):
+        if "OUTPUT:\n-3" in request.prompt:
+            raise LLMHTTPError(429, "Too Many Requests", {"Retry-After": "0"}, "")
+        return LLMResponse(json.dumps({"score": 1.0}))
+
+    monkeypatch.setattr("prl.llm_clients.call_ollama_chat", fake_call_ollama)
+    result = evaluate(_judge_spec(max_retries=1))
+
+    failed = [r for r in result.run_results if r.error is not None]
+    assert [(r.candidate_id, r.task_id, r.error, r.score) for r in failed] == [
+        ("c2", "t3", "judge_failed", None)
+    ]
+    c2 = next(row for row in result.leaderboard if row["candidate_id"] == "c2")
+    assert c2["n"] == 19
+
+
+def test_optimize_rounds_mutate_in_parallel_and_record_lineage(monkeypatch):
+    counter = iter(range(1000))
+    lock = threading.Lock()
+
+    def fake_call_llm(request):
+        time.sleep(0.05)
+        if request.prompt.startswith("You are improving"):
+            with lock:
+                n = next(counter)
+            content = "Reply with digits. {{input}}" if n == 0 else f"Variant {n}. {{{{input}}}}"
+            return LLMResponse(content)
+        return LLMResponse("4" if request.prompt.startswith("Reply with digits") else "four")
+
+    monkeypatch.setattr("prl.skill.call_llm", fake_call_llm)
+    spec = RunSpec(
+        candidates=[Candidate(id="c1", content="Answer: {{input}}")],
+        tasks=[
+            Task(id=f"t{i}", input="What is 2+2?", expected="4", judge_rule="exact")
+            for i in range(3)
+        ],
+        model_config={"provider": "ollama", "model": "m"},
+        optimize_config={"rounds": 2, "mutations_per_round": 4, "max_concurrency": 16},
+    )
+    assert validate_spec(spec) == []
+
+    start = time.perf_counter()
+    result = optimize(spec)
+    elapsed = time.perf_counter() - start
+
+    assert result.best_candidate.content == "Reply with digits. {{input}}"
+    assert result.best_candidate.parent_id == "c1"
+    assert result.rounds[0]["best_id"] == result.best_candidate.id
+    assert result.rounds[1]["parent_id"] == result.best_candidate.id
+    assert len(result.candidates) == 9
+    # Two rounds, each a mutate + generate chain of 0.05 s calls; serial would take ~2.3 s.
+    assert elapsed < 1.0
+
+
+def test_optimize_rounds_record_judge_failures(monkeypatch):
+    def fake_call_llm(request):
+        if request.prompt.startswith("You are improving"):
+            return LLMResponse("Variant. {{input}}")
+        return LLMResponse("42" if request.prompt.startswith("Variant") else "4")
+
+    def flaky_score(self, *, expected, output, rule):
+        if output == "42":
+            raise ConnectionResetError("judge down")
+        return EvalOutcome(score=1.0)
+
+    monkeypatch.setattr("prl.skill.call_llm", fake_call_llm)
+    monkeypatch.setattr(LLMAsJudgeEvaluator, "score", flaky_score)
+    spec = RunSpec(
+        candidates=[Candidate(id="c1", content="Answer: {{input}}")],
+        tasks=[Task(id="t1", input="What is 2+2?", expected="4", judge_rule="exact")],
+        outputs=[RunResult(candidate_id="c1", task_id="t1", output="4")],
+        model_config={"provider": "ollama", "model": "m"},
+        evaluator={"type": "llm_judge", "provider": "ollama", "model": "m"},
+        optimize_config={"rounds": 1, "mutations_per_round": 2},
+    )
+
+    result = optimize(spec)
+
+    generated = [r for r in result.run_results if r.candidate_id != "c1"]
+    assert generated
+    assert all(r.error == "judge_failed" and r.score is None for r in generated)
+    assert result.best_candidate.id == "c1"
+
+
+def test_first_round_mutation_sees_the_start_candidates_scores(monkeypatch):
+    mutation_prompts = []
+
+    def fake_call_llm(request):
+        if request.prompt.startswith("You are improving"):
+            mutation_prompts.append(request.prompt)
+            return LLMResponse("Variant. {{input}}")
+        return LLMResponse("5")
+
+    monkeypatch.setattr("prl.skill.call_llm", fake_call_llm)
+    spec = RunSpec(
+        candidates=[Candidate(id="c1", content="Answer: {{input}}")],
+        tasks=[Task(id="t1", input="What is 2+2?", expected="4", judge_rule="exact")],
+        outputs=[RunResult(candidate_id="c1", task_id="t1", output="four")],
+        model_config={"provider": "ollama", "model": "m"},
+        optimize_config={"rounds": 1, "mutations_per_round": 1},
+    )
+
+    optimize(spec)
+
+    assert len(mutation_prompts) == 1
+    assert "OUTPUT:\nfour\nSCORE: 0.00" in mutation_prompts[0]
+    assert "(no scored cases yet)" not in mutation_prompts[0]
+
+
+def test_validate_spec_requires_execution_model_for_rounds():
+    spec = RunSpec(
+        candidates=[Candidate(id="c1", content="x")],
+        tasks=[Task(id="t1", input="q", expected="a", judge_rule="exact")],
+    )
+    assert validate_spec(spec, rounds=1) == [
+        "execution_provider_missing",
+        "execution_model_missing",
+    ]
+
+
+def test_optimize_successive_halving_saves_judge_calls():
+    accuracy = {f"c{i}": i / 8 for i in range(8)}
+    tasks = [Task(id=f"t{i}", input="q", expected="a", judge_rule="exact") for i in range(40)]
+    spec = RunSpec(
+        candidates=[Candidate(id=cid, content=cid) for cid in accuracy],
+        tasks=tasks,
+        outputs=[
+            RunResult(candidate_id=cid, task_id=t.id, output="a" if i < acc * 40 else "b")
+            for cid, acc in accuracy.items()
+            for i, t in enumerate(tasks)
+        ],
+        optimize_config={"selection": "successive_halving", "min_tasks": 5, "eta": 2, "seed": 1},
+    )
+    exhaustive = optimize(
+        spec.model_copy(
+            update={
+                "optimize_config": spec.optimize_config.model_copy(
+                    update={"selection": "exhaustive"}
+                )
+            }
+        )
+    )
+    raced = optimize(spec)
+
+    assert raced.best_candidate.id == exhaustive.best_candidate.id == "c7"
+    assert raced.racing["outputs"] == 320
+    assert raced.racing["outputs_scored"] == raced.racing["judge_calls"] == 5 * 8 + 5 * 4 + 10 * 2
+    assert raced.racing["outputs_skipped"] == 240
+    assert raced.leaderboard[0]["candidate_id"] == "c7"
+    assert raced.leaderboard[0]["rung"] == 3
+
+
+def test_race_counts_judge_requests_actually_sent(monkeypatch):
+    prompts = []
+
+    def fake_call_ollama(request):
+        prompts.append(request.prompt)
+        return LLMResponse(json.dumps({"score": 1.0 if request.prompt.endswith("\n0") else 0.0}))
+
+    monkeypatch.setattr("prl.llm_clients.call_ollama_chat", fake_call_ollama)
+    spec = _judge_spec()
+    spec.optimize_config.selection = "successive_halving"
+    spec.optimize_config.min_tasks = 5
+
+    raced = race(spec)
+    # Both candidates output "0" for t0, so that pair is judged once.
+    assert raced.judge_calls == len(prompts) == len(raced.run_results) - 1
+    assert sum(rung["judge_calls"] for rung in raced.rungs) == raced.judge_calls
+    # Only the outputs racing never scored count as its saving, not the dedup hit.
+    summary = raced.summary()
+    assert summary["outputs_skipped"] == summary["outputs"] - len(raced.run_results)
+    assert summary["judge_calls"] == summary["outputs_scored"] - 1
+
+    full = evaluate(spec)
+    assert [row["n"] for row in full.leaderboard] == [20, 20]
+
+
+def _binary_spec(rates: dict[str, float], n: int, **evaluator) -> RunSpec:
+    tasks = [
+        Task(id=f"t{i}", input="q", expected="ok", judge_rule={"type": "exact"}) for i in range(n)
+    ]
+    outputs = [
+        RunResult(
+            candidate_id=cid,
+            task_id=f"t{i}",
+            output="ok" if (i * 7919 % 100) < rate * 100 else "no",
+        )
+        for i in range(n)
+        for cid, rate in rates.items()
+    ]
+    return RunSpec(
+        candidates=[Candidate(id=cid, content=cid) for cid in rates],
+        tasks=tasks,
+        outputs=outputs,
+        evaluator=evaluator,
+    )
+
+
+def test_leaderboard_reports_confidence_intervals():
+    result = evaluate(_binary_spec({"good": 0.9, "bad": 0.1}, 200))
+    top, bottom = result.leaderboard
+    assert top["candidate_id"] == "good" and top["n"] == 200
+    assert top["ci_low"] <= top["score"] <= top["ci_high"]
+    assert 0.0 < top["variance"] < 0.25
+    assert top["separated"] is True
+    assert bottom["separated"] is False
+    assert not result.stopped_early
+
+
+def test_early_stop_once_leader_is_separated():
+    full = evaluate(_binary_spec({"good": 0.95, "bad": 0.05}, 400))
+    stopped = evaluate(
+        _binary_spec({"good": 0.95, "bad": 0.05}, 400, early_stop=True, early_stop_min_samples=20)
+    )
+    assert stopped.stopped_early
+    assert len(stopped.run_results) < len(full.run_results)
+    assert stopped.leaderboard[0]["candidate_id"] == "good"
+    assert stopped.leaderboard[0]["separated"] is True
+
+    close = evaluate(_binary_spec({"a": 0.5, "b": 0.5}, 100, early_stop=True))
+    assert not close.stopped_early
+
+
+def test_evaluate_task_breakdown():
+    result = evaluate(_binary_spec({"good": 1.0, "bad": 0.0}, 3))
+    assert result.task_breakdown() == {f"t{i}": {"good": 1.0, "bad": 0.0} for i in range(3)}
+
+
+def test_evaluate_does_not_keep_streamed_outputs():
+    spec = _binary_spec({"good": 1.0, "bad": 0.0}, 3)
+    streamed = evaluate(spec, iter(spec.outputs))
+    assert streamed.outputs is None
+    assert streamed.leaderboard == evaluate(spec).leaderboard
+    with pytest.raises(ValueError, match="run_results_unavailable"):
+        _ = streamed.run_results
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+# Modules only the scoring commands need; `prl validate` must not pay for them.
+HEAVY_MODULES = {
+    "prl.skill",
+    "prl.evaluators",
+    "prl.llm_clients",
+    "prl.cache",
+    "prl.table",
+    "prl.baseline",
+}
+# prl's own modules may take at most this share of the run's total import self time. A
+# ratio, unlike a wall-clock budget, does not fail on a loaded machine; about a fifth today.
+PRL_IMPORT_SHARE = 0.5
+
+
+def test_validate_imports_only_what_it_needs(tmp_path):
+    spec = tmp_path / "spec.yaml"
+    spec.write_text(
+        "candidates: [{id: c1, content: x}]\n"
+        "tasks: [{id: t1, input: q, expected: a, judge_rule: exact}]\n"
+        "outputs: [{candidate_id: c1, task_id: t1, output: a}]\n",
+        encoding="utf-8",
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "prl", "validate", str(spec)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.startswith("ok")
+
+    self_times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, _, name = line.removeprefix("import time:").split("|")
+            if self_us.strip().isdigit():
+                self_times[name.strip()] = int(self_us)
+
+    assert not HEAVY_MODULES & self_times.keys()
+    prl_time = sum(us for name, us in self_times.items() if name.split(".")[0] == "prl")
+    total = sum(self_times.values())
+    assert prl_time < PRL_IMPORT_SHARE * total, f"prl modules took {prl_time}us of {total}us"
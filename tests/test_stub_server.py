@@ -0,0 +1,115 @@
+import json
+import random
+import time
+import urllib.request
+
+import pytest
+
+from prl.cache import JudgeCache
+from prl.evaluators import EvalItem, LLMAsJudgeEvaluator
+from prl.llm_clients import PROVIDERS, LLMRequest, RetryPolicy, call_llm, configure_provider
+from prl.stub_server import StubConfig, StubServer, judge_reply, parse_latency
+
+
+@pytest.fixture()
+def reset_gates():
+    yield
+    for provider in PROVIDERS:
+        configure_provider(provider, concurrency=64)
+
+
+def _judge(provider, url):
+    return LLMAsJudgeEvaluator(
+        provider=provider,
+        model="stub",
+        base_url=url,
+        api_key_env=None,
+        temperature=0.0,
+        judge_prompt=None,
+    )
+
+
+def test_judge_reply_is_deterministic():
+    assert json.loads(judge_reply("EXPECTED:\n4\nOUTPUT:\n 4 "))["score"] == 1.0
+    assert json.loads(judge_reply("EXPECTED:\n4\nOUTPUT:\n5"))["score"] == 0.0
+    assert judge_reply("hello") == judge_reply("hello") != judge_reply("bye")
+
+
+def test_parse_latency():
+    rng = random.Random(0)
+    assert parse_latency("fixed:20")(rng) == 0.02
+    assert 0.01 <= parse_latency("uniform:10,30")(rng) <= 0.03
+    assert parse_latency("lognormal:5,0.5")(rng) > 0
+    with pytest.raises(ValueError, match="latency_invalid"):
+        parse_latency("normal:5")
+
+
+@pytest.mark.parametrize("provider", PROVIDERS)
+def test_every_provider_wire_format(provider, reset_gates):
+    with StubServer() as server:
+        judge = _judge(provider, server.url)
+        assert judge.score(expected="4", output="4", rule="").score == 1.0
+        assert judge.score(expected="4", output="5", rule="").score == 0.0
+        items = [EvalItem(expected="a", output=output, rule="") for output in ("a", "b")]
+        outcomes = judge.score_batch(items)
+        assert [outcome.score for outcome in outcomes] == [1.0, 0.0]
+        assert server.stats[f"requests:{provider}"] == 3
+
+
+def test_throttling_is_retried(reset_gates):
+    config = StubConfig(throttle_rate=0.3, error_rate=0.2, retry_after=0, seed=1)
+    configure_provider("ollama", concurrency=4, retry=RetryPolicy(max_retries=50, base_delay=0))
+    with StubServer(config) as server:
+        for index in range(20):
+            request = LLMRequest(
+                prompt=f"p{index}",
+                model="stub",
+                temperature=0.0,
+                base_url=server.url,
+                api_key_env=None,
+                provider="ollama",
+            )
+            assert call_llm(request).content == judge_reply(f"p{index}")
+        with urllib.request.urlopen(f"{server.url}/stats") as response:
+            stats = json.loads(response.read())
+    assert stats["ok"] == 20
+    assert stats["throttled"] > 0 and stats["errors"] > 0
+    assert stats["requests"] == 20 + stats["throttled"] + stats["errors"]
+
+
+def test_streamed_judge_stops_after_score(reset_gates):
+    config = StubConfig(reason_chars=300, chunk_delay_ms=2)
+    with StubServer(config) as server:
+        for provider in PROVIDERS:
+            judge = _judge(provider, server.url)
+            plain = judge.score(expected="4", output="5", rule="")
+
+            judge.stream = True
+            assert judge.score(expected="4", output="5", rule="") == plain
+            start = time.perf_counter()
+            full = judge.score(expected="4", output="4", rule="")
+            full_seconds = time.perf_counter() - start
+
+            judge.max_reason_chars = 12
+            start = time.perf_counter()
+            cut = judge.score(expected="4", output="4", rule="")
+            cut_seconds = time.perf_counter() - start
+
+            assert (full.score, cut.score) == (1.0, 1.0)
+            assert len(full.reason) == 300 and cut.reason == "stub" + "." * 8
+            assert cut.output_tokens < full.output_tokens or provider == "gemini"
+            assert cut_seconds < full_seconds / 2
+        assert server.stats["streams"] == 12
+
+
+def test_cut_streamed_judgements_are_not_cached(reset_gates, tmp_path):
+    with StubServer(StubConfig(reason_chars=300)) as server:
+        judge = _judge("openai", server.url)
+        judge.cache = JudgeCache(tmp_path / "judge.sqlite")
+        judge.stream, judge.max_reason_chars = True, 12
+        assert len(judge.score(expected="4", output="4", rule="").reason) == 12
+        assert judge.cache.writes == 0
+
+        judge.stream, judge.max_reason_chars = False, None
+        assert len(judge.score(expected="4", output="4", rule="").reason) == 300
+        assert judge.cache.writes == 1
@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from prl import table as table_module
+from prl.models import RunResult
+from prl.table import ScoreTable
+
+
+def _table():
+    table = ScoreTable(["c1", "c2"])
+    for task, c1, c2 in (("t1", 1.0, 0.0), ("t2", 0.5, None), ("t1", 0.0, 1.0)):
+        table.append("c1", task, c1)
+        table.append("c2", task, c2, None if c2 is not None else "judge_failed")
+    return table
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_group_stats_and_task_breakdown(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(table_module, "np", None)
+    elif table_module.np is None:
+        pytest.skip("numpy not installed")
+    table = _table()
+
+    stats = table.group_stats()
+    assert stats["c1"][:2] == (3, 1.5)
+    assert math.isclose(stats["c1"][2], 0.5)
+    assert stats["c2"] == (2, 1.0, 0.5)
+    assert table.task_breakdown() == {
+        "t1": {"c1": 0.5, "c2": 0.5},
+        "t2": {"c1": 0.5},
+    }
+
+
+def test_results_are_built_at_the_boundary():
+    table = _table()
+    outputs = [
+        RunResult(candidate_id=c, task_id=t, output="x")
+        for t in ("t1", "t2", "t1")
+        for c in ("c1", "c2")
+    ]
+    results = table.results(outputs)
+    assert [r.score for r in results] == [1.0, 0.0, 0.5, None, 0.0, 1.0]
+    assert results[3].error == "judge_failed"
+    assert outputs[0].score is None
@@ -0,0 +1,101 @@
+import json
+import threading
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from prl.cli import app
+from prl.stub_server import StubServer
+from prl.tracing import RESERVOIR_SIZE, Tracer, span, summary_table, tracing
+
+runner = CliRunner()
+
+
+def test_spans_nest_per_thread_and_summarise():
+    with tracing() as tracer:
+        with span("outer", kind="stage"):
+            with span("inner") as inner:
+                inner.set(status=200)
+
+            def work():
+                with span("worker"):
+                    pass
+
+            worker = threading.Thread(target=work, name="judge-0")
+            worker.start()
+            worker.join()
+    with span("untraced"):
+        pass
+
+    trace = tracer.chrome_trace()["traceEvents"]
+    events = {e["name"]: e for e in trace if e["ph"] == "X"}
+    assert set(events) == {"outer", "inner", "worker"}
+    outer, inner = events["outer"], events["inner"]
+    assert events["worker"]["tid"] != outer["tid"] == inner["tid"]
+    assert {"name": "judge-0"} in [e["args"] for e in trace if e["ph"] == "M"]
+    assert outer["name"] == "outer" and outer["args"] == {"kind": "stage"}
+    assert inner["args"] == {"status": 200}
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert tracer.summary()["inner"]["count"] == 1
+    assert "| outer | 1 |" in summary_table(tracer.summary())
+
+
+def test_span_records_exceptions():
+    tracer = Tracer()
+    try:
+        with tracer.span("boom"):
+            raise KeyError("x")
+    except KeyError:
+        pass
+    assert tracer.chrome_trace()["traceEvents"][-1]["args"] == {"error": "KeyError"}
+
+
+def test_streaming_tracer_memory_stays_bounded(tmp_path):
+    tracer = Tracer()
+    with tracer.span("before"):
+        pass
+    tracer.open(tmp_path / "trace.json")
+    for index in range(5 * RESERVOIR_SIZE):
+        with tracer.span("llm.call", index=index):
+            pass
+    assert tracer._events == []
+    assert len(tracer._stats["llm.call"].samples) == RESERVOIR_SIZE
+    summary = tracer.summary()
+    assert summary["llm.call"]["count"] == 5 * RESERVOIR_SIZE
+    assert list(summary) == ["before", "llm.call"]
+
+    tracer.close()
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len([e for e in events if e["ph"] == "X"]) == 5 * RESERVOIR_SIZE + 1
+    assert events[0]["name"] == "before" and events[-1]["ph"] == "M"
+
+
+def test_evaluate_writes_trace_and_latency_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with StubServer() as server:
+        spec = {
+            "candidates": [{"id": "c1", "content": "x"}],
+            "tasks": [{"id": "t1", "input": "q", "expected": "4", "judge_rule": "exact"}],
+            "outputs": [{"candidate_id": "c1", "task_id": "t1", "output": "4"}],
+            "evaluator": {
+                "type": "llm_judge",
+                "provider": "ollama",
+                "model": "stub",
+                "base_url": server.url,
+                "cache": False,
+            },
+        }
+        path = tmp_path / "spec.json"
+        path.write_text(json.dumps(spec), encoding="utf-8")
+        result = runner.invoke(app, ["evaluate", str(path)])
+    assert result.exit_code == 0, result.output
+
+    run_dir = Path(result.output.strip())
+    events = json.loads((run_dir / "trace.json").read_text())["traceEvents"]
+    names = {event["name"] for event in events if event["ph"] == "X"}
+    assert {"load_spec", "validate", "score", "llm.call", "llm.parse", "write_report"} <= names
+    call = next(event for event in events if event["name"] == "llm.call")
+    assert call["args"]["status"] == 200 and call["args"]["provider"] == "ollama"
+    assert call["args"]["input_tokens"] > 0
+    report = (run_dir / "report.md").read_text()
+    assert "## Latency" in report and "| llm.call | 1 |" in report